@@ -1,7 +1,7 @@
+import sys
 import asyncio
 import struct
-from bleak import BleakClient, BleakScanner
-from bleak.exc import BleakError
+from transport import BleakTransport, SimulatedTransport, SimulatedDevice, BleakError, x_sweep, y_flicks
 
 # --- Configuration for PicoYButton ---
 YBUTTON_DEVICE_NAME = "PicoYButton"
@@ -11,6 +11,9 @@ YBUTTON_CHAR_UUID = "b3a16388-795d-4f31-8bc5-f387994090e3"
 XAXIS_DEVICE_NAME = "PicoXAxisOnly"
 XAXIS_CHAR_UUID = "b3a16388-795d-4f31-8bc5-f387994090e4"
 
+# --- Where devices come from: real Bluetooth, or stand-ins with --simulate ---
+transport = None
+
 # --- Global variables to store the latest state ---
 latest_x = "N/A"
 latest_y = "N/A"
@@ -61,7 +64,7 @@ async def device_connection_manager(device_name, characteristic_uuid, notificati
             print(f"Scanning for {device_name}...")
             try:
                 # Using a slightly longer timeout for initial scan in case of noisy environments
-                device = await BleakScanner.find_device_by_name(device_name, timeout=15.0)
+                device = await transport.find_device_by_name(device_name, timeout=15.0)
                 if device:
                     device_address = device.address
                     print(f"Found {device_name} at {device_address}")
@@ -78,7 +81,7 @@ async def device_connection_manager(device_name, characteristic_uuid, notificati
                 await asyncio.sleep(10)
                 continue
 
-        client = BleakClient(device_address)
+        client = transport.client(device_address)
         try:
             print(f"Attempting to connect to {device_name} ({device_address})...")
             await client.connect(timeout=15.0) # Increased connection timeout
@@ -143,6 +146,14 @@ async def main():
 
 
 if __name__ == "__main__":
+    if "--simulate" in sys.argv:
+        # Stand-ins for both boards, at a slow rate so the output stays readable
+        transport = SimulatedTransport([
+            SimulatedDevice(YBUTTON_DEVICE_NAME, YBUTTON_CHAR_UUID, "<HB", y_flicks, rate=5),
+            SimulatedDevice(XAXIS_DEVICE_NAME, XAXIS_CHAR_UUID, "<H", x_sweep, rate=5)
+        ])
+    else:
+        transport = BleakTransport()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,8 +1,9 @@
 import asyncio
 import struct
 import threading
-from bleak import BleakClient, BleakScanner
-from bleak.exc import BleakError
+from BluetoothV2.transport import BleakTransport, BleakError
+from BluetoothV2.connection import AddressCache, Backoff, ConnectionMetrics, ADDRESS_CACHE
+from BluetoothV2.sample_buffer import SampleRing, RateLimitedLog, SOURCE_X, SOURCE_Y
 
 class BluetoothController:
     # Default configurations for Pico devices
@@ -10,8 +11,12 @@ class BluetoothController:
     YBUTTON_CHAR_UUID = "b3a16388-795d-4f31-8bc5-f387994090e3"
     XAXIS_DEVICE_NAME = "PicoXAxisOnly"
     XAXIS_CHAR_UUID = "b3a16388-795d-4f31-8bc5-f387994090e4"
+    SCAN_TIMEOUT = 10.0  # Seconds a scan looks for the boards
+    CONNECT_TIMEOUT = 10.0
+    DIRECT_ATTEMPTS = 3  # Failed connects to a known address before scanning for it again
     
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, transport=None, address_cache=ADDRESS_CACHE):
+        # address_cache: JSON file of known board addresses, or None to keep them in memory only
         # State variables
         self.latest_x = 0
         self.latest_y = 0
@@ -19,6 +24,20 @@ class BluetoothController:
         self.x_connected = False
         self.y_connected = False
         self.debug = debug
+        # Where devices are found and connected; SimulatedTransport stands in for the hardware
+        self.transport = transport if transport is not None else BleakTransport()
+        
+        # Connection management shared by both device tasks
+        self.addresses = AddressCache(address_cache)
+        self.metrics = {self.YBUTTON_DEVICE_NAME: ConnectionMetrics(), self.XAXIS_DEVICE_NAME: ConnectionMetrics()}
+        self.scan_task = None
+        self.scan_names = set()
+        self.wanted = set()  # Devices waiting on a scan
+        
+        # Samples go from the notification handlers to the game loop through the ring
+        self.samples = SampleRing()
+        self.received = [0, 0]  # Samples received per source, for the rate in the log
+        self.limited_log = RateLimitedLog("[BT Controller]", enabled=debug)
         
         # Threading components
         self.thread = None
@@ -30,8 +49,24 @@ class BluetoothController:
         if self.debug:
             print(f"[BT Controller] {message}")
     
-    def get_controller_state(self):
+    def drain(self):
+        """Samples received since the last drain, oldest first, as (timestamp, source, value, button).
+
+        Also brings latest_x, latest_y and latest_btn up to date.
+        """
+        samples = self.samples.drain()
+        for timestamp, source, value, button in samples:
+            if source == SOURCE_X:
+                self.latest_x = value
+            else:
+                self.latest_y = value
+                self.latest_btn = button
+        return samples
+    
+    def get_controller_state(self, drain=True):
         """Return the current state of both controllers"""
+        if drain:
+            self.drain()
         return {
             'x': self.latest_x,
             'y': self.latest_y,
@@ -44,60 +79,104 @@ class BluetoothController:
         """Check if at least one controller is connected"""
         return self.x_connected or self.y_connected
     
+    # The handlers run for every packet, so they only queue the sample; logging
+    # is a once a second summary from the connection manager
     def ybutton_notification_handler(self, sender, data):
         """Handles notifications from PicoYButton"""
         try:
             y_val, btn_val = struct.unpack('<HB', data)
-            self.latest_y = y_val
-            self.latest_btn = btn_val
-            self.log(f"Y: {self.latest_y}, Btn: {self.latest_btn}")
+            self.samples.push(SOURCE_Y, y_val, btn_val)
+            self.received[SOURCE_Y] += 1
         except struct.error:
-            self.log(f"PicoYButton: Error unpacking Y/Btn data - {data.hex()}")
+            self.limited_log("y_unpack", f"PicoYButton: Error unpacking Y/Btn data - {data.hex()}")
         except Exception as e:
-            self.log(f"PicoYButton: Unexpected error in handler: {e}")
+            self.limited_log("y_error", f"PicoYButton: Unexpected error in handler: {e}")
 
     def xaxis_notification_handler(self, sender, data):
         """Handles notifications from PicoXAxisOnly"""
         try:
             x_val, = struct.unpack('<H', data)  # Note the comma for single value tuple
-            self.latest_x = x_val
-            self.log(f"X: {self.latest_x}")
+            self.samples.push(SOURCE_X, x_val)
+            self.received[SOURCE_X] += 1
         except struct.error:
-            self.log(f"PicoXAxisOnly: Error unpacking X data - {data.hex()}")
+            self.limited_log("x_unpack", f"PicoXAxisOnly: Error unpacking X data - {data.hex()}")
         except Exception as e:
-            self.log(f"PicoXAxisOnly: Unexpected error in handler: {e}")
+            self.limited_log("x_error", f"PicoXAxisOnly: Unexpected error in handler: {e}")
+
+    async def scan(self, device_name):
+        """Address of device_name from a scan shared with the other device's task, or None"""
+        self.wanted.add(device_name)
+        try:
+            # Give the other task a moment to ask too, so one scan finds both boards
+            await asyncio.sleep(0)
+            while True:
+                if self.scan_task is None or self.scan_task.done():
+                    self.scan_names = set(self.wanted)
+                    self.scan_task = asyncio.ensure_future(self._scan(self.scan_names))
+                task, names = self.scan_task, self.scan_names
+                found = await asyncio.shield(task)
+                if device_name in names:
+                    return found.get(device_name)
+                # That scan was started before we asked; the next one will include us
+        finally:
+            self.wanted.discard(device_name)
+
+    async def _scan(self, names):
+        self.log(f"Scanning for {', '.join(sorted(names))}...")
+        try:
+            found = await self.transport.discover(names, timeout=self.SCAN_TIMEOUT)
+        except BleakError as e:
+            self.log(f"Error scanning: {e}")
+            return {}
+        except Exception as e:
+            self.log(f"Unexpected error during scan: {e}")
+            return {}
+        for name, address in found.items():
+            self.log(f"Found {name} at {address}")
+            self.addresses.set(name, address)
+        return found
 
     async def device_connection_manager(self, device_name, characteristic_uuid, notification_handler, is_y_device=False):
-        """Manages connection, notification subscription, and reconnection for a single BLE device"""
-        device_address = None
+        """Manages connection, notification subscription, and reconnection for a single BLE device.
+
+        A known address (from this session or the address cache) is
+        connected to straight away, retrying with exponential backoff; only
+        after DIRECT_ATTEMPTS failures is the address dropped and the
+        shared scan used to find the board again.
+        """
+        metrics = self.metrics[device_name]
+        backoff = Backoff()
+        direct_failures = 0
         
         while self.running:
-            if not device_address:
-                self.log(f"Scanning for {device_name}...")
-                try:
-                    device = await BleakScanner.find_device_by_name(device_name, timeout=15.0)
-                    if device:
-                        device_address = device.address
-                        self.log(f"Found {device_name} at {device_address}")
-                    else:
-                        self.log(f"{device_name} not found. Retrying scan in 10 seconds...")
-                        await asyncio.sleep(10)
-                        continue
-                except BleakError as e:
-                    self.log(f"Error scanning for {device_name}: {e}. Retrying scan in 10 seconds...")
-                    await asyncio.sleep(10)
-                    continue
-                except Exception as e:
-                    self.log(f"Unexpected error during scan for {device_name}: {e}. Retrying...")
-                    await asyncio.sleep(10)
+            device_address = self.addresses.get(device_name)
+            direct = device_address is not None
+            if not direct:
+                metrics.scans += 1
+                device_address = await self.scan(device_name)
+                if not device_address:
+                    delay = backoff.next_delay()
+                    self.log(f"{device_name} not found. Retrying scan in {delay:.2f} seconds...")
+                    await asyncio.sleep(delay)
                     continue
 
-            client = BleakClient(device_address)
+            # Set by the transport as soon as the link drops, so we don't wait for a poll
+            link_lost = asyncio.Event()
+            client = self.transport.client(device_address, disconnected_callback=lambda c: link_lost.set())
+            connected = False
             try:
                 self.log(f"Attempting to connect to {device_name} ({device_address})...")
-                await client.connect(timeout=15.0)
+                await client.connect(timeout=self.CONNECT_TIMEOUT)
                 if client.is_connected:
-                    self.log(f"Successfully connected to {device_name}.")
+                    connected = True
+                    reconnect_time = metrics.connected(direct)
+                    if reconnect_time is not None:
+                        self.log(f"Reconnected to {device_name} in {reconnect_time:.2f}s.")
+                    else:
+                        self.log(f"Successfully connected to {device_name}.")
+                    backoff.reset()
+                    direct_failures = 0
+                    
                     # Update connection status
                     if is_y_device:
                         self.y_connected = True
@@ -108,8 +187,17 @@ class BluetoothController:
                     await client.start_notify(characteristic_uuid, notification_handler)
                     self.log(f"Notifications started for {device_name}. Monitoring...")
 
-                    while client.is_connected and self.running:
-                        await asyncio.sleep(1)  # Keep the task alive and check connection status
+                    source = SOURCE_Y if is_y_device else SOURCE_X
+                    last_received = self.received[source]
+                    while client.is_connected and self.running and not link_lost.is_set():
+                        try:
+                            await asyncio.wait_for(link_lost.wait(), 1.0)
+                        except asyncio.TimeoutError:
+                            pass
+                        received = self.received[source]
+                        self.log(f"{device_name}: {received - last_received} samples/s, "
+                                 f"{self.samples.dropped} dropped in total")
+                        last_received = received
 
             except BleakError as e:
                 self.log(f"BleakError with {device_name}: {e}")
@@ -136,10 +224,26 @@ class BluetoothController:
                     except Exception as e:
                         self.log(f"Error disconnecting from {device_name}: {e}")
 
-                self.log(f"{device_name} disconnected or connection failed.")
-                device_address = None  # Reset address to trigger rescan
-                self.log(f"Will attempt to reconnect/rescan for {device_name} in 5 seconds...")
-                await asyncio.sleep(5)
+                if connected:
+                    metrics.disconnected()
+                    self.log(f"{device_name} disconnected, reconnecting...")
+                else:
+                    metrics.failed_attempts += 1
+                    if direct:
+                        direct_failures += 1
+                        if direct_failures >= self.DIRECT_ATTEMPTS:
+                            # The board may have a new address; find it again
+                            self.log(f"Giving up on {device_address} for {device_name}, scanning again.")
+                            self.addresses.forget(device_name)
+                            direct_failures = 0
+                    if self.running:
+                        delay = backoff.next_delay()
+                        self.log(f"Connecting to {device_name} failed, retrying in {delay:.2f} seconds...")
+                        await asyncio.sleep(delay)
+
+    def connection_stats(self):
+        """Connection and reconnect-time metrics per device"""
+        return {name: metrics.stats() for name, metrics in self.metrics.items()}
 
     async def run_bluetooth(self):
         """Run both device connection managers concurrently"""
@@ -180,6 +284,7 @@ class BluetoothController:
             return
             
         self.running = True
+        self.scan_task = None  # A scan from an earlier run belonged to its own event loop
         self.thread = threading.Thread(target=self._thread_target, daemon=True)
         self.thread.start()
         self.log("Bluetooth controller started in background thread")
@@ -192,5 +297,9 @@ class BluetoothController:
         if self.thread is not None and self.thread.is_alive():
             self.thread.join(timeout=1.0)
             self.log("Bluetooth controller stopped")
+            for name, stats in self.connection_stats().items():
+                mean = stats['mean_reconnect_s']
+                self.log(f"{name}: {stats['connects']} connects, {stats['scans']} scans, "
+                         f"mean reconnect {f'{mean:.2f}s' if mean is not None else 'n/a'}")
         else:
             self.log("Bluetooth controller was not running")
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+
+from BluetoothV2.transport import SIM_ADDRESS_PREFIX
+
+# Addresses of boards seen before, so a new session can connect without scanning
+ADDRESS_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "known_devices.json")
+
+BACKOFF_START = 0.25  # Seconds before the first retry
+BACKOFF_MAX = 8.0  # Longest wait between retries
+BACKOFF_FACTOR = 2.0
+
+
+class AddressCache:
+    """Device name -> address, kept in a JSON file across sessions"""
+
+    def __init__(self, path=ADDRESS_CACHE):
+        self.path = path
+        self.addresses = {}
+        if path is not None:
+            try:
+                with open(path, "r") as f:
+                    self.addresses = dict(json.load(f))
+            except (OSError, ValueError, TypeError):
+                self.addresses = {}
+            # Files written before simulated addresses were left out may hold some
+            self.addresses = {name: address for name, address in self.addresses.items()
+                              if not is_simulated(address)}
+
+    def get(self, name):
+        return self.addresses.get(name)
+
+    def set(self, name, address):
+        if self.addresses.get(name) == address:
+            return
+        self.addresses[name] = address
+        self.save()
+
+    def forget(self, name):
+        if self.addresses.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        temp_path = self.path + ".tmp"
+        try:
+            # Simulated boards must never be mistaken for real ones next session
+            real = {name: address for name, address in self.addresses.items() if not is_simulated(address)}
+            with open(temp_path, "w") as f:
+                json.dump(real, f, indent=4)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: could not save Bluetooth addresses to {self.path}: {e}")
+
+
+def is_simulated(address):
+    return isinstance(address, str) and address.startswith(SIM_ADDRESS_PREFIX)
+
+
+class Backoff:
+    """Exponentially growing retry delays, starting over after a success"""
+
+    def __init__(self, start=BACKOFF_START, maximum=BACKOFF_MAX, factor=BACKOFF_FACTOR):
+        self.start = start
+        self.maximum = maximum
+        self.factor = factor
+        self.failures = 0
+
+    def next_delay(self):
+        delay = min(self.maximum, self.start * self.factor ** self.failures)
+        self.failures += 1
+        return delay
+
+    def reset(self):
+        self.failures = 0
+
+
+class ConnectionMetrics:
+    """Connection history of one device, for judging how fast it recovers"""
+
+    def __init__(self):
+        self.connects = 0
+        self.disconnects = 0
+        self.failed_attempts = 0
+        self.scans = 0
+        self.direct_connects = 0  # Connected straight to a cached address
+        self.first_connect = None  # Seconds from start to the first connection
+        self.reconnect_times = []  # Seconds from each link loss to being connected again
+        self.started = time.perf_counter()
+        self.lost_at = None
+
+    def connected(self, direct):
+        now = time.perf_counter()
+        self.connects += 1
+        if direct:
+            self.direct_connects += 1
+        reconnect = None
+        if self.first_connect is None:
+            self.first_connect = now - self.started
+        elif self.lost_at is not None:
+            reconnect = now - self.lost_at
+            self.reconnect_times.append(reconnect)
+        self.lost_at = None
+        return reconnect
+
+    def disconnected(self):
+        self.disconnects += 1
+        self.lost_at = time.perf_counter()
+
+    def stats(self):
+        times = self.reconnect_times
+        return {
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "failed_attempts": self.failed_attempts,
+            "scans": self.scans,
+            "direct_connects": self.direct_connects,
+            "first_connect_s": self.first_connect,
+            "last_reconnect_s": times[-1] if times else None,
+            "mean_reconnect_s": sum(times) / len(times) if times else None,
+            "max_reconnect_s": max(times) if times else None
+        }
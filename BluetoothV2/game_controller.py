@@ -1,14 +1,21 @@
+import time
 from BluetoothV2.bluetooth_controller import BluetoothController
+from BluetoothV2.connection import ADDRESS_CACHE
+from BluetoothV2.sample_buffer import SOURCE_X
+from BluetoothV2.input_filter import make_filter, Hysteresis, LatencyStats
 
 class GameController:
     # Default thresholds for controller input
     X_CENTER = 32767  # Middle value for X axis (0-65535 range)
     Y_CENTER = 32767  # Middle value for Y axis (0-65535 range)
     DEADZONE = 5000   # Deadzone to prevent drift
+    DEADZONE_RELEASE = 3500  # Back inside this and movement stops (hysteresis)
     JUMP_THRESHOLD = 20000  # Threshold for jump detection
+    JUMP_RELEASE = 15000  # Stick must come back this far before the next jump
+    FILTER = "one_euro"  # Smoothing of the X axis: one_euro, ema or raw
     
-    def __init__(self, debug=False):
-        self.bt_controller = BluetoothController(debug=debug)
+    def __init__(self, debug=False, filter_kind=FILTER, transport=None, address_cache=ADDRESS_CACHE):
+        self.bt_controller = BluetoothController(debug=debug, transport=transport, address_cache=address_cache)
         self.debug = debug
         
         # Game control state
@@ -20,6 +27,14 @@ class GameController:
         # Previous state for edge detection
         self.prev_button_state = False
         
+        # Filtering of the sample stream
+        self.x_filter = make_filter(filter_kind)
+        self.left = Hysteresis(self.X_CENTER, -1, self.DEADZONE, self.DEADZONE_RELEASE)
+        self.right = Hysteresis(self.X_CENTER, 1, self.DEADZONE, self.DEADZONE_RELEASE)
+        # Lower Y values indicate upward movement
+        self.jump = Hysteresis(self.Y_CENTER, -1, self.JUMP_THRESHOLD, self.JUMP_RELEASE)
+        self.latency = LatencyStats()
+        
     def log(self, message):
         """Print debug messages if debug mode is enabled"""
         if self.debug:
@@ -32,51 +47,61 @@ class GameController:
     def stop(self):
         """Stop the Bluetooth controller"""
         self.bt_controller.stop()
+        self.log(self.latency.report())
     
     def is_connected(self):
         """Check if the Bluetooth controller is connected"""
         return self.bt_controller.is_connected()
     
+    def _steer(self, x_value):
+        """Run the X value through the deadzone; returns True if the direction changed"""
+        changed = self.left.update(x_value) | self.right.update(x_value)
+        if changed:
+            self.moving_left = self.left.active
+            self.moving_right = self.right.active
+            if self.moving_left:
+                self.log(f"Moving left: {x_value:.0f}")
+            elif self.moving_right:
+                self.log(f"Moving right: {x_value:.0f}")
+        return changed
+    
     def update(self):
         """Update the game control state based on Bluetooth controller state"""
-        # Get the current state from the Bluetooth controller
-        state = self.bt_controller.get_controller_state()
+        now = time.perf_counter()
+        # Everything received since the last update, oldest first
+        samples = self.bt_controller.drain()
+        state = self.bt_controller.get_controller_state(drain=False)
         
-        # Process X-axis for horizontal movement
-        x_value = state['x']
-        if abs(x_value - self.X_CENTER) > self.DEADZONE:
-            if x_value < self.X_CENTER - self.DEADZONE:
-                self.moving_left = True
-                self.moving_right = False
-                self.log(f"Moving left: {x_value}")
-            elif x_value > self.X_CENTER + self.DEADZONE:
-                self.moving_left = False
-                self.moving_right = True
-                self.log(f"Moving right: {x_value}")
-        else:
-            self.moving_left = False
-            self.moving_right = False
-        
-        # Process Y-axis for jumping
-        y_value = state['y']
-        # Lower Y values indicate upward movement
-        if y_value < self.Y_CENTER - self.JUMP_THRESHOLD:
-            if not self.jumping:  # Only trigger jump on the initial movement
-                self.jumping = True
-                self.log(f"Jump triggered: {y_value}")
-        else:
-            self.jumping = False
+        jump_started = False
+        self.button_pressed = False
+        got_x = False
+        for timestamp, source, value, button in samples:
+            if source == SOURCE_X:
+                # Process X-axis for horizontal movement, smoothed
+                got_x = True
+                if self._steer(self.x_filter.filter(value, timestamp)):
+                    self.latency.add(now - timestamp)
+            else:
+                # Process Y-axis for jumping. Every raw sample is checked, so a
+                # flick up that is already back by this frame still jumps
+                if self.jump.update(value) and self.jump.active:
+                    jump_started = True
+                    self.latency.add(now - timestamp)
+                    self.log(f"Jump triggered: {value}")
+                
+                # Process button state (edge detection - only trigger on press, not hold)
+                current_button_state = button > 0
+                if current_button_state and not self.prev_button_state:
+                    self.button_pressed = True
+                    self.latency.add(now - timestamp)
+                    self.log(f"Button pressed: {button}")
+                self.prev_button_state = current_button_state
         
-        # Process button state (edge detection - only trigger on press, not hold)
-        current_button_state = state['button'] > 0
-        if current_button_state and not self.prev_button_state:
-            self.button_pressed = True
-            self.log(f"Button pressed: {state['button']}")
-        else:
-            self.button_pressed = False
+        # When an X packet is overdue, carry on along the stick's path instead of freezing
+        if not got_x and self.x_filter.late(now):
+            self._steer(self.x_filter.predict(now))
         
-        # Update previous button state for next frame
-        self.prev_button_state = current_button_state
+        self.jumping = self.jump.active or jump_started
         
         return {
             'moving_left': self.moving_left,
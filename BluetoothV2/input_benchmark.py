@@ -0,0 +1,131 @@
+import time
+import struct
+import argparse
+
+from BluetoothV2.game_controller import GameController
+from BluetoothV2.bluetooth_controller import BluetoothController
+from BluetoothV2.transport import SimulatedTransport, default_devices
+
+HANDLER_CALLS = 200000  # Calls per handler when timing them on their own
+CONNECT_TIMEOUT = 10.0  # Seconds to wait for the simulated boards
+
+
+def handler_cost(calls=HANDLER_CALLS):
+    """Microseconds per call of each notification handler, without any Bluetooth"""
+    controller = BluetoothController(transport=SimulatedTransport(), address_cache=None)
+    results = {}
+    for name, handler, data in (
+            ("x handler", controller.xaxis_notification_handler, bytearray(struct.pack("<H", 40000))),
+            ("y handler", controller.ybutton_notification_handler, bytearray(struct.pack("<HB", 20000, 1)))):
+        started = time.perf_counter()
+        for _ in range(calls):
+            handler(None, data)
+            # Keep the ring from lapping, as the game loop would
+            if controller.samples.pending() > 512:
+                controller.samples.drain()
+        results[name] = (time.perf_counter() - started) / calls * 1e6
+    return results
+
+
+def run(seconds, rate, jitter, drop_rate, drop_burst, fps, filter_kind, seed=None):
+    """Play the game loop's part against simulated boards for a while and collect the numbers"""
+    transport = SimulatedTransport(default_devices(rate, jitter, drop_rate, drop_burst), seed=seed)
+    # Simulated addresses stay out of the real boards' cache
+    controller = GameController(filter_kind=filter_kind, transport=transport, address_cache=None)
+    bt = controller.bt_controller
+    controller.start()
+
+    waited = time.perf_counter()
+    while not (bt.x_connected and bt.y_connected):
+        if time.perf_counter() - waited > CONNECT_TIMEOUT:
+            controller.stop()
+            raise RuntimeError("Simulated controllers did not connect")
+        time.sleep(0.01)
+
+    received_before = sum(bt.received)
+    frame_time = 1.0 / fps
+    update_seconds = 0.0
+    frames = 0
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    next_frame = started
+    while time.perf_counter() - started < seconds:
+        before = time.perf_counter()
+        controller.update()
+        update_seconds += time.perf_counter() - before
+        frames += 1
+        next_frame += frame_time
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    received = sum(bt.received) - received_before
+    controller.stop()
+
+    sent = sum(stats["sent"] for stats in transport.stats().values())
+    lost = sum(stats["dropped"] for stats in transport.stats().values())
+    return {
+        "notifications_per_second": received / elapsed,
+        "sent": sent,
+        "dropped_by_link": lost,
+        "dropped_by_ring": bt.samples.dropped,
+        "update_us": update_seconds / frames * 1e6 if frames else 0.0,
+        "cpu_percent": cpu / elapsed * 100,
+        "latency": controller.latency.stats()
+    }
+
+
+def reconnect_test(seconds, link_time, outage, cache_path=None):
+    """Drop both simulated links every link_time seconds and measure how fast they come back.
+
+    After each drop the boards stay away for outage seconds, so the
+    controller has to retry. Returns the controller's connection stats
+    and the number of scans the transport saw.
+    """
+    devices = default_devices()
+    for device in devices:
+        device.disconnect_after = link_time
+        device.outage = outage
+    transport = SimulatedTransport(devices)
+    controller = BluetoothController(transport=transport, address_cache=cache_path)
+    controller.start()
+    time.sleep(seconds)
+    controller.stop()
+    return controller.connection_stats(), transport.scans
+
+
+if __name__ == "__main__":
+    # From the repository root: python -m BluetoothV2.input_benchmark --rate 500 --drop 0.05
+    parser = argparse.ArgumentParser(description="Benchmark the controller input path without hardware")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=100, help="notifications per second per board")
+    parser.add_argument("--jitter", type=float, default=2.0, help="notification jitter in ms")
+    parser.add_argument("--drop", type=float, default=0.0, help="chance a packet is lost")
+    parser.add_argument("--burst", type=int, default=1, help="packets lost in a row when one is")
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--filter", default=GameController.FILTER, help="one_euro, ema or raw")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--reconnect", action="store_true", help="measure reconnects after dropouts instead")
+    args = parser.parse_args()
+
+    if args.reconnect:
+        stats, scans = reconnect_test(args.seconds, link_time=1.0, outage=0.3)
+        print(f"{scans} scans in total")
+        for name, device_stats in stats.items():
+            mean = device_stats["mean_reconnect_s"]
+            worst = device_stats["max_reconnect_s"]
+            print(f"{name}: {device_stats['connects']} connects ({device_stats['direct_connects']} direct), "
+                  f"{device_stats['failed_attempts']} failed attempts, reconnect "
+                  + (f"{mean * 1000:.0f} ms mean, {worst * 1000:.0f} ms max" if mean is not None else "never needed"))
+        raise SystemExit
+
+    for name, microseconds in handler_cost().items():
+        print(f"{name}: {microseconds:.2f} us per notification")
+
+    results = run(args.seconds, args.rate, args.jitter / 1000, args.drop, args.burst, args.fps,
+                  args.filter, args.seed)
+    latency = results["latency"]
+    print(f"throughput: {results['notifications_per_second']:.0f} notifications/s "
+          f"({results['dropped_by_link']} lost on the link, {results['dropped_by_ring']} overrun in the ring)")
+    print(f"update(): {results['update_us']:.1f} us per frame, process CPU {results['cpu_percent']:.1f}%")
+    print(f"latency: {latency['mean_ms']:.2f} ms mean, {latency['p95_ms']:.2f} ms p95, "
+          f"{latency['max_ms']:.2f} ms max over {latency['count']} actions")
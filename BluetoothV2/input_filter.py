@@ -0,0 +1,179 @@
+import math
+from collections import deque
+
+# One-Euro filter defaults, for raw axis values (0-65535)
+MIN_CUTOFF = 1.0  # Hz; lower smooths more when the stick is still
+BETA = 0.0001  # How fast the cutoff rises with speed; higher lags less when moving fast
+D_CUTOFF = 1.0  # Hz; smoothing of the speed estimate
+
+EMA_ALPHA = 0.5  # Weight of each new sample for exponential smoothing
+
+LATE_FACTOR = 1.5  # A packet is late once this many usual gaps have passed without one
+MAX_EXTRAPOLATION = 0.05  # Seconds; never predict further ahead than this
+LATENCY_HISTORY = 256  # Latency measurements kept for the percentiles
+
+
+def _alpha(cutoff, dt):
+    """Smoothing factor of a low-pass filter with the given cutoff frequency"""
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class AxisFilter:
+    """Smooths one axis from timestamped samples and predicts it when packets are late.
+
+    Subclasses smooth by overriding _smooth(); the base class passes
+    samples straight through. Besides the smoothed value, the filter keeps
+    the axis speed (units per second) and the usual gap between samples,
+    which predict() uses to extrapolate.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.speed = 0.0
+        self.timestamp = None
+        self.interval = None  # Usual seconds between samples
+
+    def reset(self):
+        self.value = None
+        self.speed = 0.0
+        self.timestamp = None
+        self.interval = None
+
+    def filter(self, value, timestamp):
+        """Feed a raw sample; returns the smoothed value"""
+        if self.value is None:
+            self.value = float(value)
+            self.timestamp = timestamp
+            return self.value
+
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            # Samples can share a timestamp; treat them as a millisecond apart
+            dt = 0.001
+        else:
+            self.interval = dt if self.interval is None else self.interval + 0.1 * (dt - self.interval)
+        self.timestamp = timestamp
+        self._smooth(float(value), dt)
+        return self.value
+
+    def _smooth(self, value, dt):
+        self.speed = (value - self.value) / dt
+        self.value = value
+
+    def late(self, now):
+        """Whether the next sample is overdue"""
+        if self.timestamp is None or self.interval is None:
+            return False
+        return now - self.timestamp > LATE_FACTOR * self.interval
+
+    def predict(self, now):
+        """The value now: smoothed, and extrapolated a little if a packet is late"""
+        if self.value is None:
+            return None
+        if not self.late(now):
+            return self.value
+        ahead = min(now - self.timestamp, MAX_EXTRAPOLATION)
+        return self.value + self.speed * ahead
+
+
+class OneEuroFilter(AxisFilter):
+    """One-Euro filter: heavy smoothing when still, little lag when moving fast"""
+
+    def __init__(self, min_cutoff=MIN_CUTOFF, beta=BETA, d_cutoff=D_CUTOFF):
+        super().__init__()
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    def _smooth(self, value, dt):
+        raw_speed = (value - self.value) / dt
+        self.speed += _alpha(self.d_cutoff, dt) * (raw_speed - self.speed)
+        cutoff = self.min_cutoff + self.beta * abs(self.speed)
+        self.value += _alpha(cutoff, dt) * (value - self.value)
+
+
+class ExponentialFilter(AxisFilter):
+    """Plain exponential moving average"""
+
+    def __init__(self, alpha=EMA_ALPHA):
+        super().__init__()
+        self.alpha = alpha
+
+    def _smooth(self, value, dt):
+        previous = self.value
+        self.value += self.alpha * (value - self.value)
+        self.speed += self.alpha * ((self.value - previous) / dt - self.speed)
+
+
+class RawFilter(AxisFilter):
+    """No smoothing; still tracks speed so late packets can be predicted"""
+
+
+FILTERS = {"one_euro": OneEuroFilter, "ema": ExponentialFilter, "raw": RawFilter}
+
+
+def make_filter(kind):
+    """A new axis filter by name: one_euro, ema or raw"""
+    if kind not in FILTERS:
+        raise ValueError(f"Unknown input filter '{kind}', use one of {', '.join(FILTERS)}")
+    return FILTERS[kind]()
+
+
+class Hysteresis:
+    """On/off state with separate thresholds for switching on and back off.
+
+    The state switches on once the value's distance past the center (in
+    direction, +1 or -1) exceeds enter, and only switches off again once
+    it falls below exit. A value hovering at one threshold can't make it
+    flicker.
+    """
+
+    def __init__(self, center, direction, enter, exit):
+        self.center = center
+        self.direction = direction
+        self.enter = enter
+        self.exit = exit
+        self.active = False
+
+    def update(self, value):
+        """Feed a value; returns True if the state changed"""
+        distance = (value - self.center) * self.direction
+        if not self.active and distance > self.enter:
+            self.active = True
+            return True
+        if self.active and distance < self.exit:
+            self.active = False
+            return True
+        return False
+
+
+class LatencyStats:
+    """Milliseconds from a sample's notification to the game acting on it"""
+
+    def __init__(self, history=LATENCY_HISTORY):
+        self.recent = deque(maxlen=history)
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000.0
+        self.recent.append(ms)
+        self.count += 1
+        self.total += ms
+        self.worst = max(self.worst, ms)
+
+    def stats(self):
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p95_ms": recent[int(0.95 * (len(recent) - 1))] if recent else 0.0,
+            "max_ms": self.worst
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"input latency {stats['mean_ms']:.1f} ms mean, {stats['p95_ms']:.1f} ms p95, "
+                f"{stats['max_ms']:.1f} ms max over {stats['count']} actions")
@@ -0,0 +1,95 @@
+import time
+import struct
+
+RING_CAPACITY = 1024  # Samples kept; must be a power of two
+LOG_INTERVAL = 1.0  # Seconds between repeats of the same log message
+
+# One sample: timestamp (perf_counter seconds), source, axis value, button
+SAMPLE = struct.Struct("<dBHB")
+
+# Where a sample came from
+SOURCE_X = 0  # PicoXAxisOnly
+SOURCE_Y = 1  # PicoYButton
+
+
+class SampleRing:
+    """Preallocated ring buffer of timestamped controller samples.
+
+    Written by the Bluetooth thread with push() and read by the game loop
+    with drain(). There is one writer and one reader, so no lock is
+    needed: the writer fills a slot and then bumps write_count, the
+    reader only trusts slots below write_count and checks afterwards that
+    the writer didn't lap it. If the reader falls more than a full ring
+    behind, the oldest samples are dropped and counted.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        if capacity & (capacity - 1):
+            raise ValueError("Ring capacity must be a power of two")
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.buffer = bytearray(SAMPLE.size * capacity)
+        self.write_count = 0  # Only changed by the writer
+        self.read_count = 0  # Only changed by the reader
+        self.dropped = 0
+
+    def push(self, source, value, button=0, timestamp=None):
+        """Add a sample (writer side)"""
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        index = self.write_count
+        SAMPLE.pack_into(self.buffer, (index & self.mask) * SAMPLE.size, timestamp, source, value, button)
+        self.write_count = index + 1
+
+    def pending(self):
+        return self.write_count - self.read_count
+
+    def drain(self):
+        """Samples written since the last drain, oldest first, as (timestamp, source, value, button)"""
+        start = self.read_count
+        end = self.write_count
+        if end - start > self.capacity:
+            self.dropped += end - start - self.capacity
+            start = end - self.capacity
+
+        size = SAMPLE.size
+        buffer = self.buffer
+        mask = self.mask
+        samples = [SAMPLE.unpack_from(buffer, (index & mask) * size) for index in range(start, end)]
+
+        # Anything the writer overwrote while we were reading is not to be trusted, including
+        # the slot it may be filling right now (it fills a slot before counting it)
+        overwritten = min(self.write_count + 1 - self.capacity - start, len(samples))
+        if overwritten > 0:
+            self.dropped += overwritten
+            samples = samples[overwritten:]
+        self.read_count = end
+        return samples
+
+
+class RateLimitedLog:
+    """Prints a message at most once per interval per key.
+
+    Repeats inside the interval are only counted, and the count is added
+    to the next message that gets through.
+    """
+
+    def __init__(self, prefix, interval=LOG_INTERVAL, enabled=True):
+        self.prefix = prefix
+        self.interval = interval
+        self.enabled = enabled
+        self.last = {}  # key -> time last printed
+        self.suppressed = {}  # key -> messages skipped since
+
+    def __call__(self, key, message):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last.get(key, -self.interval) < self.interval:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return
+        skipped = self.suppressed.pop(key, 0)
+        self.last[key] = now
+        if skipped:
+            message = f"{message} ({skipped} similar messages skipped)"
+        print(f"{self.prefix} {message}")
@@ -0,0 +1,221 @@
+import math
+import time
+import random
+import struct
+import asyncio
+
+try:
+    from bleak import BleakClient, BleakScanner
+    from bleak.exc import BleakError
+except ImportError:
+    BleakClient = None
+    BleakScanner = None
+
+    class BleakError(Exception):
+        """Stand-in so transport errors can still be caught without bleak installed"""
+
+# Packet layouts sent by the two Pico W boards
+YBUTTON_PACKET = "<HB"  # Y axis, button
+XAXIS_PACKET = "<H"  # X axis
+
+SIM_RATE = 100  # Notifications per second from each simulated device
+SIM_JITTER = 0.002  # Standard deviation of the gap between notifications, seconds
+SIM_ADDRESS_PREFIX = "SIM:"  # Addresses of simulated devices start with this
+
+
+class BleakTransport:
+    """Real Bluetooth through bleak; the default transport"""
+
+    def __init__(self):
+        if BleakScanner is None:
+            raise BleakError("The bleak package is needed for Bluetooth (pip install bleak)")
+
+    async def find_device_by_name(self, name, timeout=10.0):
+        return await BleakScanner.find_device_by_name(name, timeout=timeout)
+
+    async def discover(self, names, timeout=10.0):
+        """Addresses of the named devices found in one scan, stopping early once all are seen"""
+        found = {}
+        all_found = asyncio.Event()
+
+        def detected(device, advertisement):
+            name = device.name or advertisement.local_name
+            if name in names and name not in found:
+                found[name] = device.address
+                if len(found) == len(names):
+                    all_found.set()
+
+        async with BleakScanner(detection_callback=detected):
+            try:
+                await asyncio.wait_for(all_found.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return found
+
+    def client(self, address, disconnected_callback=None):
+        return BleakClient(address, disconnected_callback=disconnected_callback)
+
+
+def x_sweep(t):
+    """X stick swinging slowly from side to side"""
+    return (int(32767 + 30000 * math.sin(2 * math.pi * 0.5 * t)),)
+
+
+def y_flicks(t):
+    """Y stick flicked up for 60 ms every second, button held for 100 ms every two seconds"""
+    y = 2000 if t % 1.0 < 0.06 else 32767
+    button = 1 if t % 2.0 < 0.1 else 0
+    return (y, button)
+
+
+class SimulatedDevice:
+    """A stand-in for one Pico: what it is called and what it sends.
+
+    signal(t) gives the packet values t seconds after notifications
+    start. Packets are sent rate times a second with normally distributed
+    jitter; each is dropped with probability drop_rate, and a drop takes
+    out drop_burst packets in a row. With disconnect_after set, the link
+    drops that many seconds after connecting, and the device then stays
+    away for outage seconds. A device that isn't available can't be found
+    or connected to.
+    """
+
+    def __init__(self, name, char_uuid, packet, signal, rate=SIM_RATE, jitter=SIM_JITTER,
+                 drop_rate=0.0, drop_burst=1, disconnect_after=None, outage=0.0, address=None):
+        self.name = name
+        self.char_uuid = char_uuid
+        self.packet = struct.Struct(packet)
+        self.signal = signal
+        self.rate = rate
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.drop_burst = drop_burst
+        self.disconnect_after = disconnect_after
+        self.outage = outage
+        self.address = address or f"{SIM_ADDRESS_PREFIX}{name}"
+        self.online = True  # Switch the device off entirely
+        self.offline_until = 0.0
+        self.sent = 0
+        self.dropped = 0
+
+    def available(self):
+        return self.online and time.perf_counter() >= self.offline_until
+
+
+class SimulatedClient:
+    """BleakClient look-alike that sends a SimulatedDevice's packets"""
+
+    def __init__(self, device, rng, connect_delay, disconnected_callback=None):
+        self.device = device
+        self.rng = rng
+        self.connect_delay = connect_delay
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = False
+        self.sender = None
+
+    async def connect(self, timeout=10.0):
+        if self.device is None or not self.device.available():
+            # A real connection attempt to an absent device hangs until the timeout
+            await asyncio.sleep(min(timeout, self.connect_delay + 0.05))
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(self.connect_delay)
+        self.is_connected = True
+        return True
+
+    def _link_lost(self):
+        self.is_connected = False
+        if self.disconnected_callback is not None:
+            self.disconnected_callback(self)
+
+    async def start_notify(self, char_uuid, handler):
+        if char_uuid != self.device.char_uuid:
+            raise BleakError(f"{self.device.name} has no characteristic {char_uuid}")
+        self.sender = asyncio.ensure_future(self._send(handler))
+
+    async def _send(self, handler):
+        device = self.device
+        gap = 1.0 / device.rate
+        started = time.perf_counter()
+        due = started
+        burst = 0
+        while self.is_connected:
+            now = time.perf_counter()
+            if not device.online:
+                self._link_lost()
+                return
+            if device.disconnect_after is not None and now - started >= device.disconnect_after:
+                device.offline_until = now + device.outage
+                self._link_lost()
+                return
+            # Send everything that is due, so high rates survive coarse sleeps
+            while due <= now:
+                if burst == 0 and device.drop_rate and self.rng.random() < device.drop_rate:
+                    burst = device.drop_burst
+                if burst:
+                    burst -= 1
+                    device.dropped += 1
+                else:
+                    handler(self, bytearray(device.packet.pack(*device.signal(due - started))))
+                    device.sent += 1
+                due += max(0.0, gap + self.rng.gauss(0.0, device.jitter))
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+    async def stop_notify(self, char_uuid):
+        if self.sender is not None:
+            self.sender.cancel()
+            self.sender = None
+
+    async def disconnect(self):
+        if self.device is not None:
+            await self.stop_notify(self.device.char_uuid)
+        self.is_connected = False
+        return True
+
+
+class SimulatedTransport:
+    """In-process stand-in for the two Pico boards, for working without hardware"""
+
+    def __init__(self, devices=None, seed=None, scan_delay=0.0, connect_delay=0.0):
+        self.rng = random.Random(seed)
+        self.devices = {device.name: device for device in (devices or default_devices())}
+        self.scan_delay = scan_delay
+        self.connect_delay = connect_delay
+        self.scans = 0
+
+    async def find_device_by_name(self, name, timeout=10.0):
+        self.scans += 1
+        device = self.devices.get(name)
+        if device is None or not device.available():
+            await asyncio.sleep(timeout)
+            return None
+        await asyncio.sleep(self.scan_delay)
+        return device
+
+    async def discover(self, names, timeout=10.0):
+        self.scans += 1
+        found = {name: self.devices[name].address for name in names
+                 if name in self.devices and self.devices[name].available()}
+        await asyncio.sleep(self.scan_delay if len(found) == len(names) else timeout)
+        return found
+
+    def client(self, address, disconnected_callback=None):
+        # Like a real client, one for an address nobody answers at only fails on connect
+        device = None
+        for candidate in self.devices.values():
+            if candidate.address == address:
+                device = candidate
+        return SimulatedClient(device, self.rng, self.connect_delay, disconnected_callback)
+
+    def stats(self):
+        return {name: {"sent": device.sent, "dropped": device.dropped} for name, device in self.devices.items()}
+
+
+def default_devices(rate=SIM_RATE, jitter=SIM_JITTER, drop_rate=0.0, drop_burst=1):
+    """Simulated PicoYButton and PicoXAxisOnly, matching BluetoothController's names and UUIDs"""
+    from BluetoothV2.bluetooth_controller import BluetoothController
+    return [
+        SimulatedDevice(BluetoothController.YBUTTON_DEVICE_NAME, BluetoothController.YBUTTON_CHAR_UUID,
+                        YBUTTON_PACKET, y_flicks, rate, jitter, drop_rate, drop_burst),
+        SimulatedDevice(BluetoothController.XAXIS_DEVICE_NAME, BluetoothController.XAXIS_CHAR_UUID,
+                        XAXIS_PACKET, x_sweep, rate, jitter, drop_rate, drop_burst)
+    ]
@@ -0,0 +1,189 @@
+import json
+import sys
+
+import pygame
+
+# Flags that are part of a cache key
+CONVERT_ALPHA = 1  # convert_alpha() the image for fast blitting
+FLIP_X = 2  # mirror the image horizontally
+
+# Default packed atlas, used when present
+ATLAS_IMAGE = "sprites/atlas.png"
+ATLAS_INDEX = "sprites/atlas.json"
+
+
+def surface_bytes(surface):
+    """Number of bytes of pixel data a surface holds"""
+    return surface.get_pitch() * surface.get_height()
+
+
+class AssetCache:
+    """Shared cache of loaded and scaled surfaces.
+
+    Images are decoded once per path and every (path, size, flags)
+    combination is built once, so hundreds of identical tiles share one
+    surface. Surfaces handed out by the cache are shared and must not be
+    drawn on; copy() them first. Source images can come from a packed
+    atlas instead of individual files.
+    """
+
+    def __init__(self):
+        self.surfaces = {}  # (path, size, flags) or derived key -> Surface
+        self.sources = {}  # path -> unscaled Surface, from disk or an atlas
+        self.atlases = []
+        self.hits = 0
+        self.misses = 0
+
+    def _source(self, path):
+        source = self.sources.get(path)
+        if source is None:
+            source = pygame.image.load(path)
+            self.sources[path] = source
+        return source
+
+    def _build(self, key):
+        path, size, flags = key
+        if flags & FLIP_X:
+            return pygame.transform.flip(self._lookup((path, size, flags & ~FLIP_X)), True, False)
+        if size is not None:
+            return pygame.transform.scale(self._lookup((path, None, flags)), size)
+
+        source = self._source(path)
+        if flags & CONVERT_ALPHA and pygame.display.get_surface() is not None:
+            return source.convert_alpha()
+        return source
+
+    def _lookup(self, key):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self._build(key)
+            self.surfaces[key] = surface
+        return surface
+
+    def get(self, path, size=None, flags=CONVERT_ALPHA):
+        """Return the image at path, scaled to size and processed per flags"""
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (path, size, flags)
+        if key in self.surfaces:
+            self.hits += 1
+            return self.surfaces[key]
+        self.misses += 1
+        return self._lookup(key)
+
+    def derive(self, key, factory):
+        """Return the surface cached under key, calling factory() to build it once"""
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = factory()
+        self.surfaces[key] = surface
+        return surface
+
+    def solid(self, size, color):
+        """Return a shared surface of the given size filled with color"""
+        size = (int(size[0]), int(size[1]))
+
+        def build():
+            surface = pygame.Surface(size)
+            surface.fill(color)
+            return surface
+
+        return self.derive(("solid", size, tuple(color)), build)
+
+    def load_atlas(self, image_path, index_path):
+        """Register every image packed into an atlas as a source image.
+
+        The index is a JSON object mapping the original image path to its
+        [x, y, width, height] region in the atlas image.
+        """
+        with open(index_path, "r") as f:
+            index = json.load(f)
+
+        atlas = pygame.image.load(image_path)
+        self.atlases.append(atlas)
+        for path, region in index.items():
+            self.sources[path] = atlas.subsurface(pygame.Rect(region))
+        return len(index)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sources.clear()
+        self.atlases.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Cache counters and the pixel memory held by cached surfaces"""
+        held = 0
+        seen = set()
+        for surface in list(self.surfaces.values()) + list(self.sources.values()) + self.atlases:
+            # Atlas regions are subsurfaces and share the atlas' pixels
+            if id(surface) in seen or surface.get_parent() is not None:
+                continue
+            seen.add(id(surface))
+            held += surface_bytes(surface)
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.surfaces),
+            "sources": len(self.sources),
+            "bytes": held
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"{stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%}), {stats['entries']} surfaces, "
+                f"{stats['bytes'] / 1024:.0f} KiB held")
+
+
+def pack_atlas(paths, image_path, index_path, max_width=2048, padding=1):
+    """Pack the images at paths into one atlas image plus a JSON index.
+
+    Images are placed on shelves, tallest first. The result can be loaded
+    with AssetCache.load_atlas.
+    """
+    images = [(path, pygame.image.load(path)) for path in paths]
+    images.sort(key=lambda item: item[1].get_height(), reverse=True)
+
+    regions = {}
+    x = y = shelf_height = width = 0
+    for path, image in images:
+        w, h = image.get_size()
+        if x and x + w > max_width:
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        regions[path] = [x, y, w, h]
+        x += w + padding
+        width = max(width, x)
+        shelf_height = max(shelf_height, h)
+
+    atlas = pygame.Surface((max(width, 1), max(y + shelf_height, 1)), pygame.SRCALPHA)
+    atlas.fill((0, 0, 0, 0))
+    for path, image in images:
+        atlas.blit(image, regions[path][:2])
+
+    pygame.image.save(atlas, image_path)
+    with open(index_path, "w") as f:
+        json.dump(regions, f)
+    return regions
+
+
+# Cache shared by every module that draws level sprites
+assets = AssetCache()
+
+
+if __name__ == "__main__":
+    # python asset_cache.py <image paths...> packs them into the default atlas
+    if len(sys.argv) < 2:
+        print("Usage: python asset_cache.py <image> [<image> ...]")
+        sys.exit(1)
+    packed = pack_atlas(sys.argv[1:], ATLAS_IMAGE, ATLAS_INDEX)
+    print(f"Packed {len(packed)} images into {ATLAS_IMAGE}")
@@ -0,0 +1,304 @@
+import copy
+import json
+import random
+import argparse
+
+from question_bank import QuestionBank
+from question_store import open_bank
+
+QUESTION_TIME = 45  # Seconds to answer a question
+ENEMY_TURN_DELAY = 1.0  # Seconds the enemy "thinks" before attacking
+
+# Stats the player starts every battle with
+PLAYER_TEMPLATE = {
+    "name": "clu&blu",
+    "hp": 5,
+    "attack": 1,
+    "defense": 0,
+    "speed": 8,
+    "abilities": {
+        "Heal": {"uses": 1, "effect": "heal", "amount": 2},
+        "Double Damage": {"uses": 2, "effect": "damage", "amount": 3}
+    }
+}
+
+# Battle states
+PLAYER_TURN = "player_turn"
+ABILITIES = "abilities"
+QUESTION = "question"
+SHOWING_EXPLANATION = "showing_explanation"
+ENEMY_TURN = "enemy_turn"
+WON = "won"
+LOST = "lost"
+
+# state -> {action: handler method}; actions not listed are ignored in that state
+TRANSITIONS = {
+    PLAYER_TURN: {"attack": "_ask_question", "abilities": "_show_abilities", "defend": "_defend"},
+    ABILITIES: {"use_ability": "_use_ability", "back": "_back"},
+    QUESTION: {"answer": "_answer", "submit": "_submit", "timeout": "_timeout"},
+    SHOWING_EXPLANATION: {"continue": "_continue"},
+    ENEMY_TURN: {"enemy_attack": "_enemy_attack"},
+    WON: {},
+    LOST: {}
+}
+
+
+def load_questions():
+    """Load the question bank, from questions.db if there is one, otherwise questions.json."""
+    return open_bank()
+
+
+def load_enemies():
+    """Load enemies from JSON file."""
+    try:
+        with open("charecter.json", "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return []
+
+
+def new_enemy(character):
+    """Battle stats for an entry of charecter.json"""
+    return {"name": character["name"], "hp": character["hp"], "attack": character["attack"],
+            "defense": character["defense"], "speed": character["speed"],
+            "image": character.get("image")}
+
+
+class Battle:
+    """One battle between the player and an enemy, as a state machine.
+
+    Input arrives as actions through handle(); anything time based (the
+    question timer, the enemy's turn) is a timer on the battle's own clock,
+    which advances by update(dt). Nothing here touches pygame, so battles
+    can run headless. Things the screen may want to animate are appended
+    to effects for the renderer to pick up.
+    """
+
+    def __init__(self, questions, enemy, player=None, rng=None,
+                 question_time=QUESTION_TIME, enemy_turn_delay=ENEMY_TURN_DELAY):
+        if isinstance(questions, list):
+            questions = QuestionBank.from_questions(questions)
+        self.questions = questions  # QuestionBank; repeats only once every question has come up
+        self.enemy = dict(enemy)
+        self.player = copy.deepcopy(player if player is not None else PLAYER_TEMPLATE)
+        self.rng = rng if rng is not None else random.Random()
+        self.question_time = question_time
+        self.enemy_turn_delay = enemy_turn_delay
+
+        self.state = PLAYER_TURN
+        self.message = "What will you do?"
+        self.question = None
+        self.choices = []
+        self.last_answer_correct = False
+        self.damage_multiplier = 1  # Set by a damage ability for the next correct answer
+        self.effects = []
+        self.questions_asked = 0
+
+        self.time = 0.0
+        self.timers = []  # [due time, action]
+        self.question_started = 0.0
+
+    # Driving the battle
+
+    def handle(self, action, *args):
+        """Apply an action; returns False if it isn't valid in the current state"""
+        handler = TRANSITIONS[self.state].get(action)
+        if handler is None:
+            return False
+        next_state = getattr(self, handler)(*args)
+        if next_state is not None and next_state != self.state:
+            self._enter(next_state)
+        return True
+
+    def update(self, dt):
+        """Advance the battle clock, firing any timers that come due"""
+        self.time += dt
+        while self.timers:
+            due = min(self.timers)
+            if due[0] > self.time:
+                break
+            self.timers.remove(due)
+            self.handle(due[1])
+
+    def schedule(self, delay, action):
+        self.timers.append([self.time + delay, action])
+
+    def _enter(self, state):
+        # Timers belong to the state that set them
+        self.timers = []
+        self.state = state
+        if state == QUESTION:
+            self.question_started = self.time
+            self.schedule(self.question_time, "timeout")
+        elif state == ENEMY_TURN:
+            self.schedule(self.enemy_turn_delay, "enemy_attack")
+
+    @property
+    def over(self):
+        return self.state in (WON, LOST)
+
+    def actions(self):
+        """Actions valid in the current state"""
+        return list(TRANSITIONS[self.state])
+
+    def time_remaining(self):
+        """Whole seconds left to answer, as shown on screen"""
+        if self.state != QUESTION:
+            return 0
+        return max(0, self.question_time - int(self.time - self.question_started))
+
+    def available_abilities(self):
+        return [(name, details) for name, details in self.player["abilities"].items() if details["uses"] > 0]
+
+    # Transition handlers; each returns the next state (None to stay)
+
+    def _ask_question(self):
+        if not self.questions:
+            self.message = "No questions available!"
+            return ENEMY_TURN
+
+        self.question = self.questions.draw(self.rng)
+        self.questions_asked += 1
+        self.message = self.question["question"]
+        self.choices = [
+            self.question["answer"],
+            self.question["wrong_choice1"],
+            self.question["wrong_choice2"],
+            self.question["wrong_choice3"]
+        ]
+        self.rng.shuffle(self.choices)
+        return QUESTION
+
+    def _show_abilities(self):
+        return ABILITIES
+
+    def _back(self):
+        return PLAYER_TURN
+
+    def _defend(self):
+        self.player["defense"] += 2
+        self.message = f"{self.player['name']} defends! Defense increased by 2!"
+        return ENEMY_TURN
+
+    def _use_ability(self, name):
+        ability = self.player["abilities"].get(name)
+        if ability is None or ability["uses"] <= 0:
+            return None
+
+        ability["uses"] -= 1
+        self.effects.append("wand")
+        if ability["effect"] == "heal":
+            self.player["hp"] += ability["amount"]
+            self.message = f"{self.player['name']} used {name}! Healed {ability['amount']} HP!"
+        elif ability["effect"] in ("damage", "double_damage"):
+            self.damage_multiplier = ability["amount"]
+            self.message = f"{self.player['name']} used {name}! Your next attack will do double damage!"
+        return PLAYER_TURN
+
+    def _answer(self, index):
+        if not 0 <= index < len(self.choices):
+            return None
+        return self._check(self.choices[index])
+
+    def _submit(self, text):
+        if not text:
+            return None
+        return self._check(text)
+
+    def _check(self, answer):
+        correct = answer.lower() == self.question["answer"].lower()
+        self.last_answer_correct = correct
+        if correct:
+            damage = self.question["attackPower"] * self.damage_multiplier
+            self.damage_multiplier = 1
+            self.enemy["hp"] -= damage
+            self.message = f"✅ Correct! {self.player['name']} attacks for {damage} damage!"
+            self.effects.append("enemy_hit")
+        else:
+            self.message = "❌ Wrong answer! No attack this turn."
+        return SHOWING_EXPLANATION
+
+    def _timeout(self):
+        self.message = "Time's up! No attack this turn!"
+        self.question = None
+        return ENEMY_TURN
+
+    def _continue(self):
+        self.question = None
+        if self.enemy["hp"] <= 0:
+            return WON
+        if not self.last_answer_correct:
+            return ENEMY_TURN
+        return PLAYER_TURN
+
+    def _enemy_attack(self):
+        damage = max(1, self.enemy["attack"] - self.player["defense"])
+        self.player["hp"] -= damage
+        self.player["defense"] = 0  # Reset defense after each turn
+        self.message = f"{self.enemy['name']} attacks for {damage} damage!"
+
+        if self.player["hp"] <= 0:
+            self.player["hp"] = 0
+            return LOST
+        return PLAYER_TURN
+
+
+def simulate_battles(count, questions, enemies, accuracy=0.7, heal_below=2, seed=None, max_steps=1000):
+    """Play count battles headless with a simple player and return the results.
+
+    The simulated player attacks every turn, answers correctly with the
+    given probability and heals when its hp drops below heal_below.
+    """
+    rng = random.Random(seed)
+    wins = 0
+    turns = 0
+    hp_left = 0
+    for _ in range(count):
+        battle = Battle(questions, new_enemy(rng.choice(enemies)), rng=rng)
+        for _ in range(max_steps):
+            if battle.over:
+                break
+            if battle.state == PLAYER_TURN:
+                healing = [name for name, details in battle.available_abilities() if details["effect"] == "heal"]
+                if battle.player["hp"] < heal_below and healing:
+                    battle.handle("abilities")
+                    battle.handle("use_ability", healing[0])
+                else:
+                    battle.handle("attack")
+            elif battle.state == QUESTION:
+                if rng.random() < accuracy:
+                    battle.handle("answer", battle.choices.index(battle.question["answer"]))
+                else:
+                    wrong = [i for i, choice in enumerate(battle.choices) if choice != battle.question["answer"]]
+                    battle.handle("answer", rng.choice(wrong))
+            elif battle.state == SHOWING_EXPLANATION:
+                battle.handle("continue")
+            else:
+                # Let the enemy's turn play out
+                battle.update(battle.enemy_turn_delay)
+
+        if battle.state == WON:
+            wins += 1
+            hp_left += battle.player["hp"]
+        turns += battle.questions_asked
+
+    return {
+        "battles": count,
+        "wins": wins,
+        "win_rate": wins / count if count else 0.0,
+        "questions_per_battle": turns / count if count else 0.0,
+        "hp_left_per_win": hp_left / wins if wins else 0.0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate battles to tune difficulty")
+    parser.add_argument("--battles", type=int, default=1000)
+    parser.add_argument("--accuracy", type=float, default=0.7, help="chance of answering correctly")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    results = simulate_battles(args.battles, load_questions(), load_enemies(), args.accuracy, seed=args.seed)
+    print(f"{results['wins']}/{results['battles']} won ({results['win_rate']:.0%}), "
+          f"{results['questions_per_battle']:.1f} questions per battle, "
+          f"{results['hp_left_per_win']:.1f} hp left per win")
@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import argparse
+
+# Benchmarks run without a window or sound device; must be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import play_level
+from play_level import load_level, split_static_sprites, physics_step, apply_input, draw_interpolated
+from camera import Camera
+from simulation import level_files, scripted_inputs
+from level_registry import levels
+import level_builder
+from level_builder import Grid, GRID_SIZE
+
+BENCH_VERSION = 3  # Load times include parsing since 2, draws follow a camera since 3
+DEFAULT_TICKS = 2000
+DEFAULT_FRAMES = 200
+DEFAULT_REPEAT = 5
+EXPORT_SIZES = (10000, 50000, 200000)
+BUILDER_SIZES = (100000,)
+REGRESSION_THRESHOLD = 0.15  # Slowdown (fraction) that counts as a regression
+RESULTS_FILE = "benchmark_results.json"
+
+# Mix of builder tiles used for the synthetic export grids
+EXPORT_TILES = [
+    ("platform", level_builder.GREEN),
+    ("platform", level_builder.GREEN),
+    ("small_platform", level_builder.DARK_GREEN),
+    ("hazard", level_builder.GRAY),
+    ("bounce", level_builder.YELLOW),
+    ("checkpoint", level_builder.ORANGE),
+    ("moving_platform", level_builder.PURPLE),
+    ("breakable", level_builder.BROWN)
+]
+
+
+def best_time(func, repeat, setup=None):
+    """Fastest of repeat runs of func(), in seconds; setup() runs untimed before each"""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_load(level_file, repeat):
+    """Seconds to load a level, parsing included"""
+    # Without emptying the registry every run after the first is a cache hit
+    return best_time(lambda: load_level(level_file), repeat, setup=levels.clear)
+
+
+def bench_ticks(level_file, ticks, repeat):
+    """Seconds per physics tick, moving right and jumping through the level"""
+    inputs = [scripted_inputs(tick) for tick in range(ticks)]
+
+    def run():
+        all_sprites, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks, player = load_level(level_file)
+        start = time.perf_counter()
+        for mask in inputs:
+            apply_input(player, mask)
+            physics_step(player, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks)
+        return time.perf_counter() - start
+
+    return min(run() for _ in range(repeat)) / ticks
+
+
+def bench_draw(level_file, frames, repeat):
+    """Seconds per frame drawing the level into an offscreen 1920x1080 surface.
+
+    The camera pans across the level as the game's would. Returns (every
+    sprite in view drawn on its own, static layer plus dynamic sprites),
+    the two ways play_level draws depending on USE_STATIC_LAYER.
+    """
+    loaded = load_level(level_file)
+    all_sprites, player = loaded[0], loaded[7]
+    static_layer, dynamic_sprites = split_static_sprites(all_sprites)
+    target = pygame.Surface((play_level.SCREEN_WIDTH, play_level.SCREEN_HEIGHT))
+    camera = Camera(play_level.SCREEN_WIDTH, play_level.SCREEN_HEIGHT, player.bounds)
+    world = camera.world_rect
+
+    def views():
+        for frame in range(frames):
+            camera.follow(world.left + frame * 37 % world.width, player.rect.centery)
+            yield camera.offset, camera.area(play_level.DRAW_MARGIN)
+
+    def draw_all():
+        for offset, visible_area in views():
+            target.fill(play_level.BLACK)
+            visible_sprites = [sprite for sprite in all_sprites if visible_area.colliderect(sprite.rect)]
+            draw_interpolated(target, visible_sprites, 1.0, offset)
+
+    def draw_layered():
+        for offset, visible_area in views():
+            target.fill(play_level.BLACK)
+            static_layer.draw(target, offset, camera.rect)
+            draw_interpolated(target, dynamic_sprites.query(visible_area), 1.0, offset)
+
+    # Bake the static layer outside the timed runs
+    static_layer.bake()
+    return best_time(draw_all, repeat) / frames, best_time(draw_layered, repeat) / frames
+
+
+def synthetic_grid(cells, seed=0):
+    """A builder grid with the given number of filled cells"""
+    columns = max(1, int(cells ** 0.5) * 2)
+    grid = Grid(0, 0, columns * GRID_SIZE, (cells // columns + 1) * GRID_SIZE, GRID_SIZE)
+    rng = random.Random(seed)
+    for index in range(cells - 1):
+        tile_type, color = rng.choice(EXPORT_TILES)
+        grid.place_tile((index % columns, index // columns), tile_type, color)
+    grid.place_tile((columns - 1, cells // columns), "player", level_builder.BLUE)
+    return grid
+
+
+def bench_export(cells, repeat):
+    """Seconds to build and write the level file for a synthetic grid, like save_level"""
+    grid = synthetic_grid(cells)
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+
+    def export():
+        level_data = grid.to_level_data()
+        with open(path, 'w') as f:
+            json.dump(level_data, f)
+
+    try:
+        return best_time(export, repeat)
+    finally:
+        os.remove(path)
+
+
+def bench_builder(cells, frames, repeat):
+    """Seconds per frame drawing the level builder's grid view for a synthetic grid.
+
+    Returns (panning across the grid, painting a tile every frame).
+    """
+    grid = synthetic_grid(cells)
+    world_width, world_height = grid.rect.size
+    # Look at the grid through the builder's viewport instead of all at once
+    grid.rect = pygame.Rect(0, 0, level_builder.SCREEN_WIDTH - 220, level_builder.SCREEN_HEIGHT - 80)
+    target = pygame.Surface((level_builder.SCREEN_WIDTH, level_builder.SCREEN_HEIGHT))
+    max_x = max(1, world_width - grid.rect.width)
+    max_y = max(1, world_height - grid.rect.height)
+
+    def pan():
+        for frame in range(frames):
+            grid.camera_offset.update(frame * 15 % max_x, frame * 9 % max_y)
+            grid.draw(target)
+
+    def paint():
+        grid.camera_offset.update(0, 0)
+        for frame in range(frames):
+            tile_type, color = EXPORT_TILES[frame % len(EXPORT_TILES)]
+            grid.place_tile((frame % grid.grid_width, 1), tile_type, color)
+            grid.draw(target)
+
+    return best_time(pan, repeat) / frames, best_time(paint, repeat) / frames
+
+
+def run_benchmarks(levels, ticks=DEFAULT_TICKS, frames=DEFAULT_FRAMES, repeat=DEFAULT_REPEAT,
+                   export_sizes=EXPORT_SIZES, builder_sizes=BUILDER_SIZES):
+    """Run every benchmark and return {metric name: seconds}"""
+    results = {}
+    for level_file in levels:
+        name = os.path.basename(level_file)
+        results[f"load/{name}"] = bench_load(level_file, repeat)
+        results[f"tick/{name}"] = bench_ticks(level_file, ticks, repeat)
+        draw_all, draw_layered = bench_draw(level_file, frames, repeat)
+        results[f"draw/{name}"] = draw_all
+        results[f"draw_layered/{name}"] = draw_layered
+        print(f"{name}: load {results[f'load/{name}'] * 1000:.2f} ms, "
+              f"tick {results[f'tick/{name}'] * 1e6:.1f} us, "
+              f"draw {draw_all * 1000:.2f} ms, layered {draw_layered * 1000:.2f} ms")
+
+    for cells in export_sizes:
+        results[f"export/{cells}"] = bench_export(cells, max(1, repeat // 2))
+        print(f"export {cells} cells: {results[f'export/{cells}'] * 1000:.1f} ms")
+
+    for cells in builder_sizes:
+        pan, paint = bench_builder(cells, frames, max(1, repeat // 2))
+        results[f"builder_pan/{cells}"] = pan
+        results[f"builder_paint/{cells}"] = paint
+        print(f"builder {cells} cells: pan {pan * 1000:.2f} ms, paint {paint * 1000:.2f} ms per frame")
+    return results
+
+
+def save_results(results, filepath):
+    data = {
+        "version": BENCH_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver
+        },
+        "results": results
+    }
+    with open(filepath, 'w') as f:
+        json.dump(data, f, indent=4, sort_keys=True)
+
+
+def load_results(filepath):
+    with open(filepath, 'r') as f:
+        data = json.load(f)
+    if data.get("version") != BENCH_VERSION:
+        raise ValueError(f"Unsupported benchmark file version: {data.get('version')}")
+    return data["results"]
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print each metric against the baseline and return the names that regressed"""
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            print(f"{name:40} {results[name] * 1000:10.3f} ms  (new)")
+            continue
+        change = results[name] / baseline[name] - 1 if baseline[name] else 0.0
+        marker = ""
+        if change > threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:40} {results[name] * 1000:10.3f} ms  {change:+7.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time level loading, physics ticks, drawing, export and the builder grid")
+    parser.add_argument("levels", nargs="*", help="level files (default: every level in levels/)")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="physics ticks per level")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="frames drawn per level")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark, the fastest counts")
+    parser.add_argument("--export-sizes", type=int, nargs="*", default=list(EXPORT_SIZES),
+                        help="cell counts of the synthetic export grids")
+    parser.add_argument("--builder-sizes", type=int, nargs="*", default=list(BUILDER_SIZES),
+                        help="cell counts of the synthetic grids drawn in the builder")
+    parser.add_argument("--output", default=RESULTS_FILE, help="where to write the results")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown fraction that fails the comparison")
+    args = parser.parse_args()
+
+    # Read the baseline first: by default --output is the file it is usually kept in
+    baseline = load_results(args.compare) if args.compare else None
+    keep_baseline = args.compare is not None and os.path.abspath(args.output) == os.path.abspath(args.compare)
+
+    results = run_benchmarks(level_files(args.levels), args.ticks, args.frames, args.repeat,
+                             args.export_sizes, args.builder_sizes)
+    if keep_baseline:
+        print(f"Not overwriting the baseline {args.compare}; pass another --output to keep these results")
+    else:
+        save_results(results, args.output)
+        print(f"Results saved to {args.output}")
+
+    if baseline is not None:
+        print(f"\nCompared with {args.compare}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+import pygame
+
+
+def world_bounds(rects, screen_size):
+    """Smallest rect holding every rect and the screen area at the origin"""
+    bounds = pygame.Rect(0, 0, screen_size[0], screen_size[1])
+    for rect in rects:
+        bounds.union_ip(rect)
+    return bounds
+
+
+class Camera:
+    """Screen-sized window onto a world that may be larger than the screen.
+
+    The camera is centred on a target and clamped to the world, so the edges
+    of the level are never scrolled past. Sprites are drawn at their world
+    position moved by offset.
+    """
+
+    def __init__(self, width, height, world_rect=None):
+        self.rect = pygame.Rect(0, 0, width, height)
+        if world_rect is None:
+            world_rect = self.rect.copy()
+        self.world_rect = pygame.Rect(world_rect)
+
+    def follow(self, x, y):
+        """Centre the view on a world position"""
+        self.rect.center = (round(x), round(y))
+        self.rect.clamp_ip(self.world_rect)
+
+    @property
+    def offset(self):
+        """Amount to move world positions by to get screen positions"""
+        return (-self.rect.x, -self.rect.y)
+
+    def apply(self, rect):
+        """Screen rect of a world rect"""
+        return rect.move(-self.rect.x, -self.rect.y)
+
+    def visible(self, rect):
+        return self.rect.colliderect(rect)
+
+    def area(self, margin=0):
+        """The view rect grown by margin on every side"""
+        return self.rect.inflate(margin * 2, margin * 2)
@@ -0,0 +1,149 @@
+from collections import deque
+
+HISTORY_BUDGET = 8 * 1024 * 1024  # Rough bytes of undo history kept before the oldest edits are dropped
+RUN_BYTES = 120  # Rough memory cost of one run in an edit
+
+
+class Edit:
+    """One undoable change to the grid, as runs of cells that changed the same way.
+
+    A run is (y, x, length, before, after): length cells in row y from
+    column x that went from before to after, where each is a
+    (tile type, color) pair or None for an empty cell. Painting a line or
+    filling an area collapses into a handful of runs instead of one entry
+    per cell, and nothing else of the grid is kept.
+    """
+
+    def __init__(self, changes):
+        # changes: (x, y) -> (before, after)
+        self.runs = []
+        run = None
+        for x, y in sorted(changes, key=lambda pos: (pos[1], pos[0])):
+            before, after = changes[(x, y)]
+            if (run is not None and run[0] == y and run[1] + run[2] == x
+                    and run[3] == before and run[4] == after):
+                run[2] += 1
+            else:
+                run = [y, x, 1, before, after]
+                self.runs.append(run)
+        self.runs = [tuple(run) for run in self.runs]
+        self.cells = len(changes)
+
+    def size(self):
+        """Estimated bytes this edit takes up"""
+        return len(self.runs) * RUN_BYTES
+
+    def apply(self, grid, undo):
+        """Set every changed cell to its state before (undo) or after the edit"""
+        for y, x, length, before, after in self.runs:
+            tile = before if undo else after
+            positions = [(x + i, y) for i in range(length)]
+            if tile is None:
+                grid.remove_tiles(positions)
+            else:
+                grid.place_tiles(positions, tile[0], tile[1])
+
+
+class EditHistory:
+    """Undo and redo for a level builder Grid.
+
+    Changes go through place(), remove() and clear() so the cell states
+    before and after are known. Everything between begin() and end() - a
+    whole mouse drag - becomes one Edit. The undo history is trimmed from
+    the oldest end once it uses more than budget bytes.
+    """
+
+    def __init__(self, grid, budget=HISTORY_BUDGET):
+        self.grid = grid
+        self.budget = budget
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.used = 0  # Estimated bytes in undo_stack
+        self.changes = None  # (x, y) -> [before, after] for the edit in progress
+
+    def begin(self):
+        if self.changes is None:
+            self.changes = {}
+
+    def end(self):
+        """Finish the edit in progress and add it to the history"""
+        changes, self.changes = self.changes, None
+        if not changes:
+            return
+        changes = {pos: (before, after) for pos, (before, after) in changes.items() if before != after}
+        if not changes:
+            return
+
+        edit = Edit(changes)
+        self.undo_stack.append(edit)
+        self.used += edit.size()
+        self.redo_stack = []
+        # Always keep the newest edit, however big
+        while self.used > self.budget and len(self.undo_stack) > 1:
+            self.used -= self.undo_stack.popleft().size()
+
+    def _change(self, positions, action):
+        """Run action() and note how it changed the cells at positions"""
+        single = self.changes is None
+        if single:
+            self.begin()
+        tile_at = self.grid.tile_at
+        before = [tile_at(pos) for pos in positions]
+        action()
+        for pos, old in zip(positions, before):
+            change = self.changes.get(pos)
+            if change is None:
+                self.changes[pos] = [old, tile_at(pos)]
+            else:
+                change[1] = tile_at(pos)
+        if single:
+            self.end()
+
+    def place(self, grid_pos, tile_type, color):
+        if not grid_pos or not tile_type:
+            return
+        positions = [grid_pos]
+        if tile_type == "player" and self.grid.player_pos not in (None, grid_pos):
+            # Moving the player start also empties its old cell
+            positions.append(self.grid.player_pos)
+        self._change(positions, lambda: self.grid.place_tile(grid_pos, tile_type, color))
+
+    def remove(self, grid_pos):
+        if grid_pos is not None:
+            self._change([grid_pos], lambda: self.grid.remove_tile(grid_pos))
+
+    def clear(self):
+        """Empty the grid as one undoable edit"""
+        positions = [(x, y) for x, y, tile_type, color in self.grid.cells.items()]
+        if self.grid.player_pos is not None:
+            positions.append(self.grid.player_pos)
+        self._change(positions, self.grid.clear)
+
+    def undo(self):
+        """Revert the newest edit; returns False if there was nothing to undo"""
+        self.end()
+        if not self.undo_stack:
+            return False
+        edit = self.undo_stack.pop()
+        self.used -= edit.size()
+        edit.apply(self.grid, undo=True)
+        self.redo_stack.append(edit)
+        return True
+
+    def redo(self):
+        """Reapply the newest undone edit; returns False if there was nothing to redo"""
+        self.end()
+        if not self.redo_stack:
+            return False
+        edit = self.redo_stack.pop()
+        edit.apply(self.grid, undo=False)
+        self.undo_stack.append(edit)
+        self.used += edit.size()
+        return True
+
+    def reset(self):
+        """Forget all history, as after loading a different level"""
+        self.undo_stack.clear()
+        self.redo_stack = []
+        self.used = 0
+        self.changes = None
@@ -1,45 +1,24 @@
 import random
 import pygame
 import sys
-import json
 import time
 from BluetoothV2.game_controller import GameController
-
-def load_questions():
-    """Load questions from JSON file."""
-    try:
-        with open("questions.json", "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return [] 
-
-def load_enemies():
-
-    """Load questions from JSON file."""
-    try:
-        with open("charecter.json", "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return [] 
+from text_cache import text_cache
+from asset_cache import assets
+from battle import (Battle, load_questions, load_enemies, new_enemy,
+                    PLAYER_TURN, ABILITIES, QUESTION, SHOWING_EXPLANATION, ENEMY_TURN)
 
 #veeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeriables
 
-Q_time = 45
-time_remaining = 0
-timer_active = False
-timer_start = 0
-
-questions_list = load_questions()
+questions = load_questions()
 charecter_list = load_enemies()
 
-charecter_list=charecter_list[random.randint(0, len(charecter_list)-1)]
-
-current_question = None 
-player_answer = ""  
-choices = []
-right_answer = None
-buttons = []  
-show_abilities_condetion = False
+battle = None  # The Battle being shown, set up by start_battle()
+player_answer = ""  # Typed answer
+buttons = []
+selected_button_index = 0
+button_cache = {}  # Buttons made once per state and reused, see create_buttons()
+buttons_state = None  # Battle state the current buttons belong to
 
 is_shaking = False  
 shake_duration = 0
@@ -55,6 +34,20 @@ EXPLANATION_BOX_COLOR = (40, 40, 80)  # Dark blue background
 EXPLANATION_BORDER_COLOR = (100, 100, 200)
 EXPLANATION_TEXT_COLOR = (255, 255, 255)
 
+DIRTY_RECT_RENDERING = True  # Redraw and push to the display only the parts of the screen that changed
+BATTLE_FPS = 60
+IDLE_FPS = 10  # Frame rate while nothing on screen is moving
+WAND_SHAKE = 15  # Pixels the wand moves while shaking
+CACHE_STATS = False  # Print text cache statistics after each battle
+
+# Shake offsets for the current frame, picked once so every redrawn region agrees on them
+wand_offset = (0, 0)
+enemy_offset = (0, 0)
+
+# What was on screen last frame, as (rect, signature) per region; None forces a full redraw
+last_regions = None
+last_battle_state = None
+
 
 def draw_explanation_box():
     """Draw a box showing the explanation with Continue button below"""
@@ -68,69 +61,23 @@ def draw_explanation_box():
     # Add title based on correctness
     title = "Explanation"
     title_color = (255, 255, 255) 
-    title_surf = large_font.render(title, True, title_color)
+    title_surf = text_cache.render(large_font, title, title_color)
     title_rect = title_surf.get_rect(center=(box_rect.centerx, box_rect.top + 50))
     screen.blit(title_surf, title_rect)
     
     # Draw explanation text
-    explanation = current_question.get('explanation', 'No explanation available.')
+    explanation = battle.question.get('explanation', 'No explanation available.')
     draw_wrapped_text(explanation, (box_rect.left + 50, box_rect.top + 100, box_rect.width - 100, box_rect.height - 200))
 
 def draw_wrapped_text(text, rect_params):
     """Draw text with word wrapping within specified rectangle"""
     x, y, width, height = rect_params
-    rect = pygame.Rect(x, y, width, height)
-    
-    words = text.split(' ')
-    space_width = medium_font.size(' ')[0]
     line_height = medium_font.get_linesize()
     
-    current_line = []
-    current_line_width = 0
-    current_y = y
-    
-    for word in words:
-        word_surface = medium_font.render(word, True, EXPLANATION_TEXT_COLOR)
-        word_width = word_surface.get_width()
-        
-        if current_line_width + word_width <= width:
-            current_line.append(word)
-            current_line_width += word_width + space_width
-        else:
-            # Draw current line
-            line_text = ' '.join(current_line)
-            line_surface = medium_font.render(line_text, True, EXPLANATION_TEXT_COLOR)
-            screen.blit(line_surface, (x, current_y))
-            
-            # Start new line
-            current_line = [word]
-            current_line_width = word_width + space_width
-            current_y += line_height
-            
-            # Stop if we run out of space
-            if current_y + line_height > y + height:
-                break
-    
-    # Draw the last line
-    if current_line and current_y + line_height <= y + height:
-        line_text = ' '.join(current_line)
-        line_surface = medium_font.render(line_text, True, EXPLANATION_TEXT_COLOR)
-        screen.blit(line_surface, (x, current_y))
-
-abilities={
-        "Heal": {"uses": 1, "effect": "heal", "amount": 2},
-        "Double Damage": {"uses": 2, "effect": "damage", "amount": 3}
-    }
-player = {
-    "name": "clu&blu", 
-    "hp": 5, 
-    "attack": 1, 
-    "defense": 0, 
-    "speed": 8,
-    "abilities": abilities
-}
-enemy = {"name": charecter_list["name"], "hp":charecter_list["hp"],
-         "attack": charecter_list["attack"], "defense": charecter_list["defense"], "speed": charecter_list["speed"]}
+    # The wrapping is worked out once per text and box size
+    for i, line_text in enumerate(text_cache.wrap(medium_font, text, width, height)):
+        line_surface = text_cache.render(medium_font, line_text, EXPLANATION_TEXT_COLOR)
+        screen.blit(line_surface, (x, y + i * line_height))
 
 def update_animations(dt):
     global is_shaking, shake_intensity, shake_duration
@@ -146,26 +93,6 @@ def update_animations(dt):
         if shake_duration <= 0:
             is_shaking = False
 
-def start_timer():
-    global timer_active, timer_start, time_remaining
-    timer_active = True
-    timer_start = pygame.time.get_ticks()
-    time_remaining = Q_time
-    
-def update_timer():
-    global time_remaining, timer_active, battle_state
-    if timer_active:
-        elapsed = (pygame.time.get_ticks() - timer_start) // 1000
-        time_remaining = max(0, Q_time - elapsed)
-        if time_remaining <= 0:
-            timer_active = False
-            # Handle time running out - treat as wrong answer
-            if battle_state == "player_turn" and current_question:
-                global message
-                message = "Time's up! No attack this turn!"
-                battle_state = "enemy_turn"
-                create_buttons()
-                
 class Button:
     def __init__(self, x, y, width, height, text, action=None, color=(100, 100, 100), hover_color=(150, 150, 150)):
         self.rect = pygame.Rect(x, y, width, height)
@@ -194,7 +121,7 @@ class Button:
             pygame.draw.rect(screen, (0, 200, 0), inner_rect, 1)  # Inner border
             
             # Brighter text for selected buttons
-            text_surface = medium_font.render(self.text, True, (255, 255, 255))
+            text_surface = text_cache.render(medium_font, self.text, (255, 255, 255))
         else:
             # Normal button appearance
             color = self.hover_color if self.is_hovered else self.color
@@ -202,7 +129,7 @@ class Button:
             pygame.draw.rect(screen, (100, 100, 100), self.rect, 2)  # Normal border
             
             # Normal text
-            text_surface = medium_font.render(self.text, True, (220, 220, 220))
+            text_surface = text_cache.render(medium_font, self.text, (220, 220, 220))
         
         # Draw text
         text_rect = text_surface.get_rect(center=self.rect.center)
@@ -219,226 +146,136 @@ class Button:
             return True
         return False
 
-def continue_battle():
-    global battle_state, current_question, player_answer
-    current_question = None
+def start_battle(enemy_data=None):
+    """Set up a new battle against enemy_data, or a random enemy"""
+    global battle, oponent_image, player_answer, buttons_state
+    if enemy_data is None:
+        enemy_data = random.choice(charecter_list)
+    questions.refresh()  # Pick up questions added since the last battle
+    battle = Battle(questions, new_enemy(enemy_data))
     player_answer = ""
+    buttons_state = None
+
+    try:
+        oponent_image = assets.get(enemy_data['image'], (400, 390))
+    except (KeyError, pygame.error, FileNotFoundError):
+        # placeholder 
+        oponent_image = pygame.Surface((160, 240))
+        oponent_image.fill((150, 150, 150))
+
+def handle_effects():
+    """Start the animations for what just happened in the battle"""
+    global is_wand_shaking, wand_shake_duration
+    for effect in battle.effects:
+        if effect == "enemy_hit":
+            start_shake(5, 1.2)
+        elif effect == "wand":
+            is_wand_shaking = True
+            wand_shake_duration = 1.1
+    battle.effects.clear()
+
+def sync_battle():
+    """Bring the animations and buttons up to date with the battle"""
+    handle_effects()
+    if battle.state != buttons_state:
+        create_buttons()
+
+def answer_buttons():
+    return [Button(80, 920, 300, 50, "", lambda: battle.handle("answer", 0)),
+            Button(580, 920, 300, 50, "", lambda: battle.handle("answer", 1)),
+            Button(80, 990, 300, 50, "", lambda: battle.handle("answer", 2)),
+            Button(580, 990, 300, 50, "", lambda: battle.handle("answer", 3))]
+
+def ability_buttons(names):
+    # Ability buttons grid layout
+    start_x = 80
+    start_y = 890
+    button_width = 300
+    button_height = 50
+    horizontal_spacing = 50
+    vertical_spacing = 60
+    max_per_row = 2
     
-    if enemy["hp"] <= 0:
-        battle_state = "won"
-    elif battle_state == "showing_explanation":
-        # Only proceed to enemy turn if player answered wrong
-        if battle_state == "showing_explanation" and "❌" in message:
-            battle_state = "enemy_turn"
-        else:
-            battle_state = "player_turn"
-    create_buttons()
-    
-def create_buttons():
-    global buttons, selected_button_index
-    buttons = []
-    selected_button_index = 0  # Reset selected button index when creating new buttons
-    
-    if battle_state == "showing_explanation":
-        buttons.append(Button(SCREEN_WIDTH//2 - 550, 750, 300, 50, "Continue", continue_battle))
-    elif battle_state == "player_turn":
-        if current_question:
+    ability_list = []
+    row, col = 0, 0
+    for ability in names:
+        x = start_x + col * (button_width + horizontal_spacing)
+        y = start_y + row * vertical_spacing
+        ability_list.append(Button(
+            x, y, button_width, button_height, ability,
+            lambda a=ability: battle.handle("use_ability", a)
+        ))
+        col += 1
+        if col >= max_per_row:
+            col = 0
+            row += 1
     
-            if choices:
-                buttons.append(Button(80, 920, 300, 50, f"A: {choices[0]}", lambda: select_answer(0)))
-                buttons.append(Button(580, 920, 300, 50, f"B: {choices[1]}", lambda: select_answer(1)))
-                buttons.append(Button(80, 990, 300, 50, f"C: {choices[2]}", lambda: select_answer(2)))
-                buttons.append(Button(580, 990, 300, 50, f"D: {choices[3]}", lambda: select_answer(3)))
-                
-        elif  show_abilities_condetion:
-            if abilities:
-                # Ability buttons grid layout
-                start_x = 80
-                start_y = 890
-                button_width = 300
-                button_height = 50
-                horizontal_spacing = 50
-                vertical_spacing = 60
-                max_per_row = 2
-                
-                row, col = 0, 0
-                for ability, details in player["abilities"].items():
-                    if details["uses"] > 0:
-                        x = start_x + col * (button_width + horizontal_spacing)
-                        y = start_y + row * vertical_spacing
-                        buttons.append(Button(
-                            x, y, button_width, button_height,
-                            f"{ability} ({details['uses']})", 
-                            lambda a=ability: use_ability(a)
-                        ))
-                        col += 1
-                        if col >= max_per_row:
-                            col = 0
-                            row += 1
-                
-                # Position Back button below the ability grid
-                back_button_y = start_y + (row + 1) * vertical_spacing -60
-                buttons.append(Button(
-                    430, back_button_y, 300, 50, "Back", show_abilities
-            ))
-            
-        else:
-            # Normal action buttons
-            buttons.append(Button(80, 920, 300, 50, "Attack", player_attack_init))
-            buttons.append(Button(430, 920, 300, 50, "Abilities", show_abilities))
-                    
+    # Position Back button below the ability grid
+    back_button_y = start_y + (row + 1) * vertical_spacing -60
+    ability_list.append(Button(430, back_button_y, 300, 50, "Back", lambda: battle.handle("back")))
+    return ability_list
 
-        
-        
-        
-def use_ability(ability_name):
-    global battle_state, message, show_abilities_condetion, is_wand_shaking, wand_shake_duration, player
+def create_buttons():
+    """Point buttons at the ones for the current battle state.
+
+    Each set of buttons is built the first time its state comes up and
+    reused after that; only the text that changes (answers, ability uses)
+    is updated.
+    """
+    global buttons, selected_button_index, buttons_state
+    buttons_state = battle.state
+    selected_button_index = 0  # Reset selected button index when the buttons change
     
-    if ability_name in player["abilities"] and player["abilities"][ability_name]["uses"] > 0:
-        # Start wand shaking
-        is_wand_shaking = True
-        wand_shake_duration = 1.1  
-        
-        ability = player["abilities"][ability_name]
-        ability["uses"] -= 1
-        
-        if ability["effect"] == "heal":
-            player["hp"] += ability["amount"]
-            message = f"{player['name']} used {ability_name}! Healed {ability['amount']} HP!"
-        elif ability["effect"] == "double_damage":
-            # Store the original attack value if not already doubled
-            if not hasattr(player, 'original_attack'):
-                player.original_attack = player["attack"]
-            player["attack"] = player.original_attack * ability["amount"]
-            message = f"{player['name']} used {ability_name}! Your next attack will do double damage!"
-        
-        show_abilities_condetion = False
-        create_buttons()
+    if battle.state == SHOWING_EXPLANATION:
+        key = "continue"
+    elif battle.state == PLAYER_TURN:
+        key = "actions"
+    elif battle.state == QUESTION and battle.choices:
+        key = "answers"
+    elif battle.state == ABILITIES:
+        key = ("abilities",) + tuple(name for name, details in battle.available_abilities())
+    else:
+        buttons = []
+        return
 
-def select_answer(index):
-    global player_answer
-    if 0 <= index < len(choices):
-        player_answer = chr(ord('A') + index)
-        check_answer()
-
-def player_attack_init():
-    global current_question, message
-    if battle_state == "player_turn":  # Only ask question if it's player's turn
-        ask_question()
-        create_buttons()
+    if key not in button_cache:
+        if key == "continue":
+            button_cache[key] = [Button(SCREEN_WIDTH//2 - 550, 750, 300, 50, "Continue", lambda: battle.handle("continue"))]
+        elif key == "actions":
+            # Normal action buttons
+            button_cache[key] = [Button(80, 920, 300, 50, "Attack", lambda: battle.handle("attack")),
+                                 Button(430, 920, 300, 50, "Abilities", lambda: battle.handle("abilities"))]
+        elif key == "answers":
+            button_cache[key] = answer_buttons()
+        else:
+            button_cache[key] = ability_buttons(key[1:])
+    buttons = button_cache[key]
 
-def player_defend():
-    global battle_state, message
-    player["defense"] += 2  # Increase defense
-    message = f"{player['name']} defends! Defense increased by 2!"
-    battle_state = "enemy_turn"
-    create_buttons()
+    if key == "answers":
+        for button, letter, choice in zip(buttons, "ABCD", battle.choices):
+            button.text = f"{letter}: {choice}"
+    elif key[0] == "abilities":
+        for button, (ability, details) in zip(buttons, battle.available_abilities()):
+            button.text = f"{ability} ({details['uses']})"
 
-def end_battle():
-    global running
-    running = False
+    for button in buttons:
+        button.is_selected = False
+        button.is_hovered = False
 
-def ask_question():
-    global current_question, message, choices, right_answer, player_answer
-    player_answer = ""  # Clear previous answer
-    
-    if questions_list:
-        current_question = random.choice(questions_list)
-        message = current_question["question"]
-        right_answer = current_question["answer"]
-        choices = [
-            current_question["answer"], 
-            current_question["wrong_choice1"],
-            current_question["wrong_choice2"],
-            current_question["wrong_choice3"]
-        ]
-        random.shuffle(choices)
-        start_timer() 
+def submit_answer():
+    """Answer with the typed text; a single letter picks that choice"""
+    global player_answer
+    if player_answer.upper() in ("A", "B", "C", "D"):
+        battle.handle("answer", ord(player_answer.upper()) - ord('A'))
     else:
-        message = "No questions available!"
-        battle_state = "enemy_turn"
-    create_buttons()
-    
-def show_abilities():
-    global show_abilities_condetion
-    show_abilities_condetion = not show_abilities_condetion 
-    print("show_abilities", show_abilities) 
-    create_buttons()
+        battle.handle("submit", player_answer)
+    player_answer = ""
+
 def start_shake(intensity, duration):
     global is_shaking, shake_intensity, shake_duration
     is_shaking = True
     shake_intensity = intensity
     shake_duration = duration
-        
-def check_answer():
-    global battle_state, message, player_answer, right_answer, current_question, timer_active, player
-
-    correct = False
-    if not player_answer or not current_question:
-        return
-
-    # Check multiple choice answers
-    if player_answer.upper() in ("A", "B", "C", "D"):
-        index = ord(player_answer.upper()) - ord('A')
-        if index < len(choices) and choices[index].lower() == right_answer.lower():
-            correct = True
-    elif player_answer.lower() == right_answer.lower():
-        correct = True
-        
-    if correct:
-        damage = current_question["attackPower"]
-        # Apply double damage if active
-        if hasattr(player, 'original_attack') and player["attack"] > player.original_attack:
-            damage *= (player["attack"] / player.original_attack)
-            player["attack"] = player.original_attack  # Reset attack after use
-            del player.original_attack
-            
-        enemy["hp"] -= damage
-        message = f"✅ Correct! {player['name']} attacks for {damage} damage!"
-        start_shake(5, 1.2)
-        battle_state = "player_turn"
-    else:
-        message = f"❌ Wrong answer! No attack this turn."
-        battle_state = "enemy_turn"
-
-
-    timer_active = False
-    battle_state = "showing_explanation"
-    create_buttons()
-#tryyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyyy
-def player_attack():
-    global battle_state, message, player
-    damage = max(1, player["attack"] - enemy["defense"] // 2)
-    
-    # Apply double damage if active
-    if hasattr(player, 'original_attack') and player["attack"] > player.original_attack:
-        damage *= (player["attack"] / player.original_attack)
-        player["attack"] = player.original_attack  # Reset attack after use
-        del player.original_attack
-        
-    enemy["hp"] -= damage
-    message = f"{player['name']} attacks for {damage} damage!"
-    if enemy["hp"] <= 0:
-        enemy["hp"] = 0
-        battle_state = "won"
-    else:
-        battle_state = "enemy_turn"
-    create_buttons()
-
-def enemy_turn():
-    global battle_state, message
-    damage = max(1, enemy["attack"] - player["defense"])
-    player["hp"] -= damage
-    player["defense"] = 0  # Reset defense after each turn
-    message = f"{enemy['name']} attacks for {damage} damage!"
-
-    if player["hp"] <= 0:
-        player["hp"] = 0
-        battle_state = "lost"
-    else:
-        battle_state = "player_turn"
-        
-    create_buttons()
 
 # Initialize pygame
 pygame.init()
@@ -463,12 +300,6 @@ pygame.display.set_caption("Hunt for knowledge")
 clock = pygame.time.Clock()
 font = pygame.font.Font(None, 36)
 
-# Player and enemy data
-
-
-battle_state = "player_turn"  # "player_turn", "enemy_turn", "won", "lost"
-message = "What will you do?"
-
 # Load images
 try:
     heart = pygame.image.load('images/heart.png')
@@ -476,14 +307,9 @@ try:
 except:
     heart_image = pygame.Surface((40, 40))
     heart_image.fill((255, 0, 0))
-    
-try:
-    oponent = pygame.image.load(charecter_list['image'])
-    oponent_image = pygame.transform.scale(oponent, (400, 390)) 
-except:
-    # placeholder 
-    oponent_image = pygame.Surface((160, 240))
-    oponent_image.fill((150, 150, 150))
+
+# The battle on screen until run_game() starts a new one
+start_battle()
 
 BP = pygame.image.load('images/background_wild_westF.png')
 BP_image = pygame.transform.scale(BP, (SCREEN_WIDTH, SCREEN_HEIGHT)) 
@@ -508,31 +334,38 @@ def draw_hearts(x, y, hp):
         screen.blit(heart_image, (x + i * 65, y)) 
         
         
+def update_shake_offsets():
+    """Pick this frame's random shake offsets for the wand and the enemy"""
+    global wand_offset, enemy_offset
+    wand_offset = (0, 0)
+    if is_wand_shaking:
+        wand_offset = (random.randint(-WAND_SHAKE, WAND_SHAKE), random.randint(-WAND_SHAKE, WAND_SHAKE))
+    enemy_offset = (0, 0)
+    if is_shaking:
+        enemy_offset = (random.randint(-shake_intensity, shake_intensity),
+                        random.randint(-shake_intensity, shake_intensity))
+
 def draw_battle():
     screen.blit(BP_image, (0, 0)) 
     
-    # Draw the appropriate box based on state
-    if battle_state == "showing_explanation":
+    # Draw the explanation on top of the scene
+    if battle.state == SHOWING_EXPLANATION:
         draw_explanation_box()
-    elif current_question:  # If in multiple-choice mode
-        screen.blit(multi_choice_box_image, (20, 890))
-    else:
-        screen.blit(box_image, (30, 820)) 
     
     # Draw the appropriate box based on state
-    if current_question:  # If in multiple-choice mode
+    if battle.question:  # If in multiple-choice mode
         screen.blit(multi_choice_box_image, (20, 890))
     else:
         screen.blit(box_image, (30, 820))
         
     screen.blit(small_box_image, (930, 30))
     # screen.blit(EX_box_image, (100, 220))
-    wand_x, wand_y = wand_position
-    if is_wand_shaking:
-        wand_x += random.randint(-15, 15)
-        wand_y += random.randint(-15, 15)
+    wand_x = wand_position[0] + wand_offset[0]
+    wand_y = wand_position[1] + wand_offset[1]
     screen.blit(wand_image, (wand_x, wand_y))
 
+    player = battle.player
+    enemy = battle.enemy
     draw_text(f"{player['name']}:", (40, 50), (255, 255, 255), medium_font)
     draw_hearts(250, 40, player["hp"]) 
 
@@ -540,16 +373,15 @@ def draw_battle():
     draw_hearts(1570, 40, enemy["hp"])
 
     # Draw message
-    draw_text(message, (80, 860), (255, 255, 255), medium_font)
+    draw_text(battle.message, (80, 860), (255, 255, 255), medium_font)
     
-    if current_question and timer_active:
-        timer_text = f"Time: {time_remaining}s"
+    if battle.state == QUESTION:
+        timer_text = f"Time: {battle.time_remaining()}s"
         draw_text(timer_text, (SCREEN_WIDTH/2, 50), (155, 55, 255), small_font)
         
-    draw_x, draw_y = enemy_position
+    draw_x = enemy_position[0] + enemy_offset[0]
+    draw_y = enemy_position[1] + enemy_offset[1]
     if is_shaking:
-        draw_x += random.randint(-shake_intensity, shake_intensity)
-        draw_y += random.randint(-shake_intensity, shake_intensity)
         flash = pygame.Surface(oponent_image.get_size(), pygame.SRCALPHA)
         flash.fill((255, 0, 0, 50))  
         screen.blit(oponent_image, (draw_x, draw_y))
@@ -575,11 +407,68 @@ def draw_battle():
             pygame.draw.rect(screen, (0, 200, 0), inner_rect, 1)  # Inner border
         
         # Then draw the text (original code)
-        text_surface = medium_font.render(button.text, True, (255, 255, 255))
+        text_surface = text_cache.render(medium_font, button.text, (255, 255, 255))
         text_rect = text_surface.get_rect(center=button.rect.center)
         screen.blit(text_surface, text_rect)
         
         
+def battle_regions():
+    """(rect, signature) for each part of the battle screen that can change.
+
+    A region is redrawn when its signature changes; everything outside
+    the regions only changes with the battle state, which redraws everything.
+    """
+    button_state = tuple((button.text, tuple(button.rect), button.is_selected, button.is_hovered)
+                         for button in buttons)
+    timer = battle.time_remaining() if battle.state == QUESTION else None
+    explanation = None
+    if battle.state == SHOWING_EXPLANATION and battle.question:
+        explanation = battle.question.get('explanation')
+
+    enemy_rect = oponent_image.get_rect(topleft=enemy_position).inflate(shake_intensity * 2, shake_intensity * 2)
+    wand_rect = wand_image.get_rect(topleft=wand_position).inflate(WAND_SHAKE * 2, WAND_SHAKE * 2)
+    return [
+        # Names, hearts and the timer
+        (pygame.Rect(0, 0, SCREEN_WIDTH, 120), (battle.player["name"], battle.player["hp"], battle.enemy["name"], battle.enemy["hp"], timer)),
+        (enemy_rect, (is_shaking, enemy_offset)),
+        (wand_rect, wand_offset),
+        (pygame.Rect(SCREEN_WIDTH//2 - 900, 200, 1000, 600), (explanation, button_state)),
+        # Message box and buttons
+        (pygame.Rect(0, 800, SCREEN_WIDTH, SCREEN_HEIGHT - 800),
+         (battle.message, battle.question is not None, button_state))
+    ]
+
+def draw_battle_dirty():
+    """Redraw the regions of the battle screen that changed and update only those.
+
+    Returns whether anything was redrawn.
+    """
+    global last_regions, last_battle_state
+    regions = battle_regions()
+    if last_regions is None or battle.state != last_battle_state:
+        draw_battle()
+        pygame.display.flip()
+        last_regions = regions
+        last_battle_state = battle.state
+        return True
+
+    screen_rect = screen.get_rect()
+    dirty = []
+    for (rect, signature), (old_rect, old_signature) in zip(regions, last_regions):
+        if signature != old_signature or rect != old_rect:
+            dirty.append(rect.union(old_rect).clip(screen_rect))
+
+    # The whole scene is drawn under a clip, so overlapping parts stay in the right order
+    for rect in dirty:
+        screen.set_clip(rect)
+        draw_battle()
+    screen.set_clip(None)
+    if dirty:
+        pygame.display.update(dirty)
+
+    last_regions = regions
+    return bool(dirty)
+
 def draw_text(text, pos, color=(255, 255, 255), font_obj=None):
     """Draw text with optional custom font, supports multi-line text"""
     if font_obj is None:
@@ -591,7 +480,7 @@ def draw_text(text, pos, color=(255, 255, 255), font_obj=None):
     
     for line in lines:
         if line:  # Only render non-empty lines
-            text_surface = font_obj.render(line, False, color)
+            text_surface = text_cache.render(font_obj, line, color, False)
             screen.blit(text_surface, (x, y))
         y += font_obj.get_height() + 5 
 
@@ -600,7 +489,8 @@ create_buttons()
 
 # Main game loop
 def run_game(create_new_controller=True):
-    global screen, clock, battle_state, message, current_question, choices, right_answer, running, bt_controller, selected_button_index
+    global screen, clock, running, bt_controller, selected_button_index, player_answer
+    global last_regions
     
     # Initialize Bluetooth controller only if we need to create a new one
     if create_new_controller:
@@ -611,42 +501,28 @@ def run_game(create_new_controller=True):
         time.sleep(1)
     
     running = True
-    battle_state = "player_turn"
-    message = "What will you do?"
-    current_question = None
-    selected_button_index = 0  # Track which button is selected by controller
-    
-    # Reset player and enemy stats
-    player = {
-    "name": "clu&blu", 
-    "hp": 5, 
-    "attack": 1, 
-    "defense": 0, 
-    "speed": 8,
-    "abilities": {
-        "Heal": {"uses": 2, "effect": "heal", "amount": 2},
-        "Double Damege": {"uses": 3, "effect": "damage", "amount": 3},
-        
-    }
-}
-    enemy = {"name": charecter_list["name"], "hp":charecter_list["hp"],
-         "attack": charecter_list["attack"], "defense": charecter_list["defense"], "speed": charecter_list["speed"]}
     
+    # A fresh battle with full stats against a new enemy
+    start_battle()
     create_buttons()
     
+    # The screen held something else until now
+    last_regions = None
+    
     # Main game loop
     last_time = pygame.time.get_ticks()
     controller_cooldown = 0  # Cooldown for controller input to prevent rapid navigation
     controller_cooldown_time = 0.2  # Seconds between controller inputs
     
     while running:
-        screen.blit(BP_image, (0, 0)) 
         current_time = pygame.time.get_ticks()
         dt = (current_time - last_time) / 1000.0  # Delta time in seconds
         last_time = current_time
         
         update_animations(dt)
-        update_timer() 
+        # Runs the question timer and the enemy's turn
+        battle.update(dt)
+        sync_battle()
         mouse_pos = pygame.mouse.get_pos()
         
         # Update controller cooldown
@@ -680,8 +556,10 @@ def run_game(create_new_controller=True):
                     if 0 <= selected_button_index < len(buttons) and buttons[selected_button_index].action:
                         buttons[selected_button_index].action()
                         controller_cooldown = controller_cooldown_time
+                        sync_battle()
         
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
 
@@ -694,50 +572,49 @@ def run_game(create_new_controller=True):
                 for button in buttons:
                     if button.handle_event(event):
                         break
-            if battle_state == "showing_explanation":
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running = False
-                    elif event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
-                            continue_battle()
-                    elif event.type == pygame.MOUSEBUTTONDOWN:
-                        for button in buttons:
-                            if button.handle_event(event):
-                                break
+                
             # Keyboard handling (keeps original functionality)
             if event.type == pygame.KEYDOWN:
-                if battle_state == "player_turn":
+                if battle.state == PLAYER_TURN:
                     if event.key == pygame.K_1:  # Attack
-                        player_attack_init()
+                        battle.handle("attack")
                     elif event.key == pygame.K_2:  # Defend
-                        player_defend()
-                    elif current_question:  # Only if answering a question
-                        if event.key == pygame.K_RETURN:  # Submit answer
-                            check_answer()
-                        elif event.key == pygame.K_BACKSPACE:
-                            player_answer = player_answer[:-1]
-                        elif event.key in (pygame.K_a, pygame.K_b, pygame.K_c, pygame.K_d):
-                            player_answer = chr(event.key).upper()
-                            check_answer()
-                        elif event.key not in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
-                            player_answer += event.unicode
+                        battle.handle("defend")
+                elif battle.state == QUESTION:  # Only if answering a question
+                    if event.key == pygame.K_RETURN:  # Submit answer
+                        submit_answer()
+                    elif event.key == pygame.K_BACKSPACE:
+                        player_answer = player_answer[:-1]
+                    elif event.key in (pygame.K_a, pygame.K_b, pygame.K_c, pygame.K_d):
+                        player_answer = chr(event.key).upper()
+                        submit_answer()
+                    elif event.key not in (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
+                        player_answer += event.unicode
+                elif battle.state == SHOWING_EXPLANATION:
+                    if event.key == pygame.K_RETURN or event.key == pygame.K_SPACE:
+                        battle.handle("continue")
 
                 if event.key == pygame.K_ESCAPE:
                     running = False  
-                elif battle_state in ["won", "lost"] and event.key == pygame.K_SPACE:
+                elif battle.over and event.key == pygame.K_SPACE:
                     running = False
 
-        # Enemy turn
-        if battle_state == "enemy_turn":
-            if player["defense"] > 0:
-                player["defense"] = 0
-            pygame.time.delay(1000)  
-            enemy_turn()
+            # The buttons may have changed under the next event
+            sync_battle()
         
-        draw_battle()
-        pygame.display.flip()
-        clock.tick(60)
+        update_shake_offsets()
+        if DIRTY_RECT_RENDERING:
+            redrawn = draw_battle_dirty()
+            # Sleep longer between frames while the screen is still and nobody is touching it
+            busy = redrawn or events or is_shaking or is_wand_shaking or battle.state == ENEMY_TURN
+            clock.tick(BATTLE_FPS if busy else IDLE_FPS)
+        else:
+            draw_battle()
+            pygame.display.flip()
+            clock.tick(BATTLE_FPS)
+
+    if CACHE_STATS:
+        print(f"Text cache: {text_cache.report()}")
 
     # Clean up Bluetooth controller before exiting, but only if we created it
     if create_new_controller:
@@ -1,8 +1,16 @@
 import pygame
 import sys
-import json
 import os
+import copy
+import time
+from collections import OrderedDict
 from pygame.locals import *
+from level_registry import levels as level_registry
+from level_format import LevelColumns, MOVE_AXES, BINARY_EXTENSION
+from tile_storage import SparseTiles, make_tiles, DENSE_LIMIT, MAX_DENSE_CODE
+from edit_history import EditHistory
+from level_saver import (LevelSaver, write_level, start_journal, append_journal, read_journal,
+                         journal_entry, apply_entry)
 
 # Initialize pygame
 pygame.init()
@@ -12,6 +20,12 @@ SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 GRID_SIZE = 40
 FPS = 60
+UNDO_BUDGET = 8 * 1024 * 1024  # Rough bytes of undo history to keep
+AUTOSAVE_INTERVAL = 10  # Seconds between autosave journal entries
+AUTOSAVE_JOURNAL = "_autosave.journal"  # In the levels folder
+PLAYTEST_IN_PROCESS = True  # Play levels in this window; False starts play_level.py separately
+CHUNK_CELLS = 8  # Grid cells along each side of a cached chunk
+CHUNK_CACHE_SIZE = 96  # Rendered chunks kept in memory
 
 # Colors
 WHITE = (255, 255, 255)
@@ -185,164 +199,213 @@ class Grid:
     def __init__(self, x, y, width, height, grid_size):
         self.rect = pygame.Rect(x, y, width, height)
         self.grid_size = grid_size
-        self.cells = {}  # (x, y) -> {"type": type, "color": color}
         self.grid_width = width // grid_size
         self.grid_height = height // grid_size
-        self.player_pos = None
         # For scrolling - make the actual grid larger than visible area
         self.total_width = self.grid_width * 3  # 3x wider than visible
         self.total_height = self.grid_height * 3  # 3x taller than visible
+        # Tile codes per cell (see tile_storage); the player start has its own slot
+        self.cells = make_tiles(self.total_width, self.total_height)
+        self.player_pos = None
+        self.player_color = None
         self.camera_offset = pygame.Vector2(0, 0)
+        # Tiles are drawn in chunks of chunk_cells x chunk_cells cells, each
+        # rendered once and reused until one of its tiles changes
+        self.chunk_cells = CHUNK_CELLS
+        self.chunk_cache = OrderedDict()  # chunk -> rendered surface, least recently drawn first
+        self.empty_chunk = None  # Shared by every chunk without tiles
+        # Cells changed since take_changes() was last called, for the autosave journal
+        self.changed = set()
+        self.cleared = False
 
     def draw(self, surface):
-        # Draw grid background
-        pygame.draw.rect(surface, WHITE, self.rect)
-
-        # Calculate visible range based on camera offset
-        start_x = int(self.camera_offset.x // self.grid_size)
-        start_y = int(self.camera_offset.y // self.grid_size)
-        end_x = start_x + self.grid_width + 1
-        end_y = start_y + self.grid_height + 1
-
-        # Draw grid lines adjusted for camera offset
-        for x in range(start_x, end_x):
-            screen_x = self.rect.x + (x * self.grid_size) - self.camera_offset.x
-            pygame.draw.line(
+        # Blit the cached chunks overlapping the view instead of drawing every tile
+        chunk_pixels = self.chunk_cells * self.grid_size
+        start_cx = int(self.camera_offset.x // chunk_pixels)
+        start_cy = int(self.camera_offset.y // chunk_pixels)
+        end_cx = int((self.camera_offset.x + self.rect.width) // chunk_pixels)
+        end_cy = int((self.camera_offset.y + self.rect.height) // chunk_pixels)
+
+        old_clip = surface.get_clip()
+        surface.set_clip(self.rect)
+        for cy in range(start_cy, end_cy + 1):
+            for cx in range(start_cx, end_cx + 1):
+                surface.blit(
+                    self._chunk_surface((cx, cy)),
+                    (self.rect.x + cx * chunk_pixels - self.camera_offset.x,
+                     self.rect.y + cy * chunk_pixels - self.camera_offset.y)
+                )
+
+        # The player is taller than a cell, so it is drawn on top rather than cached
+        if self.player_pos is not None:
+            grid_x, grid_y = self.player_pos
+            self._draw_cell(
                 surface,
-                LIGHT_GRAY,
-                (screen_x, self.rect.y),
-                (screen_x, self.rect.y + self.rect.height)
+                "player",
+                self.player_color,
+                self.rect.x + grid_x * self.grid_size - self.camera_offset.x,
+                self.rect.y + grid_y * self.grid_size - self.camera_offset.y
+            )
+        surface.set_clip(old_clip)
+
+    def _chunk_of(self, grid_pos):
+        return (grid_pos[0] // self.chunk_cells, grid_pos[1] // self.chunk_cells)
+
+    def _chunk_surface(self, chunk):
+        """Rendered grid lines and tiles of one chunk, cached until a tile in it changes"""
+        chunk_surface = self.chunk_cache.get(chunk)
+        if chunk_surface is None:
+            tiles = self.cells.region(chunk[0] * self.chunk_cells, chunk[1] * self.chunk_cells,
+                                      self.chunk_cells, self.chunk_cells)
+            if tiles:
+                chunk_surface = self._render_chunk(chunk, tiles)
+            else:
+                if self.empty_chunk is None:
+                    self.empty_chunk = self._render_chunk(chunk, ())
+                chunk_surface = self.empty_chunk
+            self.chunk_cache[chunk] = chunk_surface
+            # Drop the least recently drawn chunk once the cache is full
+            if len(self.chunk_cache) > CHUNK_CACHE_SIZE:
+                self.chunk_cache.popitem(last=False)
+        else:
+            self.chunk_cache.move_to_end(chunk)
+        return chunk_surface
+
+    def _render_chunk(self, chunk, tiles):
+        chunk_pixels = self.chunk_cells * self.grid_size
+        chunk_surface = pygame.Surface((chunk_pixels, chunk_pixels)).convert()
+        chunk_surface.fill(WHITE)
+
+        # Grid lines along the left and top edge of every cell
+        for i in range(self.chunk_cells):
+            offset = i * self.grid_size
+            pygame.draw.line(chunk_surface, LIGHT_GRAY, (offset, 0), (offset, chunk_pixels))
+            pygame.draw.line(chunk_surface, LIGHT_GRAY, (0, offset), (chunk_pixels, offset))
+
+        origin_x = chunk[0] * chunk_pixels
+        origin_y = chunk[1] * chunk_pixels
+        palette = self.cells.palette
+        for grid_x, grid_y, code in tiles:
+            tile_type, color = palette[code]
+            self._draw_cell(
+                chunk_surface,
+                tile_type,
+                color,
+                grid_x * self.grid_size - origin_x,
+                grid_y * self.grid_size - origin_y
             )
+        return chunk_surface
 
-        for y in range(start_y, end_y):
-            screen_y = self.rect.y + (y * self.grid_size) - self.camera_offset.y
+    def _draw_cell(self, surface, tile_type, color, x, y):
+        if tile_type == "platform":
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x, y, self.grid_size, self.grid_size)
+            )
+        elif tile_type == "small_platform":
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x, y + self.grid_size // 2, self.grid_size, self.grid_size // 2)
+            )
+        elif tile_type == "hazard":
+            pygame.draw.polygon(
+                surface,
+                color,
+                [(x + self.grid_size // 2, y),
+                 (x, y + self.grid_size),
+                 (x + self.grid_size, y + self.grid_size)]
+            )
+        elif tile_type == "bounce":
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x, y + 3 * self.grid_size // 4, self.grid_size, self.grid_size // 4)
+            )
+            # Draw arrow
+            pygame.draw.polygon(
+                surface,
+                WHITE,
+                [(x + self.grid_size // 2, y + self.grid_size // 4),
+                 (x + self.grid_size // 4, y + self.grid_size // 2),
+                 (x + 3 * self.grid_size // 4, y + self.grid_size // 2)]
+            )
+        elif tile_type == "checkpoint":
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x + self.grid_size // 2 - 5, y, 10, self.grid_size)
+            )
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x, y, 10, self.grid_size)
+            )
+        elif tile_type == "moving_platform":
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x, y + self.grid_size // 2, self.grid_size, self.grid_size // 2)
+            )
+            # Draw movement arrows
             pygame.draw.line(
                 surface,
-                LIGHT_GRAY,
-                (self.rect.x, screen_y),
-                (self.rect.x + self.rect.width, screen_y)
+                BLACK,
+                (x + self.grid_size // 4, y + self.grid_size // 3),
+                (x + 3 * self.grid_size // 4, y + self.grid_size // 3),
+                2
             )
-
-        # Draw placed tiles adjusted for camera offset
-        for pos, cell in self.cells.items():
-            grid_x, grid_y = pos
-            x = self.rect.x + (grid_x * self.grid_size) - self.camera_offset.x
-            y = self.rect.y + (grid_y * self.grid_size) - self.camera_offset.y
-
-            # Skip tiles that are outside the visible area
-            if (x + self.grid_size < self.rect.x or x > self.rect.right or
-                    y + self.grid_size < self.rect.y or y > self.rect.bottom):
-                continue
-
-            if cell["type"] == "platform":
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x, y, self.grid_size, self.grid_size)
-                )
-            elif cell["type"] == "small_platform":
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x, y + self.grid_size // 2, self.grid_size, self.grid_size // 2)
-                )
-            elif cell["type"] == "hazard":
-                pygame.draw.polygon(
-                    surface,
-                    cell["color"],
-                    [(x + self.grid_size // 2, y),
-                     (x, y + self.grid_size),
-                     (x + self.grid_size, y + self.grid_size)]
-                )
-            elif cell["type"] == "bounce":
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x, y + 3 * self.grid_size // 4, self.grid_size, self.grid_size // 4)
-                )
-                # Draw arrow
-                pygame.draw.polygon(
-                    surface,
-                    WHITE,
-                    [(x + self.grid_size // 2, y + self.grid_size // 4),
-                     (x + self.grid_size // 4, y + self.grid_size // 2),
-                     (x + 3 * self.grid_size // 4, y + self.grid_size // 2)]
-                )
-            elif cell["type"] == "checkpoint":
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x + self.grid_size // 2 - 5, y, 10, self.grid_size)
-                )
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x, y, 10, self.grid_size)
-                )
-            elif cell["type"] == "moving_platform":
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x, y + self.grid_size // 2, self.grid_size, self.grid_size // 2)
-                )
-                # Draw movement arrows
-                pygame.draw.line(
-                    surface,
-                    BLACK,
-                    (x + self.grid_size // 4, y + self.grid_size // 3),
-                    (x + 3 * self.grid_size // 4, y + self.grid_size // 3),
-                    2
-                )
-                pygame.draw.polygon(
-                    surface,
-                    BLACK,
-                    [(x + self.grid_size // 4, y + self.grid_size // 4),
-                     (x + self.grid_size // 8, y + self.grid_size // 3),
-                     (x + self.grid_size // 4, y + 5 * self.grid_size // 12)]
-                )
-                pygame.draw.polygon(
-                    surface,
-                    BLACK,
-                    [(x + 3 * self.grid_size // 4, y + self.grid_size // 4),
-                     (x + 7 * self.grid_size // 8, y + self.grid_size // 3),
-                     (x + 3 * self.grid_size // 4, y + 5 * self.grid_size // 12)]
-                )
-            elif cell["type"] == "breakable":
-                pygame.draw.rect(
-                    surface,
-                    cell["color"],
-                    pygame.Rect(x, y, self.grid_size, self.grid_size)
-                )
-                # Draw crack lines
-                pygame.draw.line(
-                    surface,
-                    BLACK,
-                    (x, y),
-                    (x + self.grid_size // 2, y + self.grid_size // 2),
-                    2
-                )
-                pygame.draw.line(
-                    surface,
-                    BLACK,
-                    (x + self.grid_size, y),
-                    (x + self.grid_size // 2, y + self.grid_size // 2),
-                    2
-                )
-                pygame.draw.line(
-                    surface,
-                    BLACK,
-                    (x + self.grid_size // 2, y + self.grid_size // 2),
-                    (x + self.grid_size // 2, y + self.grid_size),
-                    2
-                )
-            elif cell["type"] == "player":
-                player_rect = pygame.Rect(
-                    x + (self.grid_size - 30) // 2,
-                    y,
-                    30,
-                    50
-                )
-                pygame.draw.rect(surface, cell["color"], player_rect)
+            pygame.draw.polygon(
+                surface,
+                BLACK,
+                [(x + self.grid_size // 4, y + self.grid_size // 4),
+                 (x + self.grid_size // 8, y + self.grid_size // 3),
+                 (x + self.grid_size // 4, y + 5 * self.grid_size // 12)]
+            )
+            pygame.draw.polygon(
+                surface,
+                BLACK,
+                [(x + 3 * self.grid_size // 4, y + self.grid_size // 4),
+                 (x + 7 * self.grid_size // 8, y + self.grid_size // 3),
+                 (x + 3 * self.grid_size // 4, y + 5 * self.grid_size // 12)]
+            )
+        elif tile_type == "breakable":
+            pygame.draw.rect(
+                surface,
+                color,
+                pygame.Rect(x, y, self.grid_size, self.grid_size)
+            )
+            # Draw crack lines
+            pygame.draw.line(
+                surface,
+                BLACK,
+                (x, y),
+                (x + self.grid_size // 2, y + self.grid_size // 2),
+                2
+            )
+            pygame.draw.line(
+                surface,
+                BLACK,
+                (x + self.grid_size, y),
+                (x + self.grid_size // 2, y + self.grid_size // 2),
+                2
+            )
+            pygame.draw.line(
+                surface,
+                BLACK,
+                (x + self.grid_size // 2, y + self.grid_size // 2),
+                (x + self.grid_size // 2, y + self.grid_size),
+                2
+            )
+        elif tile_type == "player":
+            player_rect = pygame.Rect(
+                x + (self.grid_size - 30) // 2,
+                y,
+                30,
+                50
+            )
+            pygame.draw.rect(surface, color, player_rect)
 
     def get_grid_pos(self, mouse_pos):
         if not self.rect.collidepoint(mouse_pos):
@@ -361,29 +424,147 @@ class Grid:
 
     def place_tile(self, grid_pos, tile_type, color):
         if grid_pos and tile_type:
-            # If placing player, remove old player position
             if tile_type == "player":
-                for pos in list(self.cells.keys()):
-                    if self.cells[pos]["type"] == "player":
-                        del self.cells[pos]
+                # Only one player start; it replaces whatever tile was in its cell
+                if self.player_pos is not None:
+                    self.changed.add(self.player_pos)
+                self.remove_tile(grid_pos)
                 self.player_pos = grid_pos
+                self.player_color = color
+                return
 
-            # Store tile
-            self.cells[grid_pos] = {
-                "type": tile_type,
-                "color": color
-            }
+            if grid_pos == self.player_pos:
+                self.player_pos = None
+            code = self.cells.palette.code(tile_type, color)
+            self._make_room(grid_pos, code)
+            self.cells.set(grid_pos, code)
+            self.changed.add(grid_pos)
+            self.chunk_cache.pop(self._chunk_of(grid_pos), None)
+
+    def place_tiles(self, positions, tile_type, color):
+        """Place many tiles of one type at once, as when loading a level"""
+        if tile_type == "player":
+            for grid_pos in positions:
+                self.place_tile(grid_pos, tile_type, color)
+            return
+
+        code = self.cells.palette.code(tile_type, color)
+        chunks = set()
+        for grid_pos in positions:
+            if grid_pos == self.player_pos:
+                self.player_pos = None
+            self._make_room(grid_pos, code)
+            self.cells.set(grid_pos, code)
+            chunks.add(self._chunk_of(grid_pos))
+        self.changed.update(positions)
+        for chunk in chunks:
+            self.chunk_cache.pop(chunk, None)
+
+    def _make_room(self, grid_pos, code):
+        """Grow or replace the tile storage if it can't hold code at grid_pos"""
+        if self.cells.fits(grid_pos, code):
+            return
+        x, y = grid_pos
+        if code <= MAX_DENSE_CODE and x >= 0 and y >= 0:
+            # Past the edge of the dense array: grow it if it stays a sensible size
+            width, height = self.cells.width, self.cells.height
+            if x >= width:
+                width = max(x + 1, width * 2)
+            if y >= height:
+                height = max(y + 1, height * 2)
+            if width * height <= DENSE_LIMIT:
+                self.cells = self.cells.resized(width, height)
+                return
+        self.cells = SparseTiles.from_tiles(self.cells)
 
     def remove_tile(self, grid_pos):
-        if grid_pos in self.cells:
-            # If removing player, clear player position
-            if self.cells[grid_pos]["type"] == "player":
+        if grid_pos is None:
+            return
+        self.changed.add(grid_pos)
+        if grid_pos == self.player_pos:
+            self.player_pos = None
+        elif self.cells.remove(grid_pos):
+            self.chunk_cache.pop(self._chunk_of(grid_pos), None)
+
+    def remove_tiles(self, positions):
+        chunks = set()
+        for grid_pos in positions:
+            if grid_pos == self.player_pos:
                 self.player_pos = None
-            del self.cells[grid_pos]
+            elif self.cells.remove(grid_pos):
+                chunks.add(self._chunk_of(grid_pos))
+        self.changed.update(positions)
+        for chunk in chunks:
+            self.chunk_cache.pop(chunk, None)
+
+    def tile_at(self, grid_pos):
+        """(tile type, color) of the tile at grid_pos, or None"""
+        if grid_pos == self.player_pos:
+            return ("player", self.player_color)
+        return self.cells.get(grid_pos)
 
     def clear(self):
-        self.cells = {}
+        self.cells = make_tiles(self.total_width, self.total_height)
         self.player_pos = None
+        self.player_color = None
+        self.chunk_cache.clear()
+        self.changed = set()
+        self.cleared = True
+
+    def take_changes(self):
+        """(cleared, changed cells) since the last call, and start tracking afresh"""
+        changes = (self.cleared, self.changed)
+        self.changed = set()
+        self.cleared = False
+        return changes
+
+    def snapshot(self):
+        """A copy of the tiles that later edits won't touch, for saving on another thread"""
+        snapshot = copy.copy(self)
+        snapshot.cells = self.cells.copy()
+        snapshot.chunk_cache = OrderedDict()
+        snapshot.changed = set()
+        return snapshot
+
+    def _tile_objects(self):
+        """Tile type -> (level object kind, y offset in the cell, field values after x and y)"""
+        size = self.grid_size
+        return {
+            "platform": ("platforms", 0, (size, size)),
+            "small_platform": ("small_platforms", size // 2, (size, size // 2)),
+            "hazard": ("hazards", 0, (size,)),
+            "bounce": ("bounce_pads", 3 * size // 4, (size, size // 4)),
+            "checkpoint": ("checkpoints", 0, (size, size)),
+            # Default movement distance, speed and axis
+            "moving_platform": ("moving_platforms", size // 2, (size, size // 2, 120, 2, "horizontal")),
+            "breakable": ("breakable_blocks", 0, (size, size))
+        }
+
+    def to_level_columns(self, origin_x=0, origin_y=0):
+        """Build the level for the grid, with cell (0, 0) at (origin_x, origin_y)"""
+        level = LevelColumns()
+        size = self.grid_size
+        tile_objects = self._tile_objects()
+
+        # One pass per tile type and color, straight from the tile storage into the columns
+        for tile_type, color, positions in self.cells.groups():
+            kind, y_offset, values = tile_objects[tile_type]
+            columns = level.columns[kind]
+            columns[0].fromlist([origin_x + grid_x * size for grid_x, grid_y in positions])
+            columns[1].fromlist([origin_y + grid_y * size + y_offset for grid_x, grid_y in positions])
+            for column, value in zip(columns[2:], values):
+                if value in MOVE_AXES:
+                    value = MOVE_AXES.index(value)
+                column.fromlist([value] * len(positions))
+
+        if self.player_pos is not None:
+            grid_x, grid_y = self.player_pos
+            level.player_start = (origin_x + grid_x * size + size // 2, origin_y + grid_y * size + size)
+        return level
+
+    def to_level_data(self, origin_x=0, origin_y=0):
+        """Build the level file data for the grid, with cell (0, 0) at (origin_x, origin_y)"""
+        return self.to_level_columns(origin_x, origin_y).to_json()
 
 
 class LevelBuilder:
@@ -484,6 +665,9 @@ class LevelBuilder:
             (150, 150, 0)
         )
 
+        # Painting goes through the history so it can be undone
+        self.history = EditHistory(self.grid, UNDO_BUDGET)
+
         # State
         self.is_dragging = False
         self.current_filename = "untitled"
@@ -493,6 +677,16 @@ class LevelBuilder:
         if not os.path.exists(self.level_dir):
             os.makedirs(self.level_dir)
 
+        # Saves are written on a background thread; edits between saves go
+        # to the autosave journal so a crash doesn't lose them
+        self.saver = LevelSaver()
+        self.journal_path = os.path.join(self.level_dir, AUTOSAVE_JOURNAL)
+        self.last_autosave = time.time()
+        self.recover_autosave()
+
+        # Started on the first playtest and kept running for the next ones
+        self.play_controller = None
+
     def draw(self, surface):
         surface.fill(BLACK)
 
@@ -615,17 +809,19 @@ class LevelBuilder:
                     elif self.grid.rect.collidepoint(mouse_pos):
                         grid_pos = self.grid.get_grid_pos(mouse_pos)
 
-                        # Left click to place tile
+                        # Left click to place tile; the whole drag is one undo step
                         if self.tile_selector.selected_tile:
                             self.is_dragging = True
+                            self.history.begin()
                             tile = self.tile_selector.selected_tile
-                            self.grid.place_tile(grid_pos, tile["type"], tile["color"])
+                            self.history.place(grid_pos, tile["type"], tile["color"])
                 
                 # Right click to remove tile
                 elif event.button == 3 and self.grid.rect.collidepoint(mouse_pos):
                     self.is_dragging = "remove"
+                    self.history.begin()
                     grid_pos = self.grid.get_grid_pos(mouse_pos)
-                    self.grid.remove_tile(grid_pos)
+                    self.history.remove(grid_pos)
                 
                 # Mouse wheel for scrolling
                 elif event.button == 4:  # Scroll Up
@@ -652,7 +848,7 @@ class LevelBuilder:
                 elif self.load_button.is_clicked(mouse_pos, event):
                     self.load_level()
                 elif self.clear_button.is_clicked(mouse_pos, event):
-                    self.grid.clear()
+                    self.history.clear()
                 elif self.play_button.is_clicked(mouse_pos, event):
                     self.play_level()
 
@@ -662,8 +858,19 @@ class LevelBuilder:
                     self.is_dragging = False
                     self.dragging_h_thumb = False
                     self.dragging_v_thumb = False
+                    self.history.end()
                 elif event.button == 2:
                     self.dragging_grid = False
+                elif event.button == 3:
+                    self.is_dragging = False
+                    self.history.end()
+
+            # Ctrl+Z to undo, Ctrl+Y or Ctrl+Shift+Z to redo
+            elif event.type == KEYDOWN and event.mod & KMOD_CTRL:
+                if event.key == K_y or (event.key == K_z and event.mod & KMOD_SHIFT):
+                    self.history.redo()
+                elif event.key == K_z:
+                    self.history.undo()
 
             # Handle mouse motion
             elif event.type == MOUSEMOTION:
@@ -718,90 +925,16 @@ class LevelBuilder:
                     
                     if grid_pos:
                         if self.is_dragging == "remove":
-                            self.grid.remove_tile(grid_pos)
+                            self.history.remove(grid_pos)
                         else:
                             tile = self.tile_selector.selected_tile
-                            self.grid.place_tile(grid_pos, tile["type"], tile["color"])
+                            self.history.place(grid_pos, tile["type"], tile["color"])
 
         return True
 
     def save_level(self):
-        # Create level data
-        level_data = {
-            "platforms": [],
-            "small_platforms": [],
-            "hazards": [],
-            "bounce_pads": [],
-            "checkpoints": [],
-            "moving_platforms": [],
-            "breakable_blocks": [],
-            "player_start": None
-        }
-
-        for pos, cell in self.grid.cells.items():
-            grid_x, grid_y = pos
-            # Convert grid positions to world coordinates
-            x = grid_x * self.grid.grid_size
-            y = grid_y * self.grid.grid_size
-
-            if cell["type"] == "platform":
-                level_data["platforms"].append({
-                    "x": x,
-                    "y": y,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size
-                })
-            elif cell["type"] == "small_platform":
-                level_data["small_platforms"].append({
-                    "x": x,
-                    "y": y + self.grid.grid_size // 2,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size // 2
-                })
-            elif cell["type"] == "hazard":
-                level_data["hazards"].append({
-                    "x": x,
-                    "y": y,
-                    "size": self.grid.grid_size
-                })
-            elif cell["type"] == "bounce":
-                level_data["bounce_pads"].append({
-                    "x": x,
-                    "y": y + 3 * self.grid.grid_size // 4,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size // 4
-                })
-            elif cell["type"] == "checkpoint":
-                level_data["checkpoints"].append({
-                    "x": x,
-                    "y": y,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size
-                })
-            elif cell["type"] == "moving_platform":
-                level_data["moving_platforms"].append({
-                    "x": x,
-                    "y": y + self.grid.grid_size // 2,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size // 2,
-                    "move_distance": 120,  # Default movement distance
-                    "move_speed": 2  # Default movement speed
-                })
-            elif cell["type"] == "breakable":
-                level_data["breakable_blocks"].append({
-                    "x": x,
-                    "y": y,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size
-                })
-            elif cell["type"] == "player":
-                level_data["player_start"] = {
-                    "x": x + self.grid.grid_size // 2,
-                    "y": y + self.grid.grid_size
-                }
-
         # Check if player start position exists
-        if not level_data["player_start"]:
+        if not self.grid.player_pos:
             print("Warning: No player start position set!")
             return
 
@@ -810,22 +943,26 @@ class LevelBuilder:
         if not filename:
             return
 
-        # Add .json extension if missing
-        if not filename.endswith(".json"):
+        # Add .json extension if missing (.lvl saves the binary format)
+        if not filename.endswith((".json", BINARY_EXTENSION)):
             filename += ".json"
 
         self.current_filename = filename
 
-        # Save to file
+        # Save to file from a snapshot, so editing can go on while it is written;
+        # once it is, the journal starts over from the saved tiles
         filepath = os.path.join(self.level_dir, filename)
-        with open(filepath, 'w') as f:
-            json.dump(level_data, f)
+        snapshot = self.grid.snapshot()
+
+        def saved():
+            start_journal(self.journal_path, snapshot, filename)
+            print(f"Level saved to {filepath}")
 
-        print(f"Level saved to {filepath}")
+        self.saver.submit(write_level, snapshot, filepath, on_done=saved)
 
     def load_level(self):
-        # List available level files
-        levels = [f for f in os.listdir(self.level_dir) if f.endswith(".json")]
+        # List available level files (the registry only rescans when the folder changes)
+        levels = level_registry.names()
 
         if not levels:
             print("No level files found!")
@@ -851,7 +988,7 @@ class LevelBuilder:
         except ValueError:
             # Treat as filename
             filename = selected
-            if not filename.endswith(".json"):
+            if not filename.endswith((".json", ".lvl")):
                 filename += ".json"
 
             if filename not in levels:
@@ -860,34 +997,38 @@ class LevelBuilder:
 
         self.current_filename = filename
 
-        # Load from file
+        # Load from file (parsed levels are cached until the file changes)
         filepath = os.path.join(self.level_dir, filename)
-        with open(filepath, 'r') as f:
-            level_data = json.load(f)
+        level = level_registry.load(filepath)
 
-        # Clear grid
+        # Clear grid; the history belongs to the previous level
         self.grid.clear()
+        self.history.reset()
 
         # Convert coordinates to grid positions and place tiles
-        for platform in level_data["platforms"]:
-            grid_x = platform["x"] // self.grid.grid_size
-            grid_y = platform["y"] // self.grid.grid_size
-
-            self.grid.place_tile((grid_x, grid_y), "platform", GREEN)
-
-        for hazard in level_data["hazards"]:
-            grid_x = hazard["x"] // self.grid.grid_size
-            grid_y = hazard["y"] // self.grid.grid_size
-
-            self.grid.place_tile((grid_x, grid_y), "hazard", GRAY)
+        grid_size = self.grid.grid_size
+        self.grid.place_tiles(
+            [(x // grid_size, y // grid_size) for x, y, width, height in level.rows("platforms")],
+            "platform",
+            GREEN
+        )
+        self.grid.place_tiles(
+            [(x // grid_size, y // grid_size) for x, y, size in level.rows("hazards")],
+            "hazard",
+            GRAY
+        )
 
-        if level_data["player_start"]:
-            start = level_data["player_start"]
-            grid_x = (start["x"] - self.grid.grid_size // 2) // self.grid.grid_size
-            grid_y = (start["y"] - self.grid.grid_size) // self.grid.grid_size
+        if level.player_start:
+            start_x, start_y = level.player_start
+            grid_x = (start_x - self.grid.grid_size // 2) // self.grid.grid_size
+            grid_y = (start_y - self.grid.grid_size) // self.grid.grid_size
 
             self.grid.place_tile((grid_x, grid_y), "player", BLUE)
 
+        # Autosaves of this level build on what was just loaded
+        self.grid.take_changes()
+        self.saver.submit(start_journal, self.journal_path, self.grid.snapshot(), filename)
+
         print(f"Level loaded from {filepath}")
 
     def play_level(self):
@@ -896,92 +1037,75 @@ class LevelBuilder:
             print("Cannot play: No player start position set!")
             return
 
-        # Save level to a temporary file
-        temp_level = os.path.join(self.level_dir, "_temp_level.json")
-        level_data = {
-            "platforms": [],
-            "small_platforms": [],
-            "hazards": [],
-            "bounce_pads": [],
-            "checkpoints": [],
-            "moving_platforms": [],
-            "breakable_blocks": [],
-            "player_start": None
-        }
+        if PLAYTEST_IN_PROCESS:
+            self.playtest()
+            return
 
-        for pos, cell in self.grid.cells.items():
-            grid_x, grid_y = pos
-            x = self.grid.rect.x + grid_x * self.grid.grid_size
-            y = self.grid.rect.y + grid_y * self.grid.grid_size
-
-            if cell["type"] == "platform":
-                level_data["platforms"].append({
-                    "x": x,
-                    "y": y,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size
-                })
-            elif cell["type"] == "small_platform":
-                level_data["small_platforms"].append({
-                    "x": x,
-                    "y": y + self.grid.grid_size // 2,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size // 2
-                })
-            elif cell["type"] == "hazard":
-                level_data["hazards"].append({
-                    "x": x,
-                    "y": y,
-                    "size": self.grid.grid_size
-                })
-            elif cell["type"] == "bounce":
-                level_data["bounce_pads"].append({
-                    "x": x,
-                    "y": y + 3 * self.grid.grid_size // 4,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size // 4
-                })
-            elif cell["type"] == "checkpoint":
-                level_data["checkpoints"].append({
-                    "x": x,
-                    "y": y,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size
-                })
-            elif cell["type"] == "moving_platform":
-                level_data["moving_platforms"].append({
-                    "x": x,
-                    "y": y + self.grid.grid_size // 2,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size // 2,
-                    "move_distance": 120,  # Default movement distance
-                    "move_speed": 2,  # Default movement speed
-                    "move_axis": "horizontal"  # Default movement axis
-                })
-            elif cell["type"] == "breakable":
-                level_data["breakable_blocks"].append({
-                    "x": x,
-                    "y": y,
-                    "width": self.grid.grid_size,
-                    "height": self.grid.grid_size
-                })
-            elif cell["type"] == "player":
-                level_data["player_start"] = {
-                    "x": x + self.grid.grid_size // 2,
-                    "y": y + self.grid.grid_size
-                }
-
-        with open(temp_level, 'w') as f:
-            json.dump(level_data, f)
-
-        # Launch the game with the level
+        # Save level to a temporary file in the background; the game starts once it is written
+        temp_level = os.path.join(self.level_dir, "_temp_level.json")
         print("Launching game...")
+        self.saver.save(self.grid, temp_level, on_done=lambda: self.launch_game(temp_level))
+
+    def playtest(self):
+        """Play the grid in this window and come back to the editor as it was"""
+        global screen
+        # Imported on first use: play_level loads the game's images when imported
+        import play_level
+        from BluetoothV2.game_controller import GameController
+
+        # A playtest ends any stroke in progress
+        self.history.end()
+        self.is_dragging = False
+        self.dragging_grid = False
+        self.dragging_h_thumb = False
+        self.dragging_v_thumb = False
+
+        try:
+            if self.play_controller is None:
+                self.play_controller = GameController(debug=True)
+                self.play_controller.start()
+            # Same coordinates as save_level, handed over without a file
+            play_level.main(level=self.grid.to_level_columns(), controller=self.play_controller,
+                            quit_on_exit=False)
+        except Exception as e:
+            print(f"Error playing level: {e}")
+
+        # Back to the editor's window, without the input meant for the game
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE)
+        pygame.display.set_caption("2D Platformer Level Builder")
+        pygame.event.clear()
+
+    def launch_game(self, temp_level):
         import subprocess
         try:
             subprocess.Popen(["python", "play_level.py", temp_level])
         except Exception as e:
             print(f"Error launching game: {e}")
 
+    def autosave(self):
+        """Every AUTOSAVE_INTERVAL seconds, journal the cells changed since the last time"""
+        now = time.time()
+        if now - self.last_autosave < AUTOSAVE_INTERVAL:
+            return
+        self.last_autosave = now
+        cleared, changed = self.grid.take_changes()
+        if cleared or changed:
+            self.saver.submit(append_journal, self.journal_path, journal_entry(self.grid, changed, cleared))
+
+    def recover_autosave(self):
+        """Bring back edits an earlier session lost in a crash, or start a fresh journal"""
+        journal = read_journal(self.journal_path)
+        # The first entry is the starting point; only later ones are edits
+        if journal is not None and len(journal[1]) > 1:
+            level_name, entries = journal
+            for entry in entries:
+                apply_entry(self.grid, entry)
+            self.grid.take_changes()
+            self.current_filename = level_name or "untitled"
+            print(f"Recovered unsaved changes to {self.current_filename} from {self.journal_path}")
+        else:
+            self.saver.submit(start_journal, self.journal_path, self.grid.snapshot(), None)
+
     def get_text_input(self, prompt, default_text=""):
         # Setup text input
         input_text = default_text
@@ -1032,11 +1156,21 @@ class LevelBuilder:
         while running:
             running = self.handle_input()
 
+            self.autosave()
+
             self.draw(screen)
 
             pygame.display.flip()
             clock.tick(FPS)
 
+        if self.play_controller is not None:
+            self.play_controller.stop()
+
+        # Let pending saves finish; after a clean exit there is nothing to recover
+        self.saver.close()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
         pygame.quit()
         sys.exit()
 
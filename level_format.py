@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import mmap
+import zlib
+import math
+import struct
+from array import array
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+# Binary level file: header, then the body (optionally compressed)
+MAGIC = b"PLVL"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")  # magic, version, compression, uncompressed body size
+COUNT = struct.Struct("<I")
+SCALE = struct.Struct("<H")  # Stored values of a column are the real values divided by this
+PLAYER_START = struct.Struct("<Bii")  # present, x, y
+
+BINARY_EXTENSION = ".lvl"
+LEVEL_EXTENSIONS = (".json", BINARY_EXTENSION)
+
+# Compression codes stored in the header
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZ4 = 2
+COMPRESSION_NAMES = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lz4": COMPRESSION_LZ4}
+
+INT16_MIN = -32768
+INT16_MAX = 32767
+
+# move_axis is stored as an index into this
+MOVE_AXES = ("horizontal", "vertical")
+
+# Object kinds in file order, with their fields and the defaults for fields
+# older JSON levels may leave out
+KINDS = (
+    ("platforms", ("x", "y", "width", "height"), {}),
+    ("small_platforms", ("x", "y", "width", "height"), {}),
+    ("hazards", ("x", "y", "size"), {"size": 50}),
+    ("bounce_pads", ("x", "y", "width", "height"), {}),
+    ("checkpoints", ("x", "y", "width", "height"), {}),
+    ("moving_platforms", ("x", "y", "width", "height", "move_distance", "move_speed", "move_axis"),
+     {"move_distance": 120, "move_speed": 2, "move_axis": "horizontal"}),
+    ("breakable_blocks", ("x", "y", "width", "height"), {})
+)
+
+
+class LevelColumns:
+    """A level as one array per field of each object kind.
+
+    This is what both level formats load into, and what play_level builds
+    its sprites from: rows(kind) yields one tuple of field values per object.
+    """
+
+    def __init__(self, columns=None, player_start=None):
+        if columns is None:
+            columns = {name: [array("l") for _ in fields] for name, fields, defaults in KINDS}
+        self.columns = columns  # kind -> [array per field]
+        self.player_start = player_start  # (x, y) or None
+
+    def count(self, kind):
+        return len(self.columns[kind][0])
+
+    def rows(self, kind):
+        return zip(*self.columns[kind])
+
+    @classmethod
+    def from_json(cls, level_data):
+        """Build from the JSON level schema written by LevelBuilder.save_level"""
+        level = cls()
+        for name, fields, defaults in KINDS:
+            columns = level.columns[name]
+            for item in level_data.get(name, []):
+                for column, field in zip(columns, fields):
+                    value = item.get(field, defaults.get(field))
+                    if field == "move_axis":
+                        # Like the game always has, anything but "horizontal" moves vertically
+                        value = MOVE_AXES.index(value) if value in MOVE_AXES else MOVE_AXES.index("vertical")
+                    column.append(int(value))
+
+        start = level_data.get("player_start")
+        if start:
+            level.player_start = (int(start["x"]), int(start["y"]))
+        return level
+
+    def to_json(self):
+        """The level in the JSON level schema"""
+        level_data = {}
+        for name, fields, defaults in KINDS:
+            columns = list(self.columns[name])
+            if "move_axis" in fields:
+                index = fields.index("move_axis")
+                columns[index] = [MOVE_AXES[value] for value in columns[index]]
+            level_data[name] = [dict(zip(fields, row)) for row in zip(*columns)]
+
+        if self.player_start:
+            level_data["player_start"] = {"x": self.player_start[0], "y": self.player_start[1]}
+        else:
+            level_data["player_start"] = None
+        return level_data
+
+
+def pack_column(values, kind, field):
+    """Scale and int16 bytes for a column.
+
+    Tile positions are multiples of the grid (or half/quarter grid) size, so
+    dividing by the column's common divisor lets large levels fit in int16.
+    """
+    scale = 0
+    for value in values:
+        scale = math.gcd(scale, value)
+    scale = min(scale, 65535) or 1
+    if scale > 1 and any(value % scale for value in values):
+        scale = 1
+
+    column = array("h")
+    for value in values:
+        stored = value // scale
+        if not INT16_MIN <= stored <= INT16_MAX:
+            raise ValueError(f"{kind} {field} {value} does not fit in a binary level")
+        column.append(stored)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return scale, column.tobytes()
+
+
+def encode(level, compression=COMPRESSION_ZLIB):
+    """Binary level file contents for a LevelColumns"""
+    parts = []
+    if level.player_start:
+        parts.append(PLAYER_START.pack(1, *level.player_start))
+    else:
+        parts.append(PLAYER_START.pack(0, 0, 0))
+
+    for name, fields, defaults in KINDS:
+        parts.append(COUNT.pack(level.count(name)))
+        for field, column in zip(fields, level.columns[name]):
+            scale, data = pack_column(column, name, field)
+            parts.append(SCALE.pack(scale))
+            parts.append(data)
+    body = b"".join(parts)
+
+    if compression == COMPRESSION_ZLIB:
+        packed = zlib.compress(body, 9)
+    elif compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError("LZ4 compression needs the lz4 package (pip install lz4)")
+        packed = lz4_frame.compress(body)
+    elif compression == COMPRESSION_NONE:
+        packed = body
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    return HEADER.pack(MAGIC, VERSION, compression, len(body)) + packed
+
+
+def decode(buffer):
+    """LevelColumns from binary level file contents (bytes, memoryview or mmap)"""
+    if len(buffer) < HEADER.size:
+        raise ValueError("Not a binary level file: too short")
+    magic, version, compression, body_size = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a binary level file")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary level version: {version}")
+
+    packed = memoryview(buffer)[HEADER.size:]
+    if compression == COMPRESSION_ZLIB:
+        body = memoryview(zlib.decompress(packed))
+    elif compression == COMPRESSION_LZ4:
+        if lz4_frame is None:
+            raise ValueError("This level is LZ4 compressed and needs the lz4 package (pip install lz4)")
+        body = memoryview(lz4_frame.decompress(packed))
+    elif compression == COMPRESSION_NONE:
+        body = packed
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    if len(body) != body_size:
+        raise ValueError("Binary level file is truncated")
+
+    present, start_x, start_y = PLAYER_START.unpack_from(body, 0)
+    offset = PLAYER_START.size
+
+    columns = {}
+    for name, fields, defaults in KINDS:
+        (count,) = COUNT.unpack_from(body, offset)
+        offset += COUNT.size
+        kind_columns = []
+        for field in fields:
+            (scale,) = SCALE.unpack_from(body, offset)
+            offset += SCALE.size
+            column = array("h")
+            column.frombytes(body[offset:offset + count * 2])
+            if sys.byteorder != "little":
+                column.byteswap()
+            if scale != 1:
+                column = array("l", [value * scale for value in column])
+            kind_columns.append(column)
+            offset += count * 2
+        columns[name] = kind_columns
+
+    # Release the views so a memory map can be closed
+    packed.release()
+    return LevelColumns(columns, (start_x, start_y) if present else None)
+
+
+def load_binary(filepath):
+    """Memory-map a binary level file and decode it"""
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return decode(mapped)
+
+
+def save_binary(level, filepath, compression=COMPRESSION_ZLIB):
+    """Write a LevelColumns (or JSON level data) as a binary level file"""
+    if not isinstance(level, LevelColumns):
+        level = LevelColumns.from_json(level)
+    with open(filepath, "wb") as f:
+        f.write(encode(level, compression))
+
+
+def is_binary_level(filepath):
+    with open(filepath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_level(filepath):
+    """Load a level file of either format as LevelColumns"""
+    if is_binary_level(filepath):
+        return load_binary(filepath)
+    with open(filepath, "r") as f:
+        return LevelColumns.from_json(json.load(f))
+
+
+def convert(source, destination, compression=COMPRESSION_ZLIB):
+    """Convert a level file to the format given by destination's extension"""
+    level = read_level(source)
+    if destination.endswith(BINARY_EXTENSION):
+        save_binary(level, destination, compression)
+    else:
+        with open(destination, "w") as f:
+            json.dump(level.to_json(), f)
+
+
+if __name__ == "__main__":
+    # python level_format.py <source> <destination> [none|zlib|lz4]
+    if len(sys.argv) not in (3, 4):
+        print(f"Usage: python level_format.py <source> <destination{BINARY_EXTENSION}|.json> [none|zlib|lz4]")
+        sys.exit(1)
+    compression_name = sys.argv[3] if len(sys.argv) == 4 else "zlib"
+    if compression_name not in COMPRESSION_NAMES:
+        print(f"Unknown compression '{compression_name}', use none, zlib or lz4")
+        sys.exit(1)
+    convert(sys.argv[1], sys.argv[2], COMPRESSION_NAMES[compression_name])
+    print(f"Converted {sys.argv[1]} ({os.path.getsize(sys.argv[1])} bytes) "
+          f"to {sys.argv[2]} ({os.path.getsize(sys.argv[2])} bytes)")
@@ -0,0 +1,194 @@
+import os
+import threading
+from collections import OrderedDict
+
+from level_format import read_level, LEVEL_EXTENSIONS
+
+LEVEL_DIR = "levels"
+CACHE_BUDGET = 64 * 1024 * 1024  # Bytes of parsed level data kept in memory
+
+
+class LevelEntry:
+    """A level file in the index, with the metadata used to spot changes"""
+
+    def __init__(self, name, path, mtime, size):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.size = size
+
+    def __repr__(self):
+        return f"LevelEntry({self.name!r}, mtime={self.mtime}, size={self.size})"
+
+
+def level_bytes(level):
+    """Approximate memory held by a parsed level"""
+    held = 0
+    for columns in level.columns.values():
+        for column in columns:
+            held += column.itemsize * len(column)
+    return held
+
+
+class LevelRegistry:
+    """Index of the level directory plus an LRU cache of parsed levels.
+
+    The directory is only rescanned when its mtime changes, and a cached
+    level is only re-parsed when its file's mtime or size changes. Levels
+    can be parsed ahead of time on a background thread with preload().
+    """
+
+    def __init__(self, level_dir=LEVEL_DIR, budget=CACHE_BUDGET):
+        self.level_dir = level_dir
+        self.budget = budget
+        self.entries = {}  # name -> LevelEntry
+        self.dir_mtime = None
+        self.cache = OrderedDict()  # path -> (mtime, size, LevelColumns, bytes)
+        self.cached_bytes = 0
+        self.loading = {}  # path -> Event set when a background load finishes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def scan(self, force=False):
+        """Refresh the index if the directory changed"""
+        try:
+            dir_mtime = os.stat(self.level_dir).st_mtime_ns
+        except OSError:
+            self.entries = {}
+            self.dir_mtime = None
+            return self.entries
+        if not force and dir_mtime == self.dir_mtime:
+            return self.entries
+
+        entries = {}
+        with os.scandir(self.level_dir) as it:
+            for dir_entry in it:
+                if dir_entry.is_file() and dir_entry.name.endswith(LEVEL_EXTENSIONS):
+                    stat = dir_entry.stat()
+                    entries[dir_entry.name] = LevelEntry(dir_entry.name, dir_entry.path,
+                                                         stat.st_mtime_ns, stat.st_size)
+        self.entries = entries
+        self.dir_mtime = dir_mtime
+        return entries
+
+    def names(self, include_hidden=True):
+        """Sorted level file names; hidden ones (like _temp_level.json) start with _"""
+        names = sorted(self.scan())
+        if not include_hidden:
+            names = [name for name in names if not name.startswith("_")]
+        return names
+
+    def path(self, name):
+        return os.path.join(self.level_dir, name)
+
+    def next_level(self, current):
+        """Name of the level after current (a name or path) in play order, or None.
+
+        Play order is the registry's index order: level file names sorted,
+        leaving out hidden ones.
+        """
+        names = self.names(include_hidden=False)
+        current = os.path.basename(current)
+        if current not in names:
+            return names[0] if names else None
+        index = names.index(current) + 1
+        return names[index] if index < len(names) else None
+
+    def _key(self, name_or_path):
+        if os.path.dirname(name_or_path) == "" and not os.path.exists(name_or_path):
+            name_or_path = self.path(name_or_path)
+        return os.path.abspath(name_or_path)
+
+    def _cached(self, path, stat):
+        """Cached level for path if it is still current (caller holds the lock)"""
+        cached = self.cache.get(path)
+        if cached is None:
+            return None
+        mtime, size, level, held = cached
+        if mtime != stat.st_mtime_ns or size != stat.st_size:
+            del self.cache[path]
+            self.cached_bytes -= held
+            return None
+        self.cache.move_to_end(path)
+        return level
+
+    def _store(self, path, stat, level):
+        held = level_bytes(level)
+        with self.lock:
+            old = self.cache.pop(path, None)
+            if old is not None:
+                self.cached_bytes -= old[3]
+            self.cache[path] = (stat.st_mtime_ns, stat.st_size, level, held)
+            self.cached_bytes += held
+            # Drop the least recently used levels, but always keep the newest
+            while self.cached_bytes > self.budget and len(self.cache) > 1:
+                _, (_, _, _, dropped) = self.cache.popitem(last=False)
+                self.cached_bytes -= dropped
+
+    def load(self, name_or_path):
+        """Parsed level (LevelColumns) for a level name or path, from the cache if current"""
+        path = self._key(name_or_path)
+
+        # If a background load of this level is running, wait for it instead of parsing twice
+        with self.lock:
+            pending = self.loading.get(path)
+        if pending is not None:
+            pending.wait()
+
+        stat = os.stat(path)
+        with self.lock:
+            level = self._cached(path, stat)
+            if level is not None:
+                self.hits += 1
+                return level
+            self.misses += 1
+
+        level = read_level(path)
+        self._store(path, stat, level)
+        return level
+
+    def preload(self, name_or_path):
+        """Parse a level on a background thread so a later load() is instant"""
+        if name_or_path is None:
+            return
+        path = self._key(name_or_path)
+        with self.lock:
+            if path in self.loading or path in self.cache:
+                return
+            done = threading.Event()
+            self.loading[path] = done
+
+        def run():
+            try:
+                stat = os.stat(path)
+                self._store(path, stat, read_level(path))
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not preload {path}: {e}")
+            finally:
+                with self.lock:
+                    del self.loading[path]
+                done.set()
+
+        threading.Thread(target=run, name=f"preload {os.path.basename(path)}", daemon=True).start()
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+            self.cached_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached": len(self.cache),
+            "bytes": self.cached_bytes
+        }
+
+
+# Registry shared by the menu, the builder and the platformer
+levels = LevelRegistry()
@@ -0,0 +1,166 @@
+import os
+import json
+import queue
+import threading
+
+from level_format import BINARY_EXTENSION, encode
+
+JOURNAL_VERSION = 1
+
+
+def write_atomic(path, data):
+    """Write data (str or bytes) to path without ever leaving a half written file behind"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def write_level(grid, filepath, origin_x=0, origin_y=0):
+    """Write a grid (normally a snapshot) as a JSON or, for .lvl, binary level file"""
+    if filepath.endswith(BINARY_EXTENSION):
+        data = encode(grid.to_level_columns(origin_x, origin_y))
+    else:
+        data = json.dumps(grid.to_level_data(origin_x, origin_y))
+    write_atomic(filepath, data)
+
+
+class LevelSaver:
+    """Runs level and journal writes on a background thread, one at a time in the order asked.
+
+    The editor hands over a grid snapshot and carries on; on_done is
+    called on the saver thread once a write has succeeded.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.last_error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                func, args, on_done = job
+                func(*args)
+                if on_done is not None:
+                    on_done()
+            except (OSError, ValueError, TypeError) as e:
+                self.last_error = e
+                print(f"Error saving level: {e}")
+            finally:
+                self.jobs.task_done()
+
+    def submit(self, func, *args, on_done=None):
+        self.jobs.put((func, args, on_done))
+
+    def save(self, grid, filepath, origin_x=0, origin_y=0, on_done=None):
+        """Write the grid's current tiles to filepath in the background"""
+        self.submit(write_level, grid.snapshot(), filepath, origin_x, origin_y, on_done=on_done)
+
+    def busy(self):
+        return self.jobs.unfinished_tasks > 0
+
+    def wait(self):
+        """Block until every write asked for so far is done"""
+        self.jobs.join()
+
+    def close(self):
+        self.jobs.put(None)
+        self.thread.join()
+
+
+# The autosave journal: a header line, a full entry holding the tiles as
+# they were when it was started, then one entry per autosave with just the
+# cells changed since the one before. Entries store where cells ended up,
+# not how they changed, so replaying one twice does no harm.
+
+def journal_entry(grid, positions, cleared=False):
+    """A journal entry with the current state of the given cells"""
+    tiles = {}  # (tile type, color) -> flat [x, y, x, y, ...]
+    empty = []
+    for pos in positions:
+        if pos == grid.player_pos:
+            continue
+        tile = grid.cells.get(pos)
+        if tile is None:
+            empty.extend(pos)
+        else:
+            tiles.setdefault(tile, []).extend(pos)
+    return {
+        "clear": cleared,
+        "tiles": [[tile_type, list(color), flat] for (tile_type, color), flat in tiles.items()],
+        "empty": empty,
+        "player": [grid.player_pos[0], grid.player_pos[1], list(grid.player_color)]
+        if grid.player_pos is not None else None
+    }
+
+
+def full_entry(grid):
+    """A journal entry that rebuilds the whole grid"""
+    tiles = []
+    for tile_type, color, positions in grid.cells.groups():
+        tiles.append([tile_type, list(color), [value for pos in positions for value in pos]])
+    entry = journal_entry(grid, ())
+    entry["clear"] = True
+    entry["tiles"] = tiles
+    return entry
+
+
+def start_journal(path, grid, level_name=None):
+    """Replace the journal with one based on the grid (normally a snapshot)"""
+    header = {"version": JOURNAL_VERSION, "level": level_name}
+    write_atomic(path, json.dumps(header) + "\n" + json.dumps(full_entry(grid)) + "\n")
+
+
+def append_journal(path, entry):
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_journal(path):
+    """(level name, entries) from a journal, or None if there is no usable one.
+
+    An entry cut short by a crash, and anything after it, is ignored.
+    """
+    try:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    try:
+        header = json.loads(lines[0])
+    except (IndexError, ValueError):
+        return None
+    if header.get("version") != JOURNAL_VERSION:
+        return None
+
+    entries = []
+    for line in lines[1:]:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+    return header.get("level"), entries
+
+
+def apply_entry(grid, entry):
+    """Bring a grid up to date with a journal entry"""
+    if entry["clear"]:
+        grid.clear()
+    flat = entry["empty"]
+    grid.remove_tiles(list(zip(flat[0::2], flat[1::2])))
+    for tile_type, color, flat in entry["tiles"]:
+        grid.place_tiles(list(zip(flat[0::2], flat[1::2])), tile_type, tuple(color))
+    player = entry["player"]
+    if player is not None:
+        grid.place_tile((player[0], player[1]), "player", tuple(player[2]))
+    elif grid.player_pos is not None:
+        grid.remove_tile(grid.player_pos)
@@ -1,10 +1,20 @@
 import pygame
 import sys
-import json
 import os
 import time
+import math
+import zlib
+import argparse
 from first_person import run_game
 from BluetoothV2.game_controller import GameController
+from spatial_hash import SpatialGroup, nearby
+from static_layer import StaticLayer
+from camera import Camera, world_bounds
+from level_format import MOVE_AXES
+from level_registry import levels
+from asset_cache import assets, CONVERT_ALPHA, FLIP_X, ATLAS_IMAGE, ATLAS_INDEX
+from replay import (Replay, encode_input, decode_controller, INPUT_LEFT, INPUT_RIGHT,
+                    INPUT_JUMP, INPUT_RESET, ONE_SHOT_INPUTS)
 
 # Initialize pygame
 pygame.init()
@@ -13,12 +23,68 @@ pygame.init()
 SCREEN_WIDTH = 1920
 SCREEN_HEIGHT = 1080
 FPS = 60
-GRAVITY = 1
-JUMP_STRENGTH = -20
-PLAYER_SPEED = 7
-COYOTE_TIME = 6
-BOUNCE_STRENGTH = -25
-CHECKPOINT_COOLDOWN = 30  # Frames between checkpoint activations
+# Physics runs at a fixed rate, independent of how fast frames are drawn.
+# Speeds and forces are tuned in pixels per tick at TUNED_HZ, as are moving
+# platform speeds in level files; set_physics_rate() scales them to the
+# rate in use, so the game plays at the same speed at any rate. Durations
+# are given in seconds and converted to ticks. Below TUNED_HZ everything
+# moves further each tick, so a fast fall may pass through thin platforms.
+TUNED_HZ = 60
+PHYSICS_HZ = TUNED_HZ  # Rate in use, see set_physics_rate()
+RENDER_FPS = FPS  # Frame rate cap for drawing, 0 for uncapped
+VSYNC = False  # Sync drawing to the display refresh instead
+MAX_FRAME_TIME = 0.25  # Longest frame the simulation will catch up on (seconds)
+
+TUNED_GRAVITY = 1  # Pixels per tick, added every tick
+TUNED_JUMP_STRENGTH = -20
+TUNED_PLAYER_SPEED = 7
+TUNED_BOUNCE_STRENGTH = -25
+TUNED_BACKGROUND_SCROLL_SPEED = 2
+TUNED_ANIMATION_SPEED = 0.15  # Player animation frames per tick
+COYOTE_SECONDS = 0.1
+CHECKPOINT_COOLDOWN_SECONDS = 0.5  # Between checkpoint activations
+BOUNCE_ACTIVE_SECONDS = 1 / 6  # A bounce pad shows its active image this long
+BLOCK_BREAK_SECONDS = 1.5  # Between stepping on a block and it breaking
+
+def seconds_to_ticks(seconds):
+    return max(1, round(seconds * PHYSICS_HZ))
+
+def per_tick(value, power=1):
+    """A per-tick amount tuned at TUNED_HZ, at PHYSICS_HZ (power 2 for accelerations)"""
+    scaled = value * (TUNED_HZ / PHYSICS_HZ) ** power
+    # Whole amounts stay ints, so the tuned rate plays exactly as it always has
+    return int(scaled) if scaled == int(scaled) else scaled
+
+def set_physics_rate(hz):
+    """Run physics at hz ticks per second; levels loaded afterwards use the new rate"""
+    global PHYSICS_HZ, GRAVITY, JUMP_STRENGTH, PLAYER_SPEED, BOUNCE_STRENGTH, BACKGROUND_SCROLL_SPEED
+    global ANIMATION_SPEED, COYOTE_TIME, CHECKPOINT_COOLDOWN, BOUNCE_ACTIVE_TIME, BLOCK_BREAK_TIME
+    PHYSICS_HZ = hz
+    GRAVITY = per_tick(TUNED_GRAVITY, 2)
+    JUMP_STRENGTH = per_tick(TUNED_JUMP_STRENGTH)
+    PLAYER_SPEED = per_tick(TUNED_PLAYER_SPEED)
+    BOUNCE_STRENGTH = per_tick(TUNED_BOUNCE_STRENGTH)
+    BACKGROUND_SCROLL_SPEED = per_tick(TUNED_BACKGROUND_SCROLL_SPEED)
+    ANIMATION_SPEED = per_tick(TUNED_ANIMATION_SPEED)
+    COYOTE_TIME = seconds_to_ticks(COYOTE_SECONDS)
+    CHECKPOINT_COOLDOWN = seconds_to_ticks(CHECKPOINT_COOLDOWN_SECONDS)
+    BOUNCE_ACTIVE_TIME = seconds_to_ticks(BOUNCE_ACTIVE_SECONDS)
+    BLOCK_BREAK_TIME = seconds_to_ticks(BLOCK_BREAK_SECONDS)
+
+set_physics_rate(PHYSICS_HZ)
+
+def split_pixels(amount):
+    """(whole pixels, fraction left over) of a distance, both with its sign"""
+    whole = int(amount)
+    return whole, amount - whole
+
+BACKGROUND_IMAGE = "sprites/background_wild_west.png"
+MERGE_STATIC_TILES = True  # Collide against merged tile runs instead of single tiles
+USE_STATIC_LAYER = True  # Draw unchanging tiles from a pre-baked layer
+ACTIVE_MARGIN = 400  # Moving platforms whose path comes this close to the view update every tick
+OFFSCREEN_UPDATE_TICKS = 10  # Ticks between catch-up updates of the other moving platforms
+DRAW_MARGIN = 64  # Sprites this close to the view are drawn, so interpolated ones don't pop in
+CACHE_STATS = False  # Print asset cache statistics when a level starts
 
 # Colors
 WHITE = (255, 255, 255)
@@ -40,11 +106,16 @@ screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("2D Platformer - Custom Level")
 clock = pygame.time.Clock()
 
+# Use the packed sprite atlas if one has been built
+if os.path.exists(ATLAS_INDEX):
+    assets.load_atlas(ATLAS_IMAGE, ATLAS_INDEX)
+
 class Player(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        # Load wizard sprites
+        # Load wizard sprites (and their mirrored versions for facing left)
         self.sprites = []
+        self.flipped_sprites = []
         # Increased player size from 30x50 to 60x100
 
         PLAYER_WIDTH = 100
@@ -52,17 +123,17 @@ class Player(pygame.sprite.Sprite):
 
         
         for i in range(1, 9):  # wizard1.png to wizard8.png
+            path = f"sprites/wizards{i}.png"
             try:
-                sprite = pygame.image.load(f"sprites/wizards{i}.png").convert_alpha()
-                # Scale to new larger size
-                sprite = pygame.transform.scale(sprite, (PLAYER_WIDTH, PLAYER_HEIGHT))
-                self.sprites.append(sprite)
+                # Scaled to new larger size, shared through the asset cache
+                self.sprites.append(assets.get(path, (PLAYER_WIDTH, PLAYER_HEIGHT)))
+                self.flipped_sprites.append(assets.get(path, (PLAYER_WIDTH, PLAYER_HEIGHT), CONVERT_ALPHA | FLIP_X))
             except:
                 # Fallback if sprites not found
                 print(f"Warning: Could not load wizards{i}.png, using fallback")
-                surf = pygame.Surface((PLAYER_WIDTH, PLAYER_HEIGHT), pygame.SRCALPHA)
-                pygame.draw.rect(surf, BLUE, (0, 0, PLAYER_WIDTH, PLAYER_HEIGHT))
+                surf = assets.derive(("player_fallback", PLAYER_WIDTH, PLAYER_HEIGHT), lambda: self._fallback_surface(PLAYER_WIDTH, PLAYER_HEIGHT))
                 self.sprites.append(surf)
+                self.flipped_sprites.append(surf)
         
         self.current_sprite = 0
         self.image = self.sprites[self.current_sprite]
@@ -72,19 +143,34 @@ class Player(pygame.sprite.Sprite):
         self.rect.center = self.start_pos
         self.velocity_y = 0
         self.velocity_x = 0
+        # Fractions of a pixel not moved yet; speeds are only fractional away from TUNED_HZ
+        self.remainder_x = 0
+        self.remainder_y = 0
         self.on_ground = False
         self.coyote_timer = 0
         self.can_jump = False
         self.checkpoint_cooldown = 0
         self.animation_timer = 0
-        self.animation_speed = 0.15  # Adjust for animation speed
+        self.animation_speed = ANIMATION_SPEED
         self.facing_right = True
         self.is_moving = False
+        self.previous_pos = self.rect.topleft
+        self.bounds = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)  # World the player is kept inside
+
+    @staticmethod
+    def _fallback_surface(width, height):
+        surf = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.rect(surf, BLUE, (0, 0, width, height))
+        return surf
 
     def reset_position(self):
         self.rect.midbottom = (self.reset_pos[0], self.reset_pos[1])
         self.velocity_y = 0
         self.velocity_x = 0
+        self.remainder_x = 0
+        self.remainder_y = 0
+        # Teleport, don't interpolate from the old position
+        self.previous_pos = self.rect.topleft
 
     def update(self, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks):
         old_rect = self.rect.copy()
@@ -93,7 +179,7 @@ class Player(pygame.sprite.Sprite):
         self.update_animation()
         
         # First check for hazards
-        for hazard in hazards:
+        for hazard in nearby(hazards, self.rect):
             if self.rect.colliderect(hazard.rect):
                 self.reset_position()
                 return
@@ -103,14 +189,16 @@ class Player(pygame.sprite.Sprite):
             self.checkpoint_cooldown -= 1
                 
         # Handle horizontal movement
-        self.rect.x += self.velocity_x
+        step, self.remainder_x = split_pixels(self.remainder_x + self.velocity_x)
+        self.rect.x += step
         self._handle_horizontal_collisions(platforms)
         self._handle_horizontal_collisions(moving_platforms)
         self._handle_horizontal_collisions(breakable_blocks)
                 
         # Handle vertical movement (gravity)
         self.velocity_y += GRAVITY
-        self.rect.y += self.velocity_y
+        step, self.remainder_y = split_pixels(self.remainder_y + self.velocity_y)
+        self.rect.y += step
         
         was_on_ground = self.on_ground
         self.on_ground = False
@@ -126,7 +214,7 @@ class Player(pygame.sprite.Sprite):
             pass  # Already handled in the function
         
         # Check bounce pads
-        for bounce in bounce_pads:
+        for bounce in nearby(bounce_pads, self.rect):
             if self.rect.colliderect(bounce.rect) and self.velocity_y > 0:
                 if old_rect.bottom <= bounce.rect.top + 10:
                     self.rect.bottom = bounce.rect.top
@@ -136,19 +224,19 @@ class Player(pygame.sprite.Sprite):
                     self.on_ground = False
 
         # Check checkpoints
-        for checkpoint in checkpoints:
+        for checkpoint in nearby(checkpoints, self.rect):
             if self.rect.colliderect(checkpoint.rect) and self.checkpoint_cooldown == 0:
-                self.reset_pos = (checkpoint.rect.centerx, checkpoint.rect.top)
+                self.reset_pos = checkpoint.respawn_pos
                 self.checkpoint_cooldown = CHECKPOINT_COOLDOWN
                 checkpoint.activate()
         
-        # Screen boundaries
-        if self.rect.left < 190:
-            self.rect.left = 190
-        if self.rect.right > SCREEN_WIDTH - 190:
-            self.rect.right = SCREEN_WIDTH - 190
-        if self.rect.top < 100:
-            self.rect.top = 100
+        # World boundaries
+        if self.rect.left < self.bounds.left + 190:
+            self.rect.left = self.bounds.left + 190
+        if self.rect.right > self.bounds.right - 190:
+            self.rect.right = self.bounds.right - 190
+        if self.rect.top < self.bounds.top + 100:
+            self.rect.top = self.bounds.top + 100
             self.velocity_y = 0
 
         # Update jump ability
@@ -165,7 +253,8 @@ class Player(pygame.sprite.Sprite):
                 self.can_jump = False
     
     def _handle_horizontal_collisions(self, platforms):
-        for platform in platforms:
+        # Only the grid cells around the player are checked
+        for platform in nearby(platforms, self.rect):
             if self.rect.colliderect(platform.rect):
                 if self.velocity_x > 0:
                     self.rect.right = platform.rect.left
@@ -174,7 +263,7 @@ class Player(pygame.sprite.Sprite):
     
     def _handle_vertical_collisions(self, platforms, old_rect, break_blocks=False):
         collision_occurred = False
-        for platform in list(platforms):  # Use list to allow removal during iteration
+        for platform in nearby(platforms, self.rect):
             if self.rect.colliderect(platform.rect):
                 if self.velocity_y > 0:
                     if old_rect.bottom <= platform.rect.top + 10:
@@ -227,9 +316,13 @@ class Player(pygame.sprite.Sprite):
         self.velocity_x = 0
         self.is_moving = False
         self.current_sprite = 0  # Reset to first frame when not moving
-        self.image = self.sprites[self.current_sprite]
-        if not self.facing_right:
-            self.image = pygame.transform.flip(self.image, True, False)
+        self._update_image()
+
+    def _update_image(self):
+        if self.facing_right:
+            self.image = self.sprites[self.current_sprite]
+        else:
+            self.image = self.flipped_sprites[self.current_sprite]
 
     def update_animation(self):
         if self.is_moving:
@@ -237,9 +330,7 @@ class Player(pygame.sprite.Sprite):
             if self.animation_timer >= 1:
                 self.animation_timer = 0
                 self.current_sprite = (self.current_sprite + 1) % len(self.sprites)
-                self.image = self.sprites[self.current_sprite]
-                if not self.facing_right:
-                    self.image = pygame.transform.flip(self.image, True, False)
+                self._update_image()
 
 
 class Hazard(pygame.sprite.Sprite):
@@ -247,8 +338,7 @@ class Hazard(pygame.sprite.Sprite):
         super().__init__()
         # Increased hazard size by 50%
         size = int(size)
-        self.image = pygame.image.load("sprites/spikes.png").convert_alpha()
-        self.image = pygame.transform.scale(self.image, (size * 2, size * 1.5))
+        self.image = assets.get("sprites/spikes.png", (size * 2, size * 1.5))
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -258,13 +348,11 @@ class Platform(pygame.sprite.Sprite):
         super().__init__()
         try:
             # Try to load the platform texture
-            self.image = pygame.image.load("sprites/platform_wild_west.png").convert_alpha()
-            self.image = pygame.transform.scale(self.image, (width, height))
-        except pygame.error:
+            self.image = assets.get("sprites/platform_wild_west.png", (width, height))
+        except (pygame.error, FileNotFoundError):
             # Fallback if texture not found
             print("Warning: Could not load platform texture, using fallback")
-            self.image = pygame.Surface((width, height))
-            self.image.fill(GREEN)
+            self.image = assets.solid((width, height), GREEN)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -272,20 +360,74 @@ class Platform(pygame.sprite.Sprite):
 class SmallPlatform(Platform):
     def __init__(self, x, y, width, height):
         super().__init__(x, y, width, height)
-        self.image.fill(DARK_GREEN)
+        # Cached images are shared, so use a solid tile instead of filling ours
+        self.image = assets.solid((width, height), DARK_GREEN)
+
+class CollisionBlock(pygame.sprite.Sprite):
+    """Invisible solid rectangle covering several merged tiles"""
+    def __init__(self, rect):
+        super().__init__()
+        self.rect = pygame.Rect(rect)
+
+def merge_tile_rects(rects):
+    """Greedily merge touching tiles into larger rectangles.
+
+    Tiles are first joined into horizontal runs along each row, then runs
+    with the same x and width are stacked into vertical blocks. The merged
+    rectangles cover exactly the same area as the input tiles.
+    """
+    # Horizontal pass: join tiles sharing a row that touch end to end
+    rows = {}
+    for rect in rects:
+        rows.setdefault((rect.y, rect.height), []).append(pygame.Rect(rect))
+
+    runs = []
+    for row in rows.values():
+        row.sort(key=lambda r: r.x)
+        current = row[0]
+        for rect in row[1:]:
+            if rect.x <= current.right:
+                current.width = max(current.right, rect.right) - current.x
+            else:
+                runs.append(current)
+                current = rect
+        runs.append(current)
+
+    # Vertical pass: stack identical runs lying directly on top of each other
+    columns = {}
+    for run in runs:
+        columns.setdefault((run.x, run.width), []).append(run)
+
+    merged = []
+    for column in columns.values():
+        column.sort(key=lambda r: r.y)
+        current = column[0]
+        for run in column[1:]:
+            if run.y == current.bottom:
+                current.height += run.height
+            else:
+                merged.append(current)
+                current = run
+        merged.append(current)
+
+    merged.sort(key=lambda r: (r.y, r.x))
+    return merged
+
+def clear_spawn(pos, player_rect, tile_rects):
+    """Midbottom position at or above pos where a player rect overlaps none of tile_rects"""
+    rect = player_rect.copy()
+    rect.midbottom = pos
+    hits = rect.collidelistall(tile_rects)
+    while hits:
+        rect.bottom = min(tile_rects[i].top for i in hits)
+        hits = rect.collidelistall(tile_rects)
+    return rect.midbottom
 
 class BouncePad(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height):
         super().__init__()
-        self.base_image = pygame.Surface((width, height))
-        self.base_image.fill(ORANGE)
-        self.active_image = pygame.Surface((width, height))
-        self.active_image.fill(LIGHT_YELLOW)
-        
-        # Add visual indicator (arrow)
-        arrow_points = [(width//2, 0), (width//4, height//2), (3*width//4, height//2)]
-        pygame.draw.polygon(self.base_image, WHITE, arrow_points)
-        pygame.draw.polygon(self.active_image, WHITE, arrow_points)
+        self.base_image = assets.derive(("bounce_pad", width, height, ORANGE), lambda: self._pad_surface(width, height, ORANGE))
+        self.active_image = assets.derive(("bounce_pad", width, height, LIGHT_YELLOW), lambda: self._pad_surface(width, height, LIGHT_YELLOW))
         
         self.image = self.base_image
         self.rect = self.image.get_rect()
@@ -293,9 +435,18 @@ class BouncePad(pygame.sprite.Sprite):
         self.rect.y = y
         self.active_timer = 0
     
+    @staticmethod
+    def _pad_surface(width, height, color):
+        surface = pygame.Surface((width, height))
+        surface.fill(color)
+        # Add visual indicator (arrow)
+        arrow_points = [(width//2, 0), (width//4, height//2), (3*width//4, height//2)]
+        pygame.draw.polygon(surface, WHITE, arrow_points)
+        return surface
+    
     def activate(self):
         self.image = self.active_image
-        self.active_timer = 10  # Show active state for 10 frames
+        self.active_timer = BOUNCE_ACTIVE_TIME
     
     def update(self):
         if self.active_timer > 0:
@@ -312,16 +463,13 @@ class Checkpoint(pygame.sprite.Sprite):
         
         # Load the images
         try:
-            self.inactive_image = pygame.image.load("images/dino4.png").convert_alpha()
-            self.active_image = pygame.image.load("images/dino4.png").convert_alpha()
-            
             # Scale images to the desired size if needed
-            self.inactive_image = pygame.transform.scale(self.inactive_image, (width *4 , height*4))
-            self.active_image = pygame.transform.scale(self.active_image, (width*4, height*4))
+            self.inactive_image = assets.get("images/dino4.png", (width * 4, height * 4))
             
             # You could modify the active image to look different if desired
             # For example, make it brighter when active
-            self.active_image.fill((50, 50, 0, 0), special_flags=pygame.BLEND_ADD)
+            self.active_image = assets.derive(("images/dino4.png", (width * 4, height * 4), "active"),
+                                              lambda: self._brighten(self.inactive_image))
             
         except:
             # Fallback to the original flag drawing if image loading fails
@@ -340,22 +488,34 @@ class Checkpoint(pygame.sprite.Sprite):
         self.rect.y = y
         self.is_active = False
         self.has_triggered = False
+        self.battle_pending = False
+        self.respawn_pos = (self.rect.centerx, self.rect.top)  # Player's midbottom after respawning here
+    
+    @staticmethod
+    def _brighten(image):
+        image = image.copy()
+        image.fill((50, 50, 0, 0), special_flags=pygame.BLEND_ADD)
+        return image
     
     def activate(self):
         if not self.is_active and not self.has_triggered:
             self.is_active = True
             self.has_triggered = True
             self.image = self.active_image
-            # Call the first-person game function with the existing Bluetooth controller
-            from first_person import run_game_with_controller
-            # Pass the existing Bluetooth controller to the first-person game
-            run_game_with_controller(bt_controller)
+            # The battle blocks, so it is started by the game loop between physics ticks
+            self.battle_pending = True
+
+    def run_battle(self):
+        self.battle_pending = False
+        # Call the first-person game function with the existing Bluetooth controller
+        from first_person import run_game_with_controller
+        # Pass the existing Bluetooth controller to the first-person game
+        run_game_with_controller(bt_controller)
 
 class MovingPlatform(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height, move_distance=120, move_speed=2):
         super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(PURPLE)
+        self.image = assets.solid((width, height), PURPLE)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -363,48 +523,97 @@ class MovingPlatform(pygame.sprite.Sprite):
         self.start_x = x
         self.start_y = y
         self.move_distance = move_distance
-        self.move_speed = move_speed
+        self.move_speed = per_tick(move_speed)  # Level files give pixels per tick at TUNED_HZ
         self.direction = 1  # 1 for right/down, -1 for left/up
         self.move_axis = "horizontal"  # or "vertical"
-        self.distance_moved = 0
+        # Movement is counted in ticks, so update() and advance() land on the
+        # same pixel whatever the speed: a leg ends on the tick the distance
+        # moved reaches move_distance, and position is ticks from the start
+        step = abs(self.move_speed)
+        if step:
+            self.leg_ticks = max(1, math.ceil(move_distance / step))
+        else:
+            # Standing still: a zero-length path turns every tick, any other never does
+            self.leg_ticks = 1 if move_distance <= 0 else None
+        self.leg_tick = 0  # Ticks into the current leg
+        self.position_ticks = 0
+        self.previous_pos = self.rect.topleft
+        self.lag = 0  # Ticks not yet applied while off screen
     
     def update(self):
+        self.advance(1)
+
+    def _refresh_groups(self):
+        # Keep the collision grid in step with the new position
+        for group in self.groups():
+            if isinstance(group, SpatialGroup):
+                group.refresh(self)
+
+    def path_rect(self):
+        """Area the platform covers over its whole back-and-forth path"""
+        start = pygame.Rect(self.start_x, self.start_y, self.rect.width, self.rect.height)
+        if not self.move_speed or self.leg_ticks is None:
+            return start
+        reach = int(self.leg_ticks * self.move_speed)
         if self.move_axis == "horizontal":
-            self.rect.x += self.move_speed * self.direction
-            self.distance_moved += abs(self.move_speed)
-            
-            if self.distance_moved >= self.move_distance:
-                self.direction *= -1
-                self.distance_moved = 0
-        else:  # vertical
-            self.rect.y += self.move_speed * self.direction
-            self.distance_moved += abs(self.move_speed)
-            
-            if self.distance_moved >= self.move_distance:
+            return start.union(start.move(reach, 0))
+        return start.union(start.move(0, reach))
+
+    def advance(self, ticks):
+        """Apply ticks updates at once, ending exactly where that many update() calls would"""
+        if ticks <= 0 or self.leg_ticks is None:
+            return
+        # A full cycle (there and back) ends where it started
+        ticks %= 2 * self.leg_ticks
+        while ticks > 0:
+            done = min(ticks, self.leg_ticks - self.leg_tick)
+            self.position_ticks += done * self.direction
+            ticks -= done
+            self.leg_tick += done
+            if self.leg_tick == self.leg_ticks:
                 self.direction *= -1
-                self.distance_moved = 0
+                self.leg_tick = 0
+
+        offset = int(self.position_ticks * self.move_speed)
+        if self.move_axis == "horizontal":
+            self.rect.x = self.start_x + offset
+        else:
+            self.rect.y = self.start_y + offset
+        self._refresh_groups()
+
+    def catch_up(self):
+        """Apply the updates skipped while off screen"""
+        if self.lag:
+            self.advance(self.lag)
+            self.lag = 0
 
 class BreakableBlock(pygame.sprite.Sprite):
     def __init__(self, x, y, width, height):
         super().__init__()
-        self.image = pygame.Surface((width, height))
-        self.image.fill(BROWN)
+        # Intact blocks share one image; a block gets its own copy once it starts breaking
+        self.image = assets.derive(("breakable_block", width, height), lambda: self._block_surface(width, height))
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
         
-        # Draw crack lines
-        pygame.draw.line(self.image, BLACK, (0, 0), (width//2, height//2), 2)
-        pygame.draw.line(self.image, BLACK, (width, 0), (width//2, height//2), 2)
-        pygame.draw.line(self.image, BLACK, (width//2, height//2), (width//2, height), 2)
-        
         self.breaking = False
         self.break_timer = 0
     
+    @staticmethod
+    def _block_surface(width, height):
+        surface = pygame.Surface((width, height))
+        surface.fill(BROWN)
+        # Draw crack lines
+        pygame.draw.line(surface, BLACK, (0, 0), (width//2, height//2), 2)
+        pygame.draw.line(surface, BLACK, (width, 0), (width//2, height//2), 2)
+        pygame.draw.line(surface, BLACK, (width//2, height//2), (width//2, height), 2)
+        return surface
+    
     def break_block(self):
         if not self.breaking:
+            self.image = self.image.copy()
             self.breaking = True
-            self.break_timer = 90  # Break after 90 frames
+            self.break_timer = BLOCK_BREAK_TIME
     
     def update(self):
         if self.breaking:
@@ -419,118 +628,95 @@ class BreakableBlock(pygame.sprite.Sprite):
                 self.kill()  # Remove the block
 
 def load_level(filepath):
-    # Create sprite groups
+    # Load level data from file (JSON or binary, parsed once and cached by the registry)
+    level = levels.load(filepath) if os.path.exists(filepath) else None
+    return build_level(level)
+
+def build_level(level):
+    """Sprites and collision groups for a LevelColumns, or an empty level for None"""
+    # Create sprite groups (collision groups are bucketed in a spatial grid)
     all_sprites = pygame.sprite.Group()
-    platforms = pygame.sprite.Group()
-    hazards = pygame.sprite.Group()
-    bounce_pads = pygame.sprite.Group()
-    checkpoints = pygame.sprite.Group()
-    moving_platforms = pygame.sprite.Group()
-    breakable_blocks = pygame.sprite.Group()
+    platforms = SpatialGroup()
+    hazards = SpatialGroup()
+    bounce_pads = SpatialGroup()
+    checkpoints = SpatialGroup()
+    moving_platforms = SpatialGroup()
+    breakable_blocks = SpatialGroup()
 
     # Create player
     player = Player()
     all_sprites.add(player)
     
-    # Load level data from file
-    if os.path.exists(filepath):
-        with open(filepath, 'r') as f:
-            level_data = json.load(f)
-
-        for hazard_data in level_data.get("hazards", []):
-            hazard = Hazard(
-                hazard_data["x"],
-                hazard_data["y"],
-                hazard_data.get("size", 50)
-            )
+    if level is not None:
+        for x, y, size in level.rows("hazards"):
+            hazard = Hazard(x, y, size)
             all_sprites.add(hazard)
             hazards.add(hazard)
 
-        # Add platforms
-        for platform_data in level_data.get("platforms", []):
-            platform = Platform(
-                platform_data["x"],
-                platform_data["y"],
-                platform_data["width"],
-                platform_data["height"]
-            )
+        # Add platforms (tiles stay separate for drawing, collision may use merged runs)
+        platform_tiles = []
+        for x, y, width, height in level.rows("platforms"):
+            platform = Platform(x, y, width, height)
             all_sprites.add(platform)
-            platforms.add(platform)
+            platform_tiles.append(platform)
 
-        # Add hazards
-        
         # Add Small Platforms
-        for small_platform_data in level_data.get("small_platforms", []):
-            small_platform = SmallPlatform(
-                small_platform_data["x"],
-                small_platform_data["y"],
-                small_platform_data["width"],
-                small_platform_data["height"]
-            )
+        small_platform_tiles = []
+        for x, y, width, height in level.rows("small_platforms"):
+            small_platform = SmallPlatform(x, y, width, height)
             all_sprites.add(small_platform)
-            platforms.add(small_platform)
+            small_platform_tiles.append(small_platform)
+
             
         # Add Bounce Pads
-        for bounce_data in level_data.get("bounce_pads", []):
-            bounce = BouncePad(
-                bounce_data["x"],
-                bounce_data["y"],
-                bounce_data["width"],
-                bounce_data["height"]
-            )
+        for x, y, width, height in level.rows("bounce_pads"):
+            bounce = BouncePad(x, y, width, height)
             all_sprites.add(bounce)
             bounce_pads.add(bounce)
             
         # Add Checkpoints
-        for checkpoint_data in level_data.get("checkpoints", []):
-            checkpoint = Checkpoint(
-                checkpoint_data["x"],
-                checkpoint_data["y"],
-                checkpoint_data["width"],
-                checkpoint_data["height"]
-            )
+        for x, y, width, height in level.rows("checkpoints"):
+            checkpoint = Checkpoint(x, y, width, height)
             all_sprites.add(checkpoint)
             checkpoints.add(checkpoint)
             
         # Add Moving Platforms
-        for moving_platform_data in level_data.get("moving_platforms", []):
-            moving_platform = MovingPlatform(
-                moving_platform_data["x"],
-                moving_platform_data["y"],
-                moving_platform_data["width"],
-                moving_platform_data["height"],
-                moving_platform_data.get("move_distance", 120),
-                moving_platform_data.get("move_speed", 2)
-            )
-            # Set movement axis if specified
-            if "move_axis" in moving_platform_data:
-                moving_platform.move_axis = moving_platform_data["move_axis"]
-                
+        for x, y, width, height, move_distance, move_speed, move_axis in level.rows("moving_platforms"):
+            moving_platform = MovingPlatform(x, y, width, height, move_distance, move_speed)
+            moving_platform.move_axis = MOVE_AXES[move_axis]
             all_sprites.add(moving_platform)
             moving_platforms.add(moving_platform)
             
         # Add Breakable Blocks
-        for breakable_data in level_data.get("breakable_blocks", []):
-            breakable = BreakableBlock(
-                breakable_data["x"],
-                breakable_data["y"],
-                breakable_data["width"],
-                breakable_data["height"]
-            )
+        for x, y, width, height in level.rows("breakable_blocks"):
+            breakable = BreakableBlock(x, y, width, height)
             all_sprites.add(breakable)
             breakable_blocks.add(breakable)
 
         # Set player start position
-        if level_data.get("player_start"):
-            player.start_pos = (
-                level_data["player_start"]["x"],
-                level_data["player_start"]["y"]
-            )
+        if level.player_start:
+            player.start_pos = level.player_start
             player.reset_pos = player.start_pos
         else:
             # Default player position on ground
             player.start_pos = (400, SCREEN_HEIGHT - 140)
             player.reset_pos = player.start_pos
+
+        # Respawn points inside solid tiles are moved up onto them. Being
+        # pushed out of tiles during play depends on how they are split up,
+        # so this keeps merged and single tiles playing the same
+        tile_rects = [tile.rect for tile in platform_tiles + small_platform_tiles]
+        player.start_pos = clear_spawn(player.start_pos, player.rect, tile_rects)
+        player.reset_pos = player.start_pos
+        for checkpoint in checkpoints:
+            checkpoint.respawn_pos = clear_spawn(checkpoint.respawn_pos, player.rect, tile_rects)
+
+        for tiles in (platform_tiles, small_platform_tiles):
+            if MERGE_STATIC_TILES:
+                for rect in merge_tile_rects(tile.rect for tile in tiles):
+                    platforms.add(CollisionBlock(rect))
+            else:
+                platforms.add(tiles)
     else:
         # Default player position
         player.start_pos = (400, SCREEN_HEIGHT - 140)
@@ -538,129 +724,299 @@ def load_level(filepath):
 
     player.reset_position()
 
+    # The player can go anywhere the level has something, and at least the whole screen
+    level_rects = [sprite.rect for sprite in all_sprites if sprite is not player]
+    level_rects.extend(moving_platform.path_rect() for moving_platform in moving_platforms)
+    player.bounds = world_bounds(level_rects, (SCREEN_WIDTH, SCREEN_HEIGHT))
+
     return all_sprites, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks, player
 
-def main(level_file=None):
-    # If no level file specified, try to use command line argument
-    if level_file is None and len(sys.argv) > 1:
-        level_file = sys.argv[1]
+def split_static_sprites(all_sprites):
+    """Split the level's sprites into a pre-baked static layer and dynamic sprites.
+
+    Breakable blocks are baked while intact; a breaking block is drawn on top
+    of its baked copy, and its kill() re-bakes the chunk it was in.
+    """
+    static_layer = StaticLayer()
+    dynamic_sprites = SpatialGroup()
+    for sprite in all_sprites:
+        if isinstance(sprite, (Platform, Hazard, BreakableBlock)):
+            static_layer.add(sprite)
+        else:
+            dynamic_sprites.add(sprite)
+    static_layer.bake()
+    return static_layer, dynamic_sprites
+
+def apply_input(player, inputs):
+    """Apply one tick of input (a replay.encode_input mask) to the player"""
+    if inputs & INPUT_JUMP:
+        player.jump()
+    if inputs & INPUT_RESET:
+        # Reset player position
+        player.reset_position()
+
+    # Handle keyboard controls (as fallback)
+    keyboard_input = False
+    if inputs & INPUT_LEFT:
+        player.move_left()
+        keyboard_input = True
+    elif inputs & INPUT_RIGHT:
+        player.move_right()
+        keyboard_input = True
+
+    # Handle Bluetooth controller input
+    controller_state = decode_controller(inputs)
+    if controller_state is not None:
+        # Handle movement based on controller input
+        if controller_state['moving_left']:
+            player.move_left()
+        elif controller_state['moving_right']:
+            player.move_right()
+        elif not keyboard_input:
+            # Only stop if we were moving due to controller input and no keyboard input
+            player.stop()
+
+        # Handle jumping with Y controller
+        if controller_state['jumping']:
+            player.jump()
+    elif not keyboard_input:
+        # If no Bluetooth and no keyboard input, stop the player
+        player.stop()
+
+def level_checksum(player, moving_platforms, breakable_blocks):
+    """Checksum of the simulation state, used to check replays are deterministic"""
+    for moving_platform in moving_platforms:
+        moving_platform.catch_up()
+    state = (
+        tuple(player.rect), player.velocity_x, player.velocity_y, player.on_ground,
+        player.coyote_timer, player.can_jump, player.checkpoint_cooldown, player.reset_pos,
+        tuple(tuple(platform.rect) for platform in moving_platforms),
+        tuple((tuple(block.rect), block.break_timer) for block in breakable_blocks)
+    )
+    return f"{zlib.crc32(repr(state).encode()):08x}"
+
+def physics_step(player, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks,
+                 active_area=None):
+    """Advance the level by one fixed physics tick.
+
+    Moving platforms whose path stays outside active_area (the view plus a
+    margin) can't reach the player, so they only catch up every few ticks.
+    """
+    player.previous_pos = player.rect.topleft
+    bounce_pads.update()
+    for moving_platform in moving_platforms:
+        if active_area is None or moving_platform.path_rect().colliderect(active_area):
+            moving_platform.catch_up()
+            moving_platform.previous_pos = moving_platform.rect.topleft
+            moving_platform.update()
+        else:
+            moving_platform.lag += 1
+            if moving_platform.lag >= OFFSCREEN_UPDATE_TICKS:
+                moving_platform.catch_up()
+                moving_platform.previous_pos = moving_platform.rect.topleft
+    breakable_blocks.update()
+    player.update(platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks)
+
+def interpolated_pos(sprite, alpha):
+    """Position of a sprite between its previous and current tick"""
+    previous = getattr(sprite, "previous_pos", None)
+    if previous is None:
+        return sprite.rect.topleft
+    x = previous[0] + (sprite.rect.x - previous[0]) * alpha
+    y = previous[1] + (sprite.rect.y - previous[1]) * alpha
+    return (x, y)
+
+def draw_interpolated(surface, sprites, alpha, offset=(0, 0)):
+    """Draw sprites between their previous and current tick positions, moved by offset"""
+    for sprite in sprites:
+        x, y = interpolated_pos(sprite, alpha)
+        surface.blit(sprite.image, (round(x) + offset[0], round(y) + offset[1]))
 
-    # Default to temp level if still no file specified
-    if level_file is None:
-        level_dir = "levels"
-        level_file = os.path.join(level_dir, "_temp_level.json")
+def load_background():
+    """The background scaled to the screen height, loaded once; None if it can't be"""
+    def build():
+        original_bg = pygame.image.load(BACKGROUND_IMAGE).convert()
+        # Scale to the screen height while maintaining aspect ratio
+        bg_ratio = original_bg.get_width() / original_bg.get_height()
+        return pygame.transform.scale(original_bg, (int(SCREEN_HEIGHT * bg_ratio), SCREEN_HEIGHT))
+
+    try:
+        return assets.derive(("background", BACKGROUND_IMAGE, SCREEN_HEIGHT), build)
+    except pygame.error:
+        return None
+
+def main(level_file=None, render_fps=RENDER_FPS, vsync=VSYNC, record_file=None, level=None,
+         controller=None, quit_on_exit=True, physics_hz=TUNED_HZ):
+    """Play a level until the window is closed or Escape is pressed.
+
+    The level comes from level_file, or is a LevelColumns passed as level
+    (the level builder's playtest). A running GameController passed as
+    controller is used instead of starting one, and is left running.
+    With quit_on_exit False pygame stays initialised for the caller.
+    Physics runs at physics_hz ticks per second.
+    """
+    set_physics_rate(physics_hz)
+    if level is None:
+        # If no level file specified, try to use command line argument
+        if level_file is None and len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+            level_file = sys.argv[1]
+
+        # Default to temp level if still no file specified
+        if level_file is None:
+            level_dir = "levels"
+            level_file = os.path.join(level_dir, "_temp_level.json")
+
+    global screen
+    if vsync:
+        try:
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+        except pygame.error:
+            print("Warning: vsync not available, using the frame rate cap instead")
+            vsync = False
+    elif pygame.display.get_surface() is None or pygame.display.get_surface().get_size() != (SCREEN_WIDTH, SCREEN_HEIGHT):
+        # Another screen (like the level builder) may have resized the window
+        screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("2D Platformer - Custom Level")
 
     # Load level
-    all_sprites, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks, player = load_level(level_file)
+    if level is not None:
+        all_sprites, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks, player = build_level(level)
+    else:
+        all_sprites, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks, player = load_level(level_file)
+    if CACHE_STATS:
+        print(f"Asset cache: {assets.report()}")
+    if USE_STATIC_LAYER:
+        static_layer, dynamic_sprites = split_static_sprites(all_sprites)
+
+    # The camera follows the player around a world that may be larger than the screen
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT, player.bounds)
+    camera.follow(*player.rect.center)
 
     # Load background image - MODIFIED FOR SCROLLING
-    try:
-        original_bg = pygame.image.load("sprites/background_wild_west.png").convert()
-        
-        # Calculate scaled dimensions while maintaining aspect ratio
-        bg_ratio = original_bg.get_width() / original_bg.get_height()
-        scaled_height = SCREEN_HEIGHT
-        scaled_width = int(scaled_height * bg_ratio)
-        
-        # Scale the background
-        background = pygame.transform.scale(original_bg, (scaled_width, scaled_height))
-        
+    background = load_background()
+    if background is not None:
         # Scrolling variables
         bg_x = 0
-        max_scroll = scaled_width - SCREEN_WIDTH
-        scroll_speed = 2
+        max_scroll = background.get_width() - SCREEN_WIDTH
+        scroll_speed = BACKGROUND_SCROLL_SPEED
         use_background_image = True
-        
-    except pygame.error:
+    else:
         print("Warning: Could not load background image, using solid color")
         use_background_image = False
 
     # Font setup for UI
     font = pygame.font.SysFont('Arial', 20)
 
-    # Initialize Bluetooth controller
+    # Initialize Bluetooth controller, unless the caller already has one running
     global bt_controller
-    bt_controller = GameController(debug=True)
-    bt_controller.start()
-    
-    # Wait a moment for Bluetooth to initialize
-    time.sleep(1)
+    if controller is not None:
+        bt_controller = controller
+    else:
+        bt_controller = GameController(debug=True)
+        bt_controller.start()
+
+        # Wait a moment for Bluetooth to initialize
+        time.sleep(1)
 
-    # Game loop
+    # Optionally record every tick's input for replaying with simulation.py
+    recording = Replay(level_file, PHYSICS_HZ) if record_file else None
+
+    # Game loop: physics advances in fixed ticks, drawing happens once per frame
+    jump_requested = False
+    reset_requested = False
+    tick_time = 1.0 / PHYSICS_HZ
+    accumulator = 0.0
+    previous_time = time.perf_counter()
     running = True
     while running:
-        clock.tick(FPS)
+        if vsync or not render_fps:
+            clock.tick()
+        else:
+            clock.tick(render_fps)
+        current_time = time.perf_counter()
+        accumulator += min(current_time - previous_time, MAX_FRAME_TIME)
+        previous_time = current_time
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    player.jump()
+                    jump_requested = True
                 if event.key == pygame.K_r:
-                    # Reset player position
-                    player.reset_position()
+                    reset_requested = True
                 if event.key == pygame.K_ESCAPE:
                     # Return to level builder
                     running = False
-            if event.type == pygame.KEYUP:
-                if event.key == pygame.K_LEFT and player.velocity_x < 0:
-                    player.stop()
-                if event.key == pygame.K_RIGHT and player.velocity_x > 0:
-                    player.stop()
 
-        # Handle keyboard controls (as fallback)
+        # Sample this frame's input; it is applied to every tick the frame runs
         keys = pygame.key.get_pressed()
-        keyboard_input = False
-        
-        if keys[pygame.K_LEFT]:
-            player.move_left()
-            keyboard_input = True
-        elif keys[pygame.K_RIGHT]:
-            player.move_right()
-            keyboard_input = True
-        
-        # Handle Bluetooth controller input
-        if bt_controller.is_connected():
-            controller_state = bt_controller.update()
-            
-            # Handle movement based on controller input
-            if controller_state['moving_left']:
-                player.move_left()
-            elif controller_state['moving_right']:
-                player.move_right()
-            elif not keyboard_input:
-                # Only stop if we were moving due to controller input and no keyboard input
-                player.stop()
-            
-            # Handle jumping with Y controller
-            if controller_state['jumping']:
-                player.jump()
-        elif not keyboard_input:
-            # If no Bluetooth and no keyboard input, stop the player
-            player.stop()
+        controller_state = bt_controller.update() if bt_controller.is_connected() else None
+        inputs = encode_input(keys[pygame.K_LEFT], keys[pygame.K_RIGHT],
+                              jump_requested, reset_requested, controller_state)
 
-        # Update all sprites
-        bounce_pads.update()
-        moving_platforms.update()
-        breakable_blocks.update()
-        player.update(platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks)
+        # Run as many physics ticks as the elapsed time calls for
+        while accumulator >= tick_time:
+            apply_input(player, inputs)
+            physics_step(player, platforms, hazards, bounce_pads, checkpoints, moving_platforms, breakable_blocks,
+                         camera.area(ACTIVE_MARGIN))
+            accumulator -= tick_time
+            if recording is not None:
+                recording.record(inputs, lambda: level_checksum(player, moving_platforms, breakable_blocks))
 
-        # UPDATE BACKGROUND POSITION BASED ON PLAYER MOVEMENT
-        if use_background_image:
-            # Only scroll when player is moving right and we haven't reached the end
-            if player.velocity_x > 0 and bg_x > -max_scroll:
-                bg_x -= scroll_speed
-            # Clamp the position so we don't show empty space at the end
-            bg_x = max(-max_scroll, bg_x)
+            # Key presses only count once
+            inputs &= ~ONE_SHOT_INPUTS
+            jump_requested = False
+            reset_requested = False
+
+            # UPDATE BACKGROUND POSITION BASED ON PLAYER MOVEMENT
+            # (levels wider than the screen scroll it with the camera instead)
+            if use_background_image and camera.world_rect.width <= SCREEN_WIDTH:
+                # Only scroll when player is moving right and we haven't reached the end
+                if player.velocity_x > 0 and bg_x > -max_scroll:
+                    bg_x -= scroll_speed
+                # Clamp the position so we don't show empty space at the end
+                bg_x = max(-max_scroll, bg_x)
+
+        # Battles block the loop, so run them between ticks and don't let
+        # the platformer try to catch up on the time spent in them
+        for checkpoint in checkpoints:
+            if checkpoint.battle_pending:
+                checkpoint.run_battle()
+                accumulator = 0.0
+                previous_time = time.perf_counter()
+
+        # How far we are between the last tick and the next one
+        alpha = accumulator / tick_time
+
+        # Centre the view on where the player is drawn
+        player_x, player_y = interpolated_pos(player, alpha)
+        camera.follow(player_x + player.rect.width / 2, player_y + player.rect.height / 2)
+        offset = camera.offset
+        visible_area = camera.area(DRAW_MARGIN)
 
         # Draw everything
         if use_background_image:
+            if camera.world_rect.width > SCREEN_WIDTH:
+                # Spread the background's scroll over the width of the world
+                scrolled = (camera.rect.x - camera.world_rect.x) / (camera.world_rect.width - SCREEN_WIDTH)
+                bg_x = -round(scrolled * max_scroll)
             # Draw the background at the current scroll position
             screen.blit(background, (bg_x, 0))
         else:
             screen.fill(BLACK)
             
-        all_sprites.draw(screen)
+        # Only sprites in view are drawn
+        if USE_STATIC_LAYER:
+            static_layer.draw(screen, offset, camera.rect)
+            dynamic_sprites.refresh(player)
+            draw_interpolated(screen, dynamic_sprites.query(visible_area), alpha, offset)
+            for block in breakable_blocks:
+                if block.breaking and camera.visible(block.rect):
+                    screen.blit(block.image, camera.apply(block.rect))
+        else:
+            visible_sprites = [sprite for sprite in all_sprites if visible_area.colliderect(sprite.rect)]
+            draw_interpolated(screen, visible_sprites, alpha, offset)
 
         # Draw UI text
         # Display Bluetooth connection status
@@ -672,10 +1028,24 @@ def main(level_file=None):
 
         pygame.display.flip()
 
-    # Clean up Bluetooth controller before exiting
-    bt_controller.stop()
-    
-    pygame.quit()
+    if recording is not None:
+        recording.save(record_file)
+        print(f"Recorded {len(recording)} ticks to {record_file}")
+
+    # Clean up Bluetooth controller before exiting, but only if we created it
+    if controller is None:
+        bt_controller.stop()
+
+    if quit_on_exit:
+        pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Play a platformer level")
+    parser.add_argument("level_file", nargs="?", help="level to play (default: levels/_temp_level.json)")
+    parser.add_argument("--fps", type=int, default=RENDER_FPS, help="frame rate cap for drawing, 0 for uncapped")
+    parser.add_argument("--vsync", action="store_true", default=VSYNC, help="sync drawing to the display refresh")
+    parser.add_argument("--physics-hz", type=int, default=TUNED_HZ, help="physics ticks per second")
+    parser.add_argument("--record", metavar="FILE", help="record every tick's input to a replay file")
+    args = parser.parse_args()
+    main(args.level_file, render_fps=args.fps, vsync=args.vsync, record_file=args.record,
+         physics_hz=args.physics_hz)
\ No newline at end of file
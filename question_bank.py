@@ -0,0 +1,231 @@
+import os
+import json
+import random
+
+QUESTIONS_FILE = "questions.json"
+INDEX_SUFFIX = ".idx"  # The index is kept next to the questions file
+INDEX_VERSION = 1
+DEFAULT_CATEGORY = "general"
+
+# Fields of the questions.json schema a question needs to be playable
+REQUIRED_FIELDS = ("question", "answer", "wrong_choice1", "wrong_choice2", "wrong_choice3", "attackPower")
+
+
+def question_spans(text):
+    """(start, end, question) for each object in a JSON array of questions.
+
+    Positions are character offsets into text.
+    """
+    decoder = json.JSONDecoder()
+    position = text.index("[") + 1
+    length = len(text)
+    while True:
+        # Skip whitespace and the commas between objects
+        while position < length and text[position] in " \t\r\n,":
+            position += 1
+        if position >= length or text[position] == "]":
+            return
+        question, end = decoder.raw_decode(text, position)
+        yield position, end, question
+        position = end
+
+
+def index_entry(question):
+    """The fields a question is indexed by: category, difficulty, attackPower.
+
+    Questions written before categories and difficulty existed go in the
+    default category, with their attackPower as the difficulty.
+    """
+    attack_power = int(question.get("attackPower", 1))
+    category = str(question.get("category", DEFAULT_CATEGORY)).lower()
+    difficulty = int(question.get("difficulty", attack_power))
+    return category, difficulty, attack_power
+
+
+class Deck:
+    """Shuffled deck of question numbers.
+
+    Each draw swaps a random remaining card to the front (one step of a
+    Fisher-Yates shuffle), so a draw is O(1) and nothing repeats until the
+    whole deck has been dealt, after which it starts over.
+    """
+
+    def __init__(self, cards):
+        self.cards = list(cards)
+        self.dealt = 0
+
+    def __len__(self):
+        return len(self.cards)
+
+    def remaining(self):
+        return len(self.cards) - self.dealt
+
+    def draw(self, rng):
+        if not self.cards:
+            return None
+        if self.dealt >= len(self.cards):
+            self.dealt = 0
+        pick = rng.randrange(self.dealt, len(self.cards))
+        cards = self.cards
+        cards[self.dealt], cards[pick] = cards[pick], cards[self.dealt]
+        card = cards[self.dealt]
+        self.dealt += 1
+        return card
+
+
+class QuestionBank:
+    """Questions indexed on disk and loaded one at a time when drawn.
+
+    The index holds the byte span of every question in questions.json plus
+    its category, difficulty and attackPower; it is saved next to the file
+    and rebuilt only when the file changes. Drawing reads just the drawn
+    question. Each filter combination gets its own deck, so a session
+    doesn't see a question again until it has seen all that match.
+    """
+
+    def __init__(self, path=QUESTIONS_FILE, rng=None):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX if path is not None else None
+        self.rng = rng if rng is not None else random.Random()
+        self.entries = []  # (offset, length, category, difficulty, attack_power)
+        self.bodies = None  # Questions held in memory instead of on disk, see from_questions()
+        self.decks = {}  # (category, difficulty, attack_power) -> Deck
+        self.stamp = None  # (mtime, size) of the questions file the index is for
+        self.loaded = 0
+        if path is not None:
+            self.load_index()
+
+    @classmethod
+    def from_questions(cls, questions, rng=None):
+        """A bank over questions already in memory"""
+        bank = cls(None, rng)
+        bank.bodies = list(questions)
+        bank.entries = [(None, None) + index_entry(question) for question in bank.bodies]
+        return bank
+
+    def __len__(self):
+        return len(self.entries)
+
+    # Index
+
+    def load_index(self):
+        """Read the saved index if it matches the questions file, otherwise rebuild it"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self.entries = []
+            self.stamp = None
+            return
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            if (index["version"] == INDEX_VERSION and index["mtime"] == stat.st_mtime_ns
+                    and index["size"] == stat.st_size):
+                self.entries = [tuple(entry) for entry in index["entries"]]
+                self.decks = {}
+                return
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self.build_index(stat)
+
+    def build_index(self, stat=None):
+        """Scan the questions file for question spans and save the index"""
+        if stat is None:
+            stat = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        text = data.decode("utf-8")
+
+        entries = []
+        byte_offset = 0
+        char_offset = 0
+        for start, end, question in question_spans(text):
+            # Turn character offsets into byte offsets a piece at a time
+            byte_offset += len(text[char_offset:start].encode("utf-8"))
+            length = len(text[start:end].encode("utf-8"))
+            if all(field in question for field in REQUIRED_FIELDS):
+                entries.append((byte_offset, length) + index_entry(question))
+            else:
+                print(f"Warning: skipping question at byte {byte_offset} of {self.path}, it is missing fields")
+            byte_offset += length
+            char_offset = end
+        self.entries = entries
+        self.decks = {}
+
+        index = {"version": INDEX_VERSION, "mtime": stat.st_mtime_ns, "size": stat.st_size,
+                 "entries": entries}
+        temp_path = self.index_path + ".tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(index, f, separators=(",", ":"))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Warning: could not save question index {self.index_path}: {e}")
+
+    def refresh(self):
+        """Pick up changes to the questions file"""
+        if self.path is None:
+            return
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            stat = None
+        if stat is None or (stat.st_mtime_ns, stat.st_size) != self.stamp:
+            self.load_index()
+
+    # Drawing
+
+    def matching(self, category=None, difficulty=None, attack_power=None):
+        """Numbers of the questions that match the filters (None matches anything)"""
+        if category is not None:
+            category = category.lower()
+        return [number for number, (_, _, entry_category, entry_difficulty, entry_power) in enumerate(self.entries)
+                if (category is None or entry_category == category)
+                and (difficulty is None or entry_difficulty == difficulty)
+                and (attack_power is None or entry_power == attack_power)]
+
+    def categories(self):
+        return sorted({entry[2] for entry in self.entries})
+
+    def deck(self, category=None, difficulty=None, attack_power=None):
+        key = (category.lower() if category is not None else None, difficulty, attack_power)
+        deck = self.decks.get(key)
+        if deck is None:
+            deck = Deck(self.matching(*key))
+            self.decks[key] = deck
+        return deck
+
+    def draw(self, rng=None, category=None, difficulty=None, attack_power=None):
+        """A question matching the filters that hasn't been drawn yet this session, or None"""
+        number = self.deck(category, difficulty, attack_power).draw(rng if rng is not None else self.rng)
+        if number is None:
+            return None
+        return self.question(number)
+
+    def question(self, number):
+        """Load question number from the bank"""
+        self.loaded += 1
+        if self.bodies is not None:
+            return self.bodies[number]
+        offset, length = self.entries[number][:2]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length).decode("utf-8"))
+
+    def reset(self):
+        """Start a new session: every question can be drawn again"""
+        self.decks = {}
+
+
+def load_bank(path=QUESTIONS_FILE):
+    """The question bank for a questions file"""
+    return QuestionBank(path)
+
+
+if __name__ == "__main__":
+    bank = load_bank()
+    print(f"{len(bank)} questions in {bank.path}")
+    for category in bank.categories():
+        print(f"  {category}: {len(bank.matching(category))}")
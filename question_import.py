@@ -0,0 +1,280 @@
+import os
+import re
+import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from question_bank import DEFAULT_CATEGORY
+from question_store import QuestionStore, QUESTION_DB, QUESTIONS_FILE
+
+BATCH_SIZE = 2000  # Questions handed to a worker at a time
+READ_CHUNK = 1 << 16  # Characters read at a time from JSON files
+MIN_ATTACK_POWER = 1
+MAX_ATTACK_POWER = 5
+MAX_ERRORS_SHOWN = 20
+
+TEXT_FIELDS = ("question", "answer", "wrong_choice1", "wrong_choice2", "wrong_choice3")
+CHOICE_FIELDS = ("answer", "wrong_choice1", "wrong_choice2", "wrong_choice3")
+
+_SPACES = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def clean_text(value):
+    """Text with surrounding whitespace removed and inner runs of whitespace collapsed"""
+    return _SPACES.sub(" ", str(value)).strip()
+
+
+def fold(text):
+    """Text reduced to what matters for comparing: lower case, no punctuation or extra spaces"""
+    return _SPACES.sub(" ", _PUNCTUATION.sub("", text.casefold())).strip()
+
+
+def fingerprint(question):
+    """Hash that is the same for near-identical questions.
+
+    Case, punctuation, spacing and the order of the wrong choices don't
+    change it.
+    """
+    wrong = sorted(fold(question[field]) for field in CHOICE_FIELDS[1:])
+    key = "\x1f".join([fold(question["question"]), fold(question["answer"])] + wrong)
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).digest()
+
+
+def validate_question(raw):
+    """Check and normalize a question in the questions.json schema.
+
+    Returns (question, None) if it is usable, otherwise (None, reason).
+    """
+    if not isinstance(raw, dict):
+        return None, "not an object"
+
+    question = {}
+    for field in TEXT_FIELDS:
+        value = raw.get(field)
+        if value is None or clean_text(value) == "":
+            return None, f"{field} is empty"
+        question[field] = clean_text(value)
+
+    try:
+        attack_power = int(str(raw.get("attackPower", "")).strip())
+    except ValueError:
+        return None, f"attackPower must be a whole number, got {raw.get('attackPower')!r}"
+    if not MIN_ATTACK_POWER <= attack_power <= MAX_ATTACK_POWER:
+        return None, f"attackPower must be {MIN_ATTACK_POWER}-{MAX_ATTACK_POWER}, got {attack_power}"
+    question["attackPower"] = attack_power
+
+    choices = {fold(question[field]) for field in CHOICE_FIELDS}
+    if len(choices) != len(CHOICE_FIELDS):
+        return None, "the four choices are not all different"
+
+    explanation = raw.get("explanation")
+    if explanation is not None and clean_text(explanation):
+        question["explanation"] = clean_text(explanation)
+
+    category = clean_text(raw.get("category") or DEFAULT_CATEGORY).lower()
+    if category != DEFAULT_CATEGORY:
+        question["category"] = category
+    difficulty = raw.get("difficulty")
+    if difficulty not in (None, ""):
+        try:
+            question["difficulty"] = int(str(difficulty).strip())
+        except ValueError:
+            return None, f"difficulty must be a whole number, got {difficulty!r}"
+    return question, None
+
+
+def validate_batch(batch):
+    """Validate (source, record, raw) items; run in a worker process.
+
+    Returns ([(question, fingerprint)], [(source, record, reason)]).
+    """
+    valid = []
+    errors = []
+    for source, record, raw in batch:
+        # read_records passes on problems it found as text
+        if isinstance(raw, str):
+            errors.append((source, record, raw))
+            continue
+        question, reason = validate_question(raw)
+        if question is None:
+            errors.append((source, record, reason))
+        else:
+            valid.append((question, fingerprint(question)))
+    return valid, errors
+
+
+def iter_json_array(file, chunk_size=READ_CHUNK):
+    """Objects of a top-level JSON array, decoded as the file is read"""
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    while "[" not in buffer:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            raise ValueError("Expected a JSON array of questions")
+        buffer += chunk
+    position = buffer.index("[") + 1
+    at_end = False
+
+    while True:
+        # Skip whitespace and the commas between objects
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer):
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Most likely the object runs past what has been read so far
+                if at_end:
+                    raise
+            else:
+                yield item
+                position = end
+                continue
+        elif at_end:
+            raise ValueError("JSON array is not closed")
+
+        # Drop what has been decoded and read on
+        chunk = file.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        at_end = not chunk
+
+
+def read_records(path):
+    """(source, record number, raw question) for each question in a CSV, JSON or JSON Lines file"""
+    name = os.path.basename(path)
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8-sig", newline="") as file:
+        if extension == ".csv":
+            # Header row names the fields; record numbers are line numbers
+            for record, row in enumerate(csv.DictReader(file), 2):
+                yield name, record, row
+        elif extension in (".jsonl", ".ndjson"):
+            for record, line in enumerate(file, 1):
+                if line.strip():
+                    try:
+                        yield name, record, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield name, record, f"bad JSON: {e}"
+        else:
+            for record, raw in enumerate(iter_json_array(file), 1):
+                yield name, record, raw
+
+
+def batches(records, size=BATCH_SIZE):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_questions(paths, store, workers=None, dry_run=False, batch_size=BATCH_SIZE):
+    """Validate, deduplicate and add the questions in paths to store.
+
+    Files are read as a stream and validated in batches on a process pool
+    (or in this process with workers=1). Questions already in the store,
+    or seen earlier in the import, are skipped as duplicates. Returns
+    the counts and the errors.
+    """
+    started = time.perf_counter()
+    seen = {fingerprint(question) for question in store.all()}
+    totals = {"read": 0, "added": 0, "duplicates": 0, "invalid": 0}
+    errors = []
+
+    def records():
+        for path in paths:
+            yield from read_records(path)
+
+    def handle(result):
+        valid, batch_errors = result
+        errors.extend(batch_errors)
+        totals["invalid"] += len(batch_errors)
+        fresh = []
+        for question, key in valid:
+            if key in seen:
+                totals["duplicates"] += 1
+            else:
+                seen.add(key)
+                fresh.append(question)
+        if fresh and not dry_run:
+            store.add_many(fresh)
+        totals["added"] += len(fresh)
+
+    def counted(all_batches):
+        for batch in all_batches:
+            totals["read"] += len(batch)
+            yield batch
+
+    work = counted(batches(records(), batch_size))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1:
+        for batch in work:
+            handle(validate_batch(batch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a few batches in flight so reading, validating and writing overlap
+            in_flight = []
+            limit = 2 * workers
+            for batch in work:
+                in_flight.append(pool.submit(validate_batch, batch))
+                if len(in_flight) >= limit:
+                    handle(in_flight.pop(0).result())
+            for future in in_flight:
+                handle(future.result())
+
+    totals["seconds"] = time.perf_counter() - started
+    return totals, errors
+
+
+def open_store(db_path=QUESTION_DB, json_path=QUESTIONS_FILE, dry_run=False):
+    """The store to import into, seeded from json_path if it has to be created.
+
+    The game plays from the database once it exists, so a new one has to
+    start with the questions the game had so far. A dry run against a
+    database that doesn't exist yet works on a seeded copy in memory.
+    """
+    if os.path.exists(db_path):
+        return QuestionStore(db_path)
+    store = QuestionStore(":memory:" if dry_run else db_path)
+    if os.path.exists(json_path):
+        count = store.import_json(json_path)
+        verb = "Would start" if dry_run else "Started"
+        print(f"{verb} {db_path} with the {count} questions in {json_path}")
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import questions from CSV, JSON or JSON Lines files")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--db", default=QUESTION_DB, help="question database to add to")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU, 1 to run in-process)")
+    parser.add_argument("--dry-run", action="store_true", help="check the files without adding anything")
+    args = parser.parse_args()
+
+    store = open_store(args.db, dry_run=args.dry_run)
+    totals, errors = import_questions(args.files, store, args.workers, args.dry_run)
+    store.close()
+
+    for source, record, reason in errors[:MAX_ERRORS_SHOWN]:
+        print(f"{source}:{record}: {reason}")
+    if len(errors) > MAX_ERRORS_SHOWN:
+        print(f"... and {len(errors) - MAX_ERRORS_SHOWN} more problems")
+
+    rate = totals["read"] / totals["seconds"] if totals["seconds"] else 0
+    verb = "Would add" if args.dry_run else "Added"
+    print(f"{verb} {totals['added']} of {totals['read']} questions to {args.db} "
+          f"({totals['duplicates']} duplicates, {totals['invalid']} invalid) "
+          f"in {totals['seconds']:.2f}s, {rate:.0f} questions/s")
+    sys.exit(1 if errors else 0)
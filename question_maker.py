@@ -1,6 +1,9 @@
 
+import os
 import json
 import pygame
+from question_store import QuestionStore, QUESTION_DB, write_json_atomic
+from question_import import validate_question
 # import pygafme_gui
 
 pygame.init()
@@ -20,8 +23,8 @@ def load_questions():
 
 def save_questions(questions):
     """Save questions to a file."""
-    with open("questions.json", "w") as file:
-        json.dump(questions, file, indent=4)
+    # Written to a temporary file first, so a crash can't leave questions.json half written
+    write_json_atomic(questions, "questions.json")
 
 # def add_question():
 #     """Allow the teacher to create a new question."""
@@ -44,8 +47,8 @@ def save_questions(questions):
 #         "wrong_choice3": wrong_choice3
 #     })
 
-    save_questions(questions)
-    print("✅ Question added successfully!")
+#     save_questions(questions)
+#     print("✅ Question added successfully!")
 
 # Run the question maker
 # while True:
@@ -108,6 +111,9 @@ def Qmaker():
         {"text": "Explanation:", "position": (700, 770)}
     ]
 
+    # With a question database, each question is one small insert instead of rewriting questions.json
+    store = QuestionStore() if os.path.exists(QUESTION_DB) else None
+
     running = True
     while running:
         screen.fill((199, 142, 254))
@@ -129,20 +135,26 @@ def Qmaker():
             
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if save_button.collidepoint(event.pos):
-                    new_question = {
+                    new_question, problem = validate_question({
                         "question": question_box.text,
                         "answer": answer_box.text.lower(),
-                        "attackPower": int(attack_box.text),
+                        "attackPower": attack_box.text,
                         "wrong_choice1": choice_box1.text,
                         "wrong_choice2": choice_box2.text,
                         "wrong_choice3": choice_box3.text,
                         "explanation": Explenation.text
                         
-                    }
-                    questions = load_questions()
-                    questions.append(new_question)
-                    save_questions(questions)
-                    print("✅ Saved!")
+                    })
+                    if problem:
+                        print(f"❌ Not saved: {problem}")
+                    else:
+                        if store is not None:
+                            store.add(new_question)
+                        else:
+                            questions = load_questions()
+                            questions.append(new_question)
+                            save_questions(questions)
+                        print("✅ Saved!")
         
         # Draw everything
         # Draw the labels
@@ -161,5 +173,8 @@ def Qmaker():
         screen.blit(save_image, (save_button.x + 20, save_button.y + 15))
         
         pygame.display.flip()
+
+    if store is not None:
+        store.close()
 if __name__ == "__main__":
     Qmaker()
\ No newline at end of file
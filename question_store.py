@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import sqlite3
+
+from question_bank import QuestionBank, load_bank, index_entry, DEFAULT_CATEGORY, QUESTIONS_FILE, REQUIRED_FIELDS
+
+QUESTION_DB = "questions.db"  # Used instead of questions.json when it exists
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    wrong_choice1 TEXT NOT NULL,
+    wrong_choice2 TEXT NOT NULL,
+    wrong_choice3 TEXT NOT NULL,
+    attack_power INTEGER NOT NULL,
+    explanation TEXT,
+    category TEXT NOT NULL,
+    difficulty INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS questions_by_category ON questions (category, difficulty, attack_power);
+CREATE INDEX IF NOT EXISTS questions_by_difficulty ON questions (difficulty, attack_power);
+CREATE INDEX IF NOT EXISTS questions_by_attack_power ON questions (attack_power);
+"""
+
+COLUMNS = ("question", "answer", "wrong_choice1", "wrong_choice2", "wrong_choice3",
+           "attack_power", "explanation", "category", "difficulty")
+INSERT = f"INSERT INTO questions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+
+
+def question_row(question):
+    """Column values for a question in the questions.json schema"""
+    missing = [field for field in REQUIRED_FIELDS if field not in question]
+    if missing:
+        raise ValueError(f"Question is missing {', '.join(missing)}")
+    category, difficulty, attack_power = index_entry(question)
+    return (question["question"], question["answer"], question["wrong_choice1"],
+            question["wrong_choice2"], question["wrong_choice3"], attack_power,
+            question.get("explanation"), category, difficulty)
+
+
+def row_question(row):
+    """A database row as a question in the questions.json schema"""
+    question, answer, wrong_choice1, wrong_choice2, wrong_choice3, attack_power, explanation, category, difficulty = row
+    data = {
+        "question": question,
+        "answer": answer,
+        "wrong_choice1": wrong_choice1,
+        "wrong_choice2": wrong_choice2,
+        "wrong_choice3": wrong_choice3,
+        "attackPower": attack_power
+    }
+    if explanation is not None:
+        data["explanation"] = explanation
+    # Only write the newer fields when they say something the defaults don't
+    if category != DEFAULT_CATEGORY:
+        data["category"] = category
+    if difficulty != attack_power:
+        data["difficulty"] = difficulty
+    return data
+
+
+def write_json_atomic(questions, path):
+    """Write questions to a JSON file without ever leaving a half written file behind"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(questions, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class QuestionStore:
+    """Questions in a SQLite database.
+
+    Adding a question is a single-row insert in its own transaction, so
+    authoring stays fast however big the bank gets, and a crash loses at
+    most the question being saved. Filters on category, difficulty and
+    attackPower are answered from indexes.
+    """
+
+    def __init__(self, path=QUESTION_DB):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # The write-ahead log keeps readers (the game) and the writer (the question maker) apart
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, question):
+        """Insert one question and return its id"""
+        with self.connection:
+            cursor = self.connection.execute(INSERT, question_row(question))
+        return cursor.lastrowid
+
+    def add_many(self, questions):
+        """Insert questions in one transaction; returns how many were added"""
+        rows = [question_row(question) for question in questions]
+        with self.connection:
+            self.connection.executemany(INSERT, rows)
+        return len(rows)
+
+    def get(self, question_id):
+        row = self.connection.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM questions WHERE id = ?", (question_id,)).fetchone()
+        if row is None:
+            raise KeyError(question_id)
+        return row_question(row)
+
+    def ids(self, category=None, difficulty=None, attack_power=None):
+        """Ids of the questions that match the filters (None matches anything)"""
+        conditions = []
+        values = []
+        for column, value in (("category", category.lower() if category is not None else None),
+                              ("difficulty", difficulty), ("attack_power", attack_power)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return [row[0] for row in self.connection.execute(f"SELECT id FROM questions{where} ORDER BY id", values)]
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def categories(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT category FROM questions ORDER BY category")]
+
+    def version(self):
+        """Changes whenever questions are added or removed"""
+        return self.connection.execute("SELECT COUNT(*), MAX(id) FROM questions").fetchone()
+
+    def all(self):
+        return [row_question(row) for row in
+                self.connection.execute(f"SELECT {', '.join(COLUMNS)} FROM questions ORDER BY id")]
+
+    def import_json(self, path=QUESTIONS_FILE, replace=False):
+        """Load a questions.json file in one transaction; with replace, the store ends up holding only it"""
+        with open(path, "r") as file:
+            questions = json.load(file)
+        rows = [question_row(question) for question in questions]
+        with self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM questions")
+            self.connection.executemany(INSERT, rows)
+        return len(rows)
+
+    def export_json(self, path=QUESTIONS_FILE):
+        """Write every question to a questions.json file"""
+        questions = self.all()
+        write_json_atomic(questions, path)
+        return len(questions)
+
+
+class StoreBank(QuestionBank):
+    """QuestionBank drawing from a QuestionStore; deck cards are row ids"""
+
+    def __init__(self, store, rng=None):
+        super().__init__(None, rng)
+        self.store = store
+        self.stamp = store.version()
+
+    def __len__(self):
+        return self.store.count()
+
+    def matching(self, category=None, difficulty=None, attack_power=None):
+        return self.store.ids(category, difficulty, attack_power)
+
+    def categories(self):
+        return self.store.categories()
+
+    def question(self, number):
+        self.loaded += 1
+        return self.store.get(number)
+
+    def refresh(self):
+        version = self.store.version()
+        if version != self.stamp:
+            self.stamp = version
+            self.decks = {}
+
+
+def open_bank(db_path=QUESTION_DB, json_path=QUESTIONS_FILE):
+    """The question bank to play from: the database if there is one, otherwise the JSON file"""
+    if os.path.exists(db_path):
+        return StoreBank(QuestionStore(db_path))
+    return load_bank(json_path)
+
+
+if __name__ == "__main__":
+    # python question_store.py import|export [questions.json]
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in ("import", "export"):
+        print(f"Usage: python question_store.py import|export [{QUESTIONS_FILE}]")
+        sys.exit(1)
+    json_path = sys.argv[2] if len(sys.argv) == 3 else QUESTIONS_FILE
+    store = QuestionStore()
+    if sys.argv[1] == "import":
+        print(f"Imported {store.import_json(json_path, replace=True)} questions from {json_path} into {store.path}")
+    else:
+        print(f"Exported {store.export_json(json_path)} questions from {store.path} to {json_path}")
+    store.close()
@@ -0,0 +1,126 @@
+import json
+
+# Bits of a per-tick input mask
+INPUT_LEFT = 1  # Left arrow held
+INPUT_RIGHT = 2  # Right arrow held
+INPUT_JUMP = 4  # Jump pressed this tick
+INPUT_RESET = 8  # Reset pressed this tick
+CONTROLLER_CONNECTED = 16  # Bluetooth controller state is present
+CONTROLLER_LEFT = 32
+CONTROLLER_RIGHT = 64
+CONTROLLER_JUMP = 128
+CONTROLLER_BUTTON = 256
+
+# Bits that only apply to the first tick they are seen in
+ONE_SHOT_INPUTS = INPUT_JUMP | INPUT_RESET
+
+REPLAY_VERSION = 1
+# Ticks between state checksums stored in a replay
+CHECKSUM_INTERVAL = 60
+
+
+def encode_input(left=False, right=False, jump=False, reset=False, controller_state=None):
+    """Pack one tick of keyboard and controller input into an int"""
+    mask = 0
+    if left:
+        mask |= INPUT_LEFT
+    if right:
+        mask |= INPUT_RIGHT
+    if jump:
+        mask |= INPUT_JUMP
+    if reset:
+        mask |= INPUT_RESET
+    if controller_state is not None:
+        mask |= CONTROLLER_CONNECTED
+        if controller_state.get('moving_left'):
+            mask |= CONTROLLER_LEFT
+        if controller_state.get('moving_right'):
+            mask |= CONTROLLER_RIGHT
+        if controller_state.get('jumping'):
+            mask |= CONTROLLER_JUMP
+        if controller_state.get('button_pressed'):
+            mask |= CONTROLLER_BUTTON
+    return mask
+
+
+def decode_controller(mask):
+    """Rebuild the GameController.update() dict from an input mask (None if disconnected)"""
+    if not mask & CONTROLLER_CONNECTED:
+        return None
+    return {
+        'moving_left': bool(mask & CONTROLLER_LEFT),
+        'moving_right': bool(mask & CONTROLLER_RIGHT),
+        'jumping': bool(mask & CONTROLLER_JUMP),
+        'button_pressed': bool(mask & CONTROLLER_BUTTON),
+        'x_connected': True,
+        'y_connected': True
+    }
+
+
+class Replay:
+    """Recorded per-tick inputs for one level, stored run-length encoded.
+
+    Alongside the inputs a replay keeps a checksum of the simulation state
+    every checksum_interval ticks, so a later run can verify it reproduces
+    the recording tick for tick and find where it diverged if not.
+    """
+
+    def __init__(self, level_file, physics_hz, inputs=None, checksums=None, checksum_interval=CHECKSUM_INTERVAL):
+        self.level_file = level_file
+        self.physics_hz = physics_hz
+        self.inputs = inputs if inputs is not None else []
+        self.checksums = checksums if checksums is not None else []
+        self.checksum_interval = checksum_interval
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def record(self, mask, checksum=None):
+        """Add one tick of input.
+
+        checksum is a function returning the state checksum after the tick;
+        it is only called on the ticks a checksum is kept for.
+        """
+        self.inputs.append(mask)
+        if checksum is not None and len(self.inputs) % self.checksum_interval == 0:
+            self.checksums.append(checksum())
+
+    def runs(self):
+        """Inputs as [count, mask] pairs"""
+        runs = []
+        for mask in self.inputs:
+            if runs and runs[-1][1] == mask:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, mask])
+        return runs
+
+    def to_dict(self):
+        return {
+            "version": REPLAY_VERSION,
+            "level": self.level_file,
+            "physics_hz": self.physics_hz,
+            "ticks": len(self.inputs),
+            "inputs": self.runs(),
+            "checksum_interval": self.checksum_interval,
+            "checksums": self.checksums
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != REPLAY_VERSION:
+            raise ValueError(f"Unsupported replay version: {data.get('version')}")
+        inputs = []
+        for count, mask in data["inputs"]:
+            inputs.extend([mask] * count)
+        return cls(data["level"], data["physics_hz"], inputs, data.get("checksums", []),
+                   data.get("checksum_interval", CHECKSUM_INTERVAL))
+
+    def save(self, filepath):
+        with open(filepath, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath, 'r') as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import argparse
+
+# Run pygame without a window or sound device; must be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import play_level
+from play_level import load_level, apply_input, physics_step, level_checksum
+from replay import Replay, encode_input
+from level_format import LEVEL_EXTENSIONS
+
+LEVEL_DIR = "levels"
+REPLAY_DIR = "replays"  # Recorded runs checked against the level of the same name
+CHECK_SECONDS = 120  # Longest scripted run allowed to finish a level
+BENCH_TICKS = 20000
+
+
+class Simulation:
+    """A level running headless, one fixed physics tick at a time.
+
+    Checkpoint battles are not started; reaching a checkpoint only marks it
+    as reached, so a run depends on nothing but the level and its inputs.
+    """
+
+    def __init__(self, level_file):
+        self.level_file = level_file
+        (self.all_sprites, self.platforms, self.hazards, self.bounce_pads, self.checkpoints,
+         self.moving_platforms, self.breakable_blocks, self.player) = load_level(level_file)
+        self.ticks = 0
+
+    def tick(self, inputs=0):
+        """Apply one tick of input (a replay.encode_input mask) and step the physics"""
+        apply_input(self.player, inputs)
+        physics_step(self.player, self.platforms, self.hazards, self.bounce_pads,
+                     self.checkpoints, self.moving_platforms, self.breakable_blocks)
+        for checkpoint in self.checkpoints:
+            checkpoint.battle_pending = False
+        self.ticks += 1
+
+    def checksum(self):
+        return level_checksum(self.player, self.moving_platforms, self.breakable_blocks)
+
+    def checkpoints_reached(self):
+        return sum(1 for checkpoint in self.checkpoints if checkpoint.has_triggered)
+
+    def completed(self):
+        """Whether every checkpoint in the level has been reached; never for a level without any"""
+        return len(self.checkpoints) > 0 and self.checkpoints_reached() == len(self.checkpoints)
+
+
+def run_replay(replay, level_file=None):
+    """Play a replay back headless.
+
+    Returns the simulation and the tick at which the state first differed
+    from the recorded checksums (None if it matched throughout).
+    """
+    # Play it back at the rate it was recorded at, then go back to the rate in use
+    previous_hz = play_level.PHYSICS_HZ
+    play_level.set_physics_rate(replay.physics_hz)
+    try:
+        sim = Simulation(level_file or replay.level_file)
+        checksums = iter(replay.checksums)
+        for inputs in replay.inputs:
+            sim.tick(inputs)
+            if sim.ticks % replay.checksum_interval == 0:
+                expected = next(checksums, None)
+                if expected is not None and expected != sim.checksum():
+                    return sim, sim.ticks
+        return sim, None
+    finally:
+        play_level.set_physics_rate(previous_hz)
+
+
+# Scripted runs tried on levels without a replay: (direction, ticks between jumps)
+SCRIPTED_RUNS = [("right", 30), ("right", 10), ("right", 1), ("right", 0),
+                 ("left", 30), ("left", 10), ("left", 1), ("left", 0)]
+
+
+def scripted_inputs(tick, direction="right", jump_every=30):
+    """Input for a simple run: hold one direction and jump at a fixed interval"""
+    jump = jump_every > 0 and tick % jump_every == 0
+    return encode_input(left=direction == "left", right=direction == "right", jump=jump)
+
+
+def level_replays(level_file):
+    """Paths of the recorded replays for a level (replays/<level name>*.json)"""
+    if not os.path.isdir(REPLAY_DIR):
+        return []
+    name = os.path.splitext(os.path.basename(level_file))[0]
+    return sorted(os.path.join(REPLAY_DIR, entry) for entry in os.listdir(REPLAY_DIR)
+                  if entry.startswith(name) and entry.endswith(".json"))
+
+
+def check_level(level_file, max_ticks=None):
+    """Check that all of a level's checkpoints can be reached.
+
+    The level's recorded replays are tried first, then each scripted run.
+    Returns (completed, how, ticks used, checkpoints reached, checkpoint count)
+    for the first run that completes, or the furthest one if none does.
+    A level without checkpoints has no goal to check: completed is None.
+    """
+    if max_ticks is None:
+        max_ticks = CHECK_SECONDS * play_level.PHYSICS_HZ
+
+    if not Simulation(level_file).checkpoints:
+        return None, "no checkpoints", 0, 0, 0
+
+    best = None
+    for path in level_replays(level_file):
+        sim, diverged = run_replay(Replay.load(path), level_file)
+        if diverged is not None:
+            continue
+        result = (sim.completed(), path, sim.ticks, sim.checkpoints_reached(), len(sim.checkpoints))
+        if result[0]:
+            return result
+        if best is None or result[3] > best[3]:
+            best = result
+
+    for direction, jump_every in SCRIPTED_RUNS:
+        sim = Simulation(level_file)
+        while not sim.completed() and sim.ticks < max_ticks:
+            sim.tick(scripted_inputs(sim.ticks, direction, jump_every))
+        result = (sim.completed(), f"{direction}, jump every {jump_every}", sim.ticks,
+                  sim.checkpoints_reached(), len(sim.checkpoints))
+        if result[0]:
+            return result
+        if best is None or result[3] > best[3]:
+            best = result
+    return best
+
+
+def benchmark(level_file, ticks=BENCH_TICKS):
+    """Physics ticks per second for a level under the scripted input"""
+    sim = Simulation(level_file)
+    inputs = [scripted_inputs(tick) for tick in range(ticks)]
+    start = time.perf_counter()
+    for mask in inputs:
+        sim.tick(mask)
+    return ticks / (time.perf_counter() - start)
+
+
+def level_files(paths):
+    if paths:
+        return paths
+    return sorted(os.path.join(LEVEL_DIR, name) for name in os.listdir(LEVEL_DIR)
+                  if name.endswith(LEVEL_EXTENSIONS) and not name.startswith("_"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run platformer levels without a display")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    replay_parser = commands.add_parser("replay", help="play back recorded replays and verify them")
+    replay_parser.add_argument("replays", nargs="+")
+    replay_parser.add_argument("--level", help="run the replay against this level instead")
+
+    check_parser = commands.add_parser("check", help="check levels can be completed")
+    check_parser.add_argument("levels", nargs="*", help=f"level files (default: every level in {LEVEL_DIR}/)")
+    check_parser.add_argument("--max-seconds", type=float, default=CHECK_SECONDS)
+
+    bench_parser = commands.add_parser("bench", help="measure physics ticks per second")
+    bench_parser.add_argument("levels", nargs="*", help=f"level files (default: every level in {LEVEL_DIR}/)")
+    bench_parser.add_argument("--ticks", type=int, default=BENCH_TICKS)
+
+    args = parser.parse_args()
+    failed = False
+
+    if args.command == "replay":
+        for path in args.replays:
+            replay = Replay.load(path)
+            sim, diverged = run_replay(replay, args.level)
+            if diverged is None:
+                print(f"{path}: OK, {len(replay)} ticks, "
+                      f"{sim.checkpoints_reached()}/{len(sim.checkpoints)} checkpoints")
+            else:
+                print(f"{path}: DIVERGED by tick {diverged}")
+                failed = True
+
+    elif args.command == "check":
+        max_ticks = int(args.max_seconds * play_level.PHYSICS_HZ)
+        for path in level_files(args.levels):
+            completed, how, ticks, reached, total = check_level(path, max_ticks)
+            if completed is None:
+                print(f"{path}: UNCHECKED, no checkpoints to reach")
+                continue
+            status = "OK" if completed else "FAIL"
+            print(f"{path}: {status}, {reached}/{total} checkpoints in {ticks} ticks ({how})")
+            failed = failed or not completed
+
+    elif args.command == "bench":
+        for path in level_files(args.levels):
+            print(f"{path}: {benchmark(path, args.ticks):.0f} ticks/s")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
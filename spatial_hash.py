@@ -0,0 +1,125 @@
+import heapq
+
+import pygame
+
+# Size of one bucket in pixels (matches the level builder's tile size)
+CELL_SIZE = 40
+
+
+class SpatialGroup(pygame.sprite.Group):
+    """Sprite group that also keeps its sprites in a uniform bucket grid.
+
+    Sprites are bucketed by the grid cells their rect touches, so collision
+    code can ask for the sprites near a rect instead of scanning the whole
+    group. Adding, removing and kill() keep the buckets in sync automatically;
+    sprites that move must call refresh() afterwards.
+    """
+
+    def __init__(self, *sprites, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.buckets = {}  # (cell_x, cell_y) -> {sprite: None}
+        self.sprite_cells = {}  # sprite -> (min_x, min_y, max_x, max_y)
+        self.sprite_order = {}  # sprite -> insertion number, keeps query order stable
+        self.next_order = 0
+        super().__init__(*sprites)
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (
+            rect.left // size,
+            rect.top // size,
+            (rect.right - 1) // size,
+            (rect.bottom - 1) // size
+        )
+
+    def _insert(self, sprite, cells):
+        min_x, min_y, max_x, max_y = cells
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                self.buckets.setdefault((cell_x, cell_y), {})[sprite] = None
+        self.sprite_cells[sprite] = cells
+
+    def _discard(self, sprite):
+        cells = self.sprite_cells.pop(sprite, None)
+        if cells is None:
+            return
+        min_x, min_y, max_x, max_y = cells
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                bucket = self.buckets.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.pop(sprite, None)
+                    if not bucket:
+                        del self.buckets[(cell_x, cell_y)]
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.sprite_order[sprite] = self.next_order
+        self.next_order += 1
+        self._insert(sprite, self._cell_range(sprite.rect))
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self._discard(sprite)
+        self.sprite_order.pop(sprite, None)
+
+    def refresh(self, sprite):
+        """Re-bucket a sprite after its rect moved"""
+        cells = self._cell_range(sprite.rect)
+        if self.sprite_cells.get(sprite) != cells:
+            self._discard(sprite)
+            self._insert(sprite, cells)
+
+    def query(self, rect):
+        """Return the sprites whose cells overlap rect, in insertion order"""
+        min_x, min_y, max_x, max_y = self._cell_range(rect)
+        if min_x == max_x and min_y == max_y:
+            bucket = self.buckets.get((min_x, min_y))
+            if not bucket:
+                return []
+            found = bucket.keys()
+        elif (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.sprite_cells):
+            # More cells than sprites (a screen-sized area, say): check each sprite's cells instead
+            found = [sprite for sprite, (left, top, right, bottom) in self.sprite_cells.items()
+                     if left <= max_x and right >= min_x and top <= max_y and bottom >= min_y]
+        else:
+            found = {}
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    bucket = self.buckets.get((cell_x, cell_y))
+                    if bucket:
+                        found.update(bucket)
+        return sorted(found, key=self.sprite_order.__getitem__)
+
+
+def nearby(group, rect):
+    """Yield the sprites of group that may touch rect, in group order.
+
+    rect is the live rect being resolved. If it is moved while the caller
+    iterates (collision pushes), the grid is queried again around the new
+    position, so the result matches a full scan of the group exactly.
+    Plain groups are simply scanned.
+    """
+    if not isinstance(group, SpatialGroup):
+        yield from list(group)
+        return
+
+    order = group.sprite_order
+    pending = []
+    queued = set()
+    last = -1
+
+    def enqueue():
+        for sprite in group.query(rect):
+            if sprite not in queued and order[sprite] > last:
+                queued.add(sprite)
+                heapq.heappush(pending, (order[sprite], id(sprite), sprite))
+
+    enqueue()
+    position = tuple(rect)
+    while pending:
+        last, _, sprite = heapq.heappop(pending)
+        yield sprite
+        if tuple(rect) != position:
+            position = tuple(rect)
+            enqueue()
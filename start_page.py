@@ -4,6 +4,7 @@ from first_person import run_game
 pygame.init()
 from question_maker import Qmaker
 from play_level import main
+from level_registry import levels
 
 level_file = "levels/level1.json"
 
@@ -61,7 +62,10 @@ def show_instructions():
         pygame.display.update()
 
 def play():
+    # Parse the level while the instructions are up, and the one after it while this one is played
+    levels.preload(level_file)
     show_instructions()# this will be your actual game loop
+    levels.preload(levels.next_level(level_file))
     result = main(level_file)
     if result == "quit":
         main_menu()
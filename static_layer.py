@@ -0,0 +1,108 @@
+import pygame
+
+# Size of one cached chunk surface in pixels
+CHUNK_SIZE = 256
+
+
+class StaticLayer(pygame.sprite.Group):
+    """Sprite group that is drawn from pre-composited chunk surfaces.
+
+    Sprites that never change are blitted once into fixed-size chunk
+    surfaces, and drawing the layer costs one blit per chunk no matter how
+    many sprites it holds. Adding or removing a sprite (including kill())
+    marks the chunks it covers as dirty, and they are re-baked on the next
+    draw. Drawing can be limited to the chunks inside a camera's view.
+    """
+
+    def __init__(self, *sprites, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.chunks = {}  # (chunk_x, chunk_y) -> Surface
+        self.chunk_sprites = {}  # (chunk_x, chunk_y) -> {sprite: None}
+        self.dirty = set()
+        super().__init__(*sprites)
+
+    def _chunk_keys(self, rect):
+        size = self.chunk_size
+        for chunk_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for chunk_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield (chunk_x, chunk_y)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        for key in self._chunk_keys(sprite.rect):
+            self.chunk_sprites.setdefault(key, {})[sprite] = None
+            self.dirty.add(key)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        for key in self._chunk_keys(sprite.rect):
+            sprites = self.chunk_sprites.get(key)
+            if sprites is not None:
+                sprites.pop(sprite, None)
+            self.dirty.add(key)
+
+    def invalidate(self, rect=None):
+        """Force the chunks under rect (or every chunk) to be re-baked"""
+        if rect is None:
+            self.dirty.update(self.chunk_sprites)
+        else:
+            self.dirty.update(self._chunk_keys(pygame.Rect(rect)))
+
+    def _bake(self, key):
+        sprites = self.chunk_sprites.get(key)
+        if not sprites:
+            self.chunk_sprites.pop(key, None)
+            self.chunks.pop(key, None)
+            return
+
+        size = self.chunk_size
+        chunk = pygame.Surface((size, size), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert_alpha()
+        chunk.fill((0, 0, 0, 0))
+
+        origin_x = key[0] * size
+        origin_y = key[1] * size
+        for sprite in sprites:
+            chunk.blit(sprite.image, (sprite.rect.x - origin_x, sprite.rect.y - origin_y))
+
+        # Fully covered chunks don't need alpha at all, the rest are RLE encoded
+        # so their transparent runs are skipped when blitting
+        if pygame.mask.from_surface(chunk, 254).count() == size * size:
+            if pygame.display.get_surface() is not None:
+                chunk = chunk.convert()
+        else:
+            chunk.set_alpha(255, pygame.RLEACCEL)
+        self.chunks[key] = chunk
+
+    def bake(self):
+        """Re-composite every dirty chunk"""
+        for key in self.dirty:
+            self._bake(key)
+        self.dirty.clear()
+
+    def draw(self, surface, offset=(0, 0), area=None):
+        """Blit the chunks, moved by offset.
+
+        If area (a rect in world coordinates) is given, only the chunks that
+        overlap it are drawn.
+        """
+        if self.dirty:
+            self.bake()
+
+        size = self.chunk_size
+        offset_x, offset_y = offset
+        if area is None:
+            visible = self.chunks.items()
+        else:
+            area = pygame.Rect(area)
+            visible = []
+            for key in self._chunk_keys(area):
+                chunk = self.chunks.get(key)
+                if chunk is not None:
+                    visible.append((key, chunk))
+
+        drawn = []
+        for (chunk_x, chunk_y), chunk in visible:
+            drawn.append(surface.blit(chunk, (chunk_x * size + offset_x, chunk_y * size + offset_y)))
+        return drawn
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 512  # Rendered strings kept
+LAYOUT_CACHE_SIZE = 64  # Wrapped paragraphs kept
+
+
+def _color_key(color):
+    # Colors come as tuples, lists, names or pygame.Color; make them hashable
+    if isinstance(color, (str, tuple)):
+        return color
+    return tuple(color)
+
+
+class TextCache:
+    """LRU cache of rendered text and of word-wrap layouts.
+
+    render() returns the same surface for the same (font, text, color,
+    antialias) until it falls out of the cache, so a screen whose text
+    hasn't changed costs only blits. The surfaces are shared and must not
+    be drawn on.
+    """
+
+    def __init__(self, max_surfaces=TEXT_CACHE_SIZE, max_layouts=LAYOUT_CACHE_SIZE):
+        self.max_surfaces = max_surfaces
+        self.max_layouts = max_layouts
+        self.surfaces = OrderedDict()  # (font, text, color, antialias) -> Surface
+        self.layouts = OrderedDict()  # (font, text, width, height) -> tuple of lines
+        self.hits = 0
+        self.misses = 0
+        self.layout_hits = 0
+        self.layout_misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Surface of text rendered in font, like font.render(text, antialias, color)"""
+        key = (font, text, _color_key(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def wrap(self, font, text, width, height):
+        """Lines of text word-wrapped to width, stopping once height is full.
+
+        Line i belongs at i * font.get_linesize() below the top. Words are
+        measured with font.size(), nothing is rendered.
+        """
+        key = (font, text, width, height)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            self.layout_hits += 1
+            self.layouts.move_to_end(key)
+            return lines
+
+        self.layout_misses += 1
+        lines = self._layout(font, text, width, height)
+        self.layouts[key] = lines
+        if len(self.layouts) > self.max_layouts:
+            self.layouts.popitem(last=False)
+        return lines
+
+    @staticmethod
+    def _layout(font, text, width, height):
+        space_width = font.size(' ')[0]
+        line_height = font.get_linesize()
+
+        lines = []
+        current_line = []
+        current_line_width = 0
+        current_y = 0
+        for word in text.split(' '):
+            word_width = font.size(word)[0]
+            if current_line_width + word_width <= width:
+                current_line.append(word)
+                current_line_width += word_width + space_width
+            else:
+                lines.append(' '.join(current_line))
+
+                # Start new line
+                current_line = [word]
+                current_line_width = word_width + space_width
+                current_y += line_height
+
+                # Stop if we run out of space
+                if current_y + line_height > height:
+                    break
+
+        # The last line only if it fits
+        if current_line and current_y + line_height <= height:
+            lines.append(' '.join(current_line))
+        return tuple(lines)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.layouts.clear()
+        self.hits = 0
+        self.misses = 0
+        self.layout_hits = 0
+        self.layout_misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        layout_lookups = self.layout_hits + self.layout_misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "surfaces": len(self.surfaces),
+            "layout_hits": self.layout_hits,
+            "layout_misses": self.layout_misses,
+            "layout_hit_rate": self.layout_hits / layout_lookups if layout_lookups else 0.0,
+            "layouts": len(self.layouts)
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (f"text {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}); "
+                f"wrap {stats['layout_hits']} hits, {stats['layout_misses']} misses "
+                f"({stats['layout_hit_rate']:.0%})")
+
+
+# Cache shared by everything that draws text
+text_cache = TextCache()
@@ -0,0 +1,227 @@
+# Painted cells are stored as small integer codes; a Palette maps each code
+# to a (tile type, color) pair and code 0 is an empty cell
+
+EMPTY = 0
+MAX_DENSE_CODE = 255
+DENSE_LIMIT = 16 * 1024 * 1024  # Most cells (bytes) a dense grid may allocate
+
+
+class Palette:
+    """Numbers the (tile type, color) pairs in use, starting from 1"""
+
+    def __init__(self):
+        self.entries = [None]  # code -> (tile type, color)
+        self.codes = {}  # (tile type, color) -> code
+
+    def code(self, tile_type, color):
+        key = (tile_type, tuple(color))
+        code = self.codes.get(key)
+        if code is None:
+            code = len(self.entries)
+            self.entries.append(key)
+            self.codes[key] = code
+        return code
+
+    def __getitem__(self, code):
+        return self.entries[code]
+
+    def copy(self):
+        palette = Palette()
+        palette.entries = list(self.entries)
+        palette.codes = dict(self.codes)
+        return palette
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class DenseTiles:
+    """Tile codes for a width x height grid in a bytearray, row by row.
+
+    One byte per cell, so a few thousand cells cost a few kilobytes. The
+    level builder switches to SparseTiles when a cell falls outside the
+    array or the palette outgrows a byte.
+    """
+
+    def __init__(self, width, height, palette=None):
+        self.width = width
+        self.height = height
+        self.codes = bytearray(width * height)
+        self.palette = palette if palette is not None else Palette()
+        self.count = 0
+
+    def fits(self, pos, code=MAX_DENSE_CODE):
+        """Whether code can be stored at pos without switching storage"""
+        x, y = pos
+        return 0 <= x < self.width and 0 <= y < self.height and code <= MAX_DENSE_CODE
+
+    def code_at(self, pos):
+        x, y = pos
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.codes[y * self.width + x]
+        return EMPTY
+
+    def get(self, pos):
+        """(tile type, color) at pos, or None for an empty cell"""
+        code = self.code_at(pos)
+        return self.palette[code] if code else None
+
+    def set(self, pos, code):
+        x, y = pos
+        index = y * self.width + x
+        if not self.codes[index]:
+            self.count += 1
+        self.codes[index] = code
+
+    def remove(self, pos):
+        """Empty the cell at pos; returns False if it already was"""
+        if not self.code_at(pos):
+            return False
+        x, y = pos
+        self.codes[y * self.width + x] = EMPTY
+        self.count -= 1
+        return True
+
+    def clear(self):
+        self.codes = bytearray(self.width * self.height)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, pos):
+        return self.code_at(pos) != EMPTY
+
+    def region(self, x, y, width, height):
+        """(x, y, code) of the painted cells in a rectangle"""
+        found = []
+        start_x = max(0, x)
+        end_x = min(self.width, x + width)
+        if start_x >= end_x:
+            return found
+        for row_y in range(max(0, y), min(self.height, y + height)):
+            offset = row_y * self.width
+            row = self.codes[offset + start_x:offset + end_x]
+            if row.count(EMPTY) == len(row):
+                continue
+            for i, code in enumerate(row):
+                if code:
+                    found.append((start_x + i, row_y, code))
+        return found
+
+    def groups(self):
+        """(tile type, color, [(x, y), ...]) for each palette entry in use"""
+        codes = self.codes
+        width = self.width
+        for code in range(1, min(len(self.palette), MAX_DENSE_CODE + 1)):
+            indices = []
+            index = codes.find(code)
+            # find() scans in C, so empty space costs next to nothing
+            while index != -1:
+                indices.append(index)
+                index = codes.find(code, index + 1)
+            if indices:
+                positions = [(index % width, index // width) for index in indices]
+                tile_type, color = self.palette[code]
+                yield tile_type, color, positions
+
+    def items(self):
+        """(x, y, tile type, color) of every painted cell"""
+        for tile_type, color, positions in self.groups():
+            for x, y in positions:
+                yield x, y, tile_type, color
+
+    def copy(self):
+        """An independent copy, cheap enough to take on every save"""
+        tiles = DenseTiles(0, 0, self.palette.copy())
+        tiles.width = self.width
+        tiles.height = self.height
+        tiles.codes = bytearray(self.codes)
+        tiles.count = self.count
+        return tiles
+
+    def resized(self, width, height):
+        """A copy covering width x height cells, keeping the cells that still fit"""
+        tiles = DenseTiles(width, height, self.palette)
+        copy_width = min(width, self.width)
+        for y in range(min(height, self.height)):
+            tiles.codes[y * width:y * width + copy_width] = self.codes[y * self.width:y * self.width + copy_width]
+        tiles.count = len(tiles.codes) - tiles.codes.count(EMPTY)
+        return tiles
+
+
+class SparseTiles:
+    """Tile codes for painted cells only, for worlds too big or odd for DenseTiles"""
+
+    def __init__(self, palette=None):
+        self.cells = {}  # (x, y) -> code
+        self.palette = palette if palette is not None else Palette()
+
+    @classmethod
+    def from_tiles(cls, tiles):
+        sparse = cls(tiles.palette)
+        for tile_type, color, positions in tiles.groups():
+            code = tiles.palette.code(tile_type, color)
+            for pos in positions:
+                sparse.cells[pos] = code
+        return sparse
+
+    def fits(self, pos, code=MAX_DENSE_CODE):
+        return True
+
+    def copy(self):
+        tiles = SparseTiles(self.palette.copy())
+        tiles.cells = dict(self.cells)
+        return tiles
+
+    def code_at(self, pos):
+        return self.cells.get(pos, EMPTY)
+
+    def get(self, pos):
+        code = self.cells.get(pos)
+        return self.palette[code] if code else None
+
+    def set(self, pos, code):
+        self.cells[pos] = code
+
+    def remove(self, pos):
+        return self.cells.pop(pos, None) is not None
+
+    def clear(self):
+        self.cells = {}
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, pos):
+        return pos in self.cells
+
+    def region(self, x, y, width, height):
+        cells = self.cells
+        found = []
+        for row_y in range(y, y + height):
+            for cell_x in range(x, x + width):
+                code = cells.get((cell_x, row_y))
+                if code:
+                    found.append((cell_x, row_y, code))
+        return found
+
+    def groups(self):
+        by_code = {}
+        for pos, code in self.cells.items():
+            by_code.setdefault(code, []).append(pos)
+        for code, positions in sorted(by_code.items()):
+            tile_type, color = self.palette[code]
+            yield tile_type, color, positions
+
+    def items(self):
+        for (x, y), code in self.cells.items():
+            tile_type, color = self.palette[code]
+            yield x, y, tile_type, color
+
+
+def make_tiles(width, height):
+    """Dense storage for a width x height world, or sparse if that would be too big"""
+    if width * height <= DENSE_LIMIT:
+        return DenseTiles(width, height)
+    return SparseTiles()